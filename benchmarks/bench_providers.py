@@ -0,0 +1,113 @@
+"""
+Benchmark for the metric-provider scheduler.
+
+Runs many cheap providers next to one that is slower than its interval and
+one that never returns, with a CPU/MEM Sampler alongside, and reports:
+  - how late the cheap providers ran compared to their interval,
+  - how many runs of the slow provider were skipped rather than queued,
+  - that the stuck provider was reported as timed out,
+  - the spacing of the Sampler's samples, which no provider should disturb.
+
+From the root folder:
+    python benchmarks/bench_providers.py
+    python benchmarks/bench_providers.py --providers 200 --seconds 10
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from providers import BLOCKING, MetricProvider, ProviderScheduler  # noqa: E402
+from sampler import Sampler  # noqa: E402
+
+# --- Configuration ---
+PROVIDERS = 50
+INTERVAL_MS = 100
+SECONDS = 5.0
+SLOW_S = 0.35  # The slow provider takes this long on a INTERVAL_MS cadence
+# --- End Configuration ---
+
+
+class CheapProvider(MetricProvider):
+    fields = ("value",)
+
+    def __init__(self, name, interval_ms):
+        super().__init__(interval_ms)
+        self.name = name
+        self.calls = []
+
+    def collect(self):
+        self.calls.append(time.monotonic())
+        return {"value": len(self.calls)}
+
+
+class SlowProvider(CheapProvider):
+    cost = BLOCKING
+
+    def collect(self):
+        time.sleep(SLOW_S)
+        return super().collect()
+
+
+class StuckProvider(CheapProvider):
+    cost = BLOCKING
+    timeout_ms = 200
+
+    def __init__(self, name, interval_ms):
+        super().__init__(name, interval_ms)
+        self.release = threading.Event()
+
+    def collect(self):
+        self.release.wait()
+        return super().collect()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--providers", type=int, default=PROVIDERS)
+    parser.add_argument("--interval-ms", type=int, default=INTERVAL_MS)
+    parser.add_argument("--seconds", type=float, default=SECONDS)
+    args = parser.parse_args()
+
+    scheduler = ProviderScheduler()
+    cheap = [CheapProvider(f"cheap{i}", args.interval_ms) for i in range(args.providers)]
+    slow = SlowProvider("slow", args.interval_ms)
+    stuck = StuckProvider("stuck", args.interval_ms)
+    for provider in cheap + [slow, stuck]:
+        scheduler.add(provider)
+    sampler = Sampler(args.interval_ms)
+    sampler.start()
+    scheduler.start()
+    time.sleep(args.seconds)
+    stuck_result = scheduler.results.get("stuck")
+    stuck.release.set()
+    scheduler.stop()
+    scheduler.join()
+    sampler.stop()
+    sampler.join()
+
+    lateness = []
+    for provider in cheap:
+        gaps = [b - a for a, b in zip(provider.calls, provider.calls[1:])]
+        lateness.extend((gap * 1000 - args.interval_ms) for gap in gaps)
+    expected = int(args.seconds * 1000 / args.interval_ms)
+    _, samples = sampler.buffer.since(0)
+    spacing = [(b[0] - a[0]) * 1000 for a, b in zip(samples, samples[1:])]
+    print(f"{args.providers} cheap providers every {args.interval_ms} ms for {args.seconds:.0f} s")
+    print(f"cheap lateness p50/p99: {percentile(lateness, 0.5):.2f} / {percentile(lateness, 0.99):.2f} ms")
+    print(f"slow provider: {len(slow.calls)} runs, {expected - len(slow.calls)} ticks skipped")
+    print(f"stuck provider: {stuck_result[2] if stuck_result else 'no result'}")
+    print(f"sampler spacing p50/p99: {percentile(spacing, 0.5):.1f} / {percentile(spacing, 0.99):.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Benchmark for the multi-host dashboard client against local agents.
+
+Starts one subprocess serving a sampler's samples on many localhost ports
+(one agent per port, so every "host" has its own connection), plus a few
+ports nothing listens on. RemoteHosts then polls all of them and the
+benchmark reports how long each round took, what the client cost in CPU
+per round, and how the dead hosts were backed off.
+
+From the root folder:
+    python benchmarks/bench_remote.py                  # 300 hosts every 2 s
+    python benchmarks/bench_remote.py --hosts 50 --interval-ms 500
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from remote import RemoteHosts, serve_agent  # noqa: E402
+from sampler import Sampler  # noqa: E402
+
+# --- Configuration ---
+HOSTS = 300
+DEAD_HOSTS = 5
+INTERVAL_MS = 2000
+ROUNDS = 10
+AGENT_STARTUP_S = 10.0
+# --- End Configuration ---
+
+
+def free_ports(count):
+    sockets = []
+    for _ in range(count):
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        sockets.append(s)
+    ports = [s.getsockname()[1] for s in sockets]
+    for s in sockets:
+        s.close()
+    return ports
+
+
+def serve(ports):
+    """
+    Agent mode: serves one sampler on every port until killed.
+    """
+    sampler = Sampler(250)
+    sampler.start()
+
+    async def serve_all():
+        await asyncio.gather(*(serve_agent(sampler, "127.0.0.1", port) for port in ports))
+
+    try:
+        asyncio.run(serve_all())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.stop()
+        sampler.join()
+
+
+def wait_for_agents(ports):
+    deadline = time.monotonic() + AGENT_STARTUP_S
+    for port in ports:
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"agent on port {port} did not come up")
+                time.sleep(0.05)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=HOSTS)
+    parser.add_argument("--dead", type=int, default=DEAD_HOSTS, help="Ports with no agent behind them.")
+    parser.add_argument("--interval-ms", type=int, default=INTERVAL_MS)
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--serve", nargs="+", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return 0
+
+    ports = free_ports(args.hosts + args.dead)
+    live, dead = ports[:args.hosts], ports[args.hosts:]
+    agent = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", *map(str, live)])
+    client = None
+    try:
+        wait_for_agents(live)
+        client = RemoteHosts([("127.0.0.1", port) for port in ports], args.interval_ms)
+        cpu_start = time.process_time()
+        client.start()
+        rounds = []
+        version = 0
+        while len(rounds) < args.rounds:
+            time.sleep(0.01)
+            if client.version != version:
+                version = client.version
+                rounds.append(client.round_seconds)
+        cpu = time.process_time() - cpu_start
+        snapshot = client.snapshot
+    finally:
+        if client is not None:
+            client.stop()
+            client.join(5)
+        agent.terminate()
+        agent.wait()
+
+    up = sum(1 for host in snapshot if host[1] is not None)
+    retries = sorted(host[3] for host in snapshot if host[2] is not None)
+    print(f"hosts: {len(ports)} ({up} up, {len(ports) - up} down), interval {args.interval_ms} ms")
+    # The first round opens every connection; later rounds reuse them
+    print(f"first round (connect): {rounds[0] * 1000:.1f} ms")
+    steady = rounds[1:] or rounds
+    print(f"round p50/p99: {percentile(steady, 0.5) * 1000:.1f} / {percentile(steady, 0.99) * 1000:.1f} ms")
+    print(f"client CPU: {cpu / len(rounds) * 1000:.1f} ms per round")
+    if retries:
+        print(f"dead hosts retry in: {retries[0]:.1f} .. {retries[-1]:.1f} s")
+    return 0 if up == args.hosts else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
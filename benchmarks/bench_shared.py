@@ -0,0 +1,99 @@
+"""
+Shows that publishing to the shared sampler block costs the same however
+many readers are attached, and what one read costs a reader.
+
+Publishing is timed in the writer's own CPU time, so readers competing for
+the same cores do not show up as publish cost. Readers are separate
+programs, as widgets and headless consumers are.
+
+Run from the root folder with:
+    python benchmarks/bench_shared.py [--readers 0,1,4,16] [--samples N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from shared import SharedSampler, SharedSampleWriter  # noqa: E402
+
+BLOCK_NAME = f"system_widget_bench_{os.getpid()}"
+CORES = 64
+
+
+def hammer(name):
+    """
+    Reads the latest sample and the per-core fractions until killed.
+    """
+    reader = SharedSampler(name)
+    while True:
+        reader.buffer.latest()
+        reader.core_usage
+
+
+def time_publish(writer, samples):
+    """
+    Returns the mean CPU cost of one publish() in microseconds.
+    """
+    cores = [0.5] * CORES
+    start = time.process_time()
+    for i in range(samples):
+        writer.publish((time.time(), 12.5, 40.0, 4 << 30, 16 << 30), cores, None, 1000, 0.0)
+    return (time.process_time() - start) / samples * 1e6
+
+
+def time_reads(samples):
+    """
+    Returns the mean cost of latest() and of core_usage, in microseconds.
+    """
+    reader = SharedSampler(BLOCK_NAME)
+    try:
+        start = time.perf_counter()
+        for _ in range(samples):
+            reader.buffer.latest()
+        latest = (time.perf_counter() - start) / samples * 1e6
+        start = time.perf_counter()
+        for _ in range(samples):
+            reader.core_usage
+        cores = (time.perf_counter() - start) / samples * 1e6
+    finally:
+        reader.close()
+    return latest, cores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", default="0,1,4,16")
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--hammer", metavar="NAME", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.hammer:
+        hammer(args.hammer)
+        return
+
+    writer = SharedSampleWriter(BLOCK_NAME)
+    try:
+        time_publish(writer, 100)  # Warm up and give readers something to read
+        latest, cores = time_reads(args.samples)
+        print(f"reader: latest() {latest:6.2f} us   core_usage ({CORES} cores) {cores:6.2f} us")
+        for count in (int(n) for n in args.readers.split(",")):
+            readers = [
+                subprocess.Popen([sys.executable, os.path.abspath(__file__), "--hammer", BLOCK_NAME])
+                for _ in range(count)
+            ]
+            try:
+                time.sleep(0.5)  # Let them attach
+                cost = time_publish(writer, args.samples)
+            finally:
+                for process in readers:
+                    process.kill()
+                    process.wait()
+            print(f"writer: {count:3d} readers attached -> publish {cost:6.2f} us")
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
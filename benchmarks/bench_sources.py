@@ -0,0 +1,53 @@
+"""
+Compares the per-sample cost of each SampleSource.
+
+Run from the root folder with:
+    python benchmarks/bench_sources.py [--samples N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from sources import ProcSource, PsutilSource  # noqa: E402
+
+
+def time_source(source, samples):
+    """
+    Returns the mean cost of one read() in microseconds.
+    """
+    source.read()  # Warm up
+    start = time.perf_counter()
+    for _ in range(samples):
+        source.read()
+    elapsed = time.perf_counter() - start
+    return elapsed / samples * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5000)
+    args = parser.parse_args()
+
+    factories = [PsutilSource]
+    if sys.platform.startswith("linux"):
+        factories.insert(0, ProcSource)
+
+    results = {}
+    for factory in factories:
+        source = factory()
+        try:
+            results[source.name] = time_source(source, args.samples)
+        finally:
+            source.close()
+
+    baseline = results.get("psutil")
+    for name, cost in results.items():
+        speedup = f"  ({baseline / cost:.1f}x psutil)" if baseline and name != "psutil" else ""
+        print(f"{name:>8}: {cost:8.1f} us/sample{speedup}")
+
+
+if __name__ == "__main__":
+    main()
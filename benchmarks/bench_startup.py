@@ -0,0 +1,83 @@
+"""
+Measures how long the widget takes from process start to its first frame,
+and to the first frame showing live values.
+
+Each run launches src/system_widget.py in a fresh process (offscreen unless
+a display is requested) with private settings and data directories. "cold"
+runs start without a cached last sample; "warm" runs start with the one the
+previous run saved at exit, which is painted before the first live sample.
+
+Run from the root folder with:
+    python benchmarks/bench_startup.py [--runs N] [--display]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+WIDGET = os.path.join(ROOT, "src", "system_widget.py")
+
+# --- Configuration ---
+RUNS = 10
+TIMEOUT_S = 30
+# --- End Configuration ---
+
+
+def launch(env):
+    """
+    Starts the widget once. Returns (first_frame_ms, first_live_frame_ms)
+    measured from just before the process was spawned.
+    """
+    start = time.time()
+    output = subprocess.run(
+        [sys.executable, WIDGET], env=env, cwd=ROOT, capture_output=True, text=True, timeout=TIMEOUT_S
+    ).stdout
+    marks = {}
+    for line in output.splitlines():
+        name, _, value = line.partition(" ")
+        if name in ("first_frame", "first_live_frame"):
+            marks[name] = (float(value) - start) * 1000
+    if len(marks) != 2:
+        raise RuntimeError(f"The widget did not report its frames:\n{output}")
+    return marks["first_frame"], marks["first_live_frame"]
+
+
+def summarize(label, results):
+    first = sorted(r[0] for r in results)
+    live = sorted(r[1] for r in results)
+    middle = len(results) // 2
+    print(
+        f"{label:>5}: first frame p50 {first[middle]:7.1f} ms  max {first[-1]:7.1f} ms   "
+        f"live values p50 {live[middle]:7.1f} ms  max {live[-1]:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--display", action="store_true", help="Use the real display, not offscreen.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, SYSTEM_WIDGET_STARTUP_PROBE="1")
+        env["XDG_CONFIG_HOME"] = os.path.join(scratch, "config")
+        env["XDG_DATA_HOME"] = env["LOCALAPPDATA"] = os.path.join(scratch, "data")
+        if not args.display:
+            env["QT_QPA_PLATFORM"] = "offscreen"
+        cache = os.path.join(scratch, "data", "system_widget", "last_sample")
+
+        cold, warm = [], []
+        for _ in range(args.runs):
+            if os.path.exists(cache):
+                os.remove(cache)
+            cold.append(launch(env))
+            warm.append(launch(env))  # Uses the sample the cold run saved
+        summarize("cold", cold)
+        summarize("warm", warm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Benchmark and regression suite for the sampling and render hot paths.
+
+Times each sample source, formatting, label updates, layout, painting and
+one end-to-end tick (sample, publish, update_stats, repaint) at several
+sampling intervals and core counts. Every case reports p50/p99 latency and
+the memory allocated per call (tracemalloc peak, measured in a separate pass
+so tracing does not skew the timings).
+
+Runs without a display. From the root folder:
+    python benchmarks/bench_suite.py                      # print results
+    python benchmarks/bench_suite.py --save-baseline      # record this machine's baseline
+    python benchmarks/bench_suite.py --check              # exit 1 on a regression
+
+Baselines are per machine; record one before a change and --check after it.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt6.QtCore import QSettings  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from cgroups import CgroupMonitor, find_root  # noqa: E402
+from config import Config  # noqa: E402
+from cores import CoreUsage, heat_pixels  # noqa: E402
+from formatting import format_bytes, format_rate  # noqa: E402
+from io_rates import IORates, ProcIOCounters, PsutilIOCounters  # noqa: E402
+from sampler import Sampler  # noqa: E402
+from sensors import SensorReader  # noqa: E402
+from sources import ProcSource, PsutilSource, SampleSource, create_source  # noqa: E402
+
+# --- Configuration ---
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+ITERATIONS = 2000
+TICKS = 20
+ALLOC_ITERATIONS = 20
+INTERVALS_MS = (0, 250)
+CORE_COUNTS = (4, 64, 256)
+TOLERANCE = 1.5  # Allowed slowdown (or allocation growth) before --check fails
+SLACK_US = 5.0  # Absolute slack so sub-microsecond noise never fails a check
+SLACK_BYTES = 1024
+# --- End Configuration ---
+
+
+class SyntheticSource(SampleSource):
+    """
+    A source with any number of cores. Cycles through pre-built /proc/stat
+    per-core chunks so the per-core path does real work at that core count
+    without the host actually having it.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, cores):
+        self.cores = CoreUsage()
+        self.chunks = []
+        for step in range(4):
+            lines = (
+                f"cpu{i} {1000 * step + 3 * i} 0 {500 * step + i} {2000 * step + 7 * i} 0 0 0 0 0 0"
+                for i in range(cores)
+            )
+            self.chunks.append("\n".join(lines).encode())
+        self.step = 0
+
+    def read(self):
+        self.step += 1
+        if self.per_core:
+            self.core_usage = self.cores.update(self.chunks[self.step % len(self.chunks)])
+        return 20.0 + self.step % 7, 40.0, 4 << 30, 16 << 30
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(fn, iterations, interval_ms=0):
+    """
+    Returns per-call durations in microseconds. With interval_ms the calls
+    are spaced out like real ticks, so caches go cold between them.
+    """
+    for _ in range(3):  # Warm up
+        fn()
+    durations = []
+    for _ in range(iterations):
+        if interval_ms:
+            time.sleep(interval_ms / 1000)
+        start = time.perf_counter_ns()
+        fn()
+        durations.append((time.perf_counter_ns() - start) / 1000)
+    return durations
+
+
+def measure_allocations(fn, iterations=ALLOC_ITERATIONS):
+    """
+    Returns the median peak number of bytes allocated by one call.
+    """
+    fn()
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fn()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return percentile(peaks, 0.5)
+
+
+def run_case(results, name, fn, iterations, interval_ms=0, cleanup=None):
+    try:
+        durations = measure(fn, iterations, interval_ms)
+        allocated = measure_allocations(fn)
+    finally:
+        if cleanup is not None:
+            cleanup()
+    results[name] = {
+        "iterations": iterations,
+        "p50_us": round(percentile(durations, 0.5), 2),
+        "p99_us": round(percentile(durations, 0.99), 2),
+        "alloc_bytes": allocated,
+    }
+    print(f"{name:<32} {results[name]['p50_us']:>10.1f} {results[name]['p99_us']:>10.1f} {allocated:>10}")
+
+
+def bench_sources(results, iterations):
+    factories = [("psutil", PsutilSource, PsutilIOCounters)]
+    if sys.platform.startswith("linux"):
+        factories.insert(0, ("proc", ProcSource, ProcIOCounters))
+    for name, source_factory, io_factory in factories:
+        source = source_factory()
+        run_case(results, f"sample/{name}", source.read, iterations)
+        source.per_core = True
+        run_case(results, f"sample/{name}+cores", source.read, iterations, cleanup=source.close)
+        io = IORates(io_factory())
+        run_case(results, f"io/{name}", io.read, iterations, cleanup=io.close)
+    if find_root() is not None:
+        cgroups = CgroupMonitor("self")
+        run_case(results, "cgroups/self", cgroups.read, iterations, cleanup=cgroups.close)
+    try:
+        sensors = SensorReader()
+    except OSError:
+        return  # No hwmon or cpufreq here (containers, most VMs)
+    run_case(results, "sensors", sensors.read, iterations, cleanup=sensors.close)
+
+
+def bench_cores(results, iterations, core_counts):
+    for cores in core_counts:
+        source = SyntheticSource(cores)
+        source.per_core = True
+        run_case(results, f"cores/update/{cores}", source.read, iterations)
+        fractions = source.core_usage
+        run_case(results, f"cores/heat/{cores}", lambda: heat_pixels(fractions), iterations)
+
+
+def bench_formatting(results, iterations):
+    values = [0, 512, 10 ** 4, 3 * 10 ** 6, 7 * 10 ** 9, 2 ** 40]
+
+    def format_all():
+        for value in values:
+            format_bytes(value)
+            format_rate(value)
+
+    run_case(results, "format/bytes", format_all, iterations)
+
+
+def bench_widget(results, widget, iterations):
+    app = QApplication.instance()
+    step = [0]
+
+    def update_labels():
+        step[0] += 1
+        widget.mem_label.setText(f"MEM: {step[0] % 100:.1f}% ({format_bytes(4 << 30)} / {format_bytes(16 << 30)})")
+        widget.cpu_label.setText(f"CPU: {step[0] % 100:.1f}%")
+
+    run_case(results, "widget/labels", update_labels, iterations)
+
+    def update_and_paint():
+        update_labels()
+        app.processEvents()
+
+    run_case(results, "widget/labels+paint", update_and_paint, iterations)
+    run_case(results, "widget/repaint", widget.repaint, iterations)
+    run_case(results, "widget/position_in_corner", widget.position_in_corner, iterations)
+
+
+def bench_ticks(results, widget, ticks, intervals, core_counts):
+    """
+    One tick is what the widget does per interval: the sampler takes and
+    publishes a sample, then update_stats and the resulting repaint run.
+    Sampling is done inline here so each tick is timed as a whole.
+    """
+    app = QApplication.instance()
+    cases = [("auto", lambda: create_source("auto"), False)]
+    cases.extend((f"{cores}c", lambda cores=cores: SyntheticSource(cores), True) for cores in core_counts)
+    for interval_ms in intervals:
+        for label, factory, per_core in cases:
+            widget.config.set("per_core", per_core)
+            app.processEvents()  # Apply the relayout
+            sampler = Sampler(max(interval_ms, 100), source=factory())
+            sampler.set_per_core(per_core)
+            sampler.set_store(widget.create_store())
+            widget.sampler = sampler
+
+            def tick():
+                sampler.tick()
+                widget.update_stats()
+                app.processEvents()
+
+            run_case(results, f"tick/{interval_ms}ms/{label}", tick, ticks, interval_ms, cleanup=sampler.close)
+
+
+def check(results, baseline, tolerance):
+    """
+    Returns the cases that got slower or allocate more than the baseline allows.
+    """
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current["p50_us"] > base["p50_us"] * tolerance + SLACK_US:
+            regressions.append(f"{name}: p50 {base['p50_us']:.1f} -> {current['p50_us']:.1f} us")
+        if current["alloc_bytes"] > base["alloc_bytes"] * tolerance + SLACK_BYTES:
+            regressions.append(f"{name}: alloc {base['alloc_bytes']} -> {current['alloc_bytes']} bytes")
+    return regressions
+
+
+def parse_list(text):
+    return tuple(int(value) for value in text.split(",") if value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--ticks", type=int, default=TICKS)
+    parser.add_argument("--intervals", type=parse_list, default=INTERVALS_MS, help="e.g. 0,250,1000")
+    parser.add_argument("--cores", type=parse_list, default=CORE_COUNTS, help="e.g. 4,64,256")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="Fail if slower than the baseline.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON.")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    from system_widget import SystemMonitorWidget  # After QApplication, like the real entry point
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # A private settings file and history directory, so nothing the user has is touched
+        settings = QSettings(os.path.join(scratch, "settings.ini"), QSettings.Format.IniFormat)
+        config = Config(settings)
+        config.set("history_dir", os.path.join(scratch, "history"))
+        widget = SystemMonitorWidget(config)
+        widget.last_sample_path = os.path.join(scratch, "last_sample")
+        widget.show()
+        widget.timer.stop()
+        widget.sampler.stop()
+        widget.sampler.join()
+        app.processEvents()
+
+        print(f"{'case':<32} {'p50 us':>10} {'p99 us':>10} {'alloc B':>10}")
+        results = {}
+        try:
+            bench_sources(results, args.iterations)
+            bench_cores(results, args.iterations, args.cores)
+            bench_formatting(results, args.iterations)
+            bench_widget(results, widget, min(args.iterations, 500))
+            bench_ticks(results, widget, args.ticks, args.intervals, args.cores)
+        finally:
+            widget.close()
+            config.sync()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    if args.check:
+        try:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error: could not read baseline {args.baseline}: {e}")
+            return 2
+        regressions = check(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
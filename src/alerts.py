@@ -0,0 +1,183 @@
+import os
+import shlex
+import subprocess
+
+from stats import EWMA, WindowedQuantile
+
+# --- Configuration ---
+DEFAULT_HYSTERESIS = 5.0  # Points a value must fall back past the threshold to clear
+DEFAULT_DURATION_S = 10.0  # How long a condition must hold before an alert fires or clears
+# --- End Configuration ---
+
+METRICS = {"cpu": 1, "mem": 2}  # Sample field each metric reads (SAMPLE_FIELDS order)
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+class AlertRule:
+    """
+    One threshold alert, e.g. "cpu.ewma > 90 clear 80 for 30s notify color=red".
+
+    The subject is a metric (cpu, mem), optionally with a statistic: .ewma
+    for the moving average or .pNN for a streaming percentile. The alert
+    fires once the subject has been past the threshold for duration_s and
+    clears once it has been back past the clear level for as long, so a
+    value hovering around the threshold cannot make it flap. Actions are
+    "notify", "color=COLOR" and "hook=COMMAND".
+    """
+
+    def __init__(self, text, metric, stat, above, threshold, clear, duration_s, actions):
+        self.text = text
+        self.metric = metric
+        self.stat = stat
+        self.above = above
+        self.threshold = threshold
+        self.clear = clear
+        self.duration_s = duration_s
+        self.actions = actions
+        self.active = False
+        self.since = None  # When the condition for the next transition started to hold
+
+    def observe(self, value, timestamp):
+        """
+        Feeds one value. Returns True when the alert fires, False when it
+        clears and None when nothing changed.
+        """
+        if self.active:
+            holding = value <= self.clear if self.above else value >= self.clear
+        else:
+            holding = value > self.threshold if self.above else value < self.threshold
+        if not holding:
+            self.since = None
+            return None
+        if self.since is None:
+            self.since = timestamp
+        if timestamp - self.since < self.duration_s:
+            return None
+        self.since = None
+        self.active = not self.active
+        return self.active
+
+
+def parse_duration(text):
+    unit = DURATION_UNITS.get(text[-1:])
+    return float(text[:-1]) * unit if unit else float(text)
+
+
+def parse_rule(text):
+    """
+    Parses "SUBJECT >|< THRESHOLD [clear LEVEL] [for DURATION] ACTION..."
+    into an AlertRule. Raises ValueError on anything it cannot use.
+    """
+    tokens = shlex.split(text)
+    if len(tokens) < 3 or tokens[1] not in (">", "<"):
+        raise ValueError("expected SUBJECT > THRESHOLD or SUBJECT < THRESHOLD")
+    metric, _, stat = tokens[0].partition(".")
+    if metric not in METRICS:
+        raise ValueError(f"unknown metric '{metric}' (expected one of {', '.join(METRICS)})")
+    stat = stat or "value"
+    if stat not in ("value", "ewma") and not (stat.startswith("p") and stat[1:].isdigit() and 0 < int(stat[1:]) < 100):
+        raise ValueError(f"unknown statistic '{stat}' (expected ewma or p1 - p99)")
+    above = tokens[1] == ">"
+    threshold = float(tokens[2])
+    clear = threshold - DEFAULT_HYSTERESIS if above else threshold + DEFAULT_HYSTERESIS
+    duration_s = DEFAULT_DURATION_S
+    actions = {}
+    rest = iter(tokens[3:])
+    for token in rest:
+        if token == "clear":
+            clear = float(next(rest, "nan"))
+        elif token == "for":
+            duration_s = parse_duration(next(rest, ""))
+        elif token == "notify":
+            actions["notify"] = True
+        elif token.startswith(("color=", "hook=")):
+            name, _, value = token.partition("=")
+            actions[name] = value
+        else:
+            raise ValueError(f"unexpected '{token}'")
+    if clear != clear or (clear > threshold if above else clear < threshold):
+        raise ValueError("the clear level must be on the other side of the threshold")
+    if not actions:
+        raise ValueError("no action (notify, color=COLOR or hook=COMMAND)")
+    return AlertRule(text.strip(), metric, stat, above, threshold, clear, duration_s, actions)
+
+
+def parse_rules(text):
+    """
+    Parses ';'-separated rules, warning about and skipping bad ones.
+    """
+    rules = []
+    for part in text.split(";"):
+        if not part.strip():
+            continue
+        try:
+            rules.append(parse_rule(part))
+        except ValueError as e:
+            print(f"Warning: ignoring alert '{part.strip()}': {e}")
+    return rules
+
+
+class AlertEngine:
+    """
+    Evaluates alert rules against every sample, on the sampler's thread.
+
+    Only the statistics the rules ask for are kept, each updated in O(1)
+    per sample. Hooks are started without waiting for them and reaped on
+    later samples. Every other action is left to the listener, called as
+    listener(rule, active, value) from the sampler thread whenever an alert
+    fires or clears.
+    """
+
+    def __init__(self, rules, listener=None):
+        self.rules = rules
+        self.listener = listener
+        self.stats = {}
+        for rule in rules:
+            key = (rule.metric, rule.stat)
+            if rule.stat == "ewma":
+                self.stats[key] = EWMA()
+            elif rule.stat != "value":
+                self.stats[key] = WindowedQuantile(int(rule.stat[1:]) / 100)
+        self.hooks = []
+
+    def observe(self, sample):
+        timestamp = sample[0]
+        values = {}
+        for (metric, stat), estimator in self.stats.items():
+            value = sample[METRICS[metric]]
+            if stat == "ewma":
+                values[metric, stat] = estimator.update(value, timestamp)
+            else:
+                estimator.update(value)
+                values[metric, stat] = estimator.value
+
+        for rule in self.rules:
+            value = values.get((rule.metric, rule.stat))
+            if value is None:
+                value = sample[METRICS[rule.metric]]
+            changed = rule.observe(value, timestamp)
+            if changed is None:
+                continue
+            if "hook" in rule.actions:
+                self.run_hook(rule, changed, value)
+            if self.listener is not None:
+                self.listener(rule, changed, value)
+
+        if self.hooks:
+            self.hooks = [hook for hook in self.hooks if hook.poll() is None]
+
+    def run_hook(self, rule, active, value):
+        """
+        Starts the rule's hook command with the alert in its environment.
+        """
+        env = dict(os.environ)
+        env["SYSTEM_WIDGET_ALERT"] = rule.text
+        env["SYSTEM_WIDGET_ALERT_STATE"] = "fired" if active else "cleared"
+        env["SYSTEM_WIDGET_ALERT_VALUE"] = f"{value:.1f}"
+        try:
+            self.hooks.append(subprocess.Popen(shlex.split(rule.actions["hook"]), env=env))
+        except (OSError, ValueError) as e:
+            print(f"Warning: alert hook '{rule.actions['hook']}' failed: {e}")
+
+    def active_rules(self):
+        return [rule for rule in self.rules if rule.active]
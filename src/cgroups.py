@@ -0,0 +1,316 @@
+import glob
+import os
+import time
+
+from sources import PROC_ROOT, SampleSource, _meminfo_value
+
+# --- Configuration ---
+CGROUP_ROOT = None  # The cgroup2 mount; None finds it in /proc/self/mountinfo
+READ_SIZE = 4096
+# --- End Configuration ---
+
+SELF = "self"  # Stands for the sampling process's own cgroup in a list of cgroups
+
+
+def find_root(proc_root=PROC_ROOT):
+    """
+    Returns (mount point, mount root) of the cgroup v2 hierarchy, or None
+    without one. Hybrid systems mount it next to the v1 controllers
+    (/sys/fs/cgroup/unified). The mount root is the cgroup shown at the
+    mount point: "/" normally, but a container without a cgroup namespace
+    of its own has only its own cgroup (e.g. /system.slice/docker-<id>.scope)
+    mounted.
+    """
+    if CGROUP_ROOT is not None:
+        return CGROUP_ROOT, "/"
+    try:
+        with open(os.path.join(proc_root, "self", "mountinfo"), encoding="utf-8") as f:
+            for line in f:
+                # id parent major:minor root mount-point options ... - fstype source options
+                fields, _, tail = line.partition(" - ")
+                if tail.split(" ", 1)[0] == "cgroup2":
+                    fields = fields.split()
+                    return fields[4], fields[3]
+    except OSError:
+        pass
+    return None
+
+
+def own_cgroup(proc_root=PROC_ROOT, mount_root="/"):
+    """
+    Returns this process's cgroup v2 path ("0::/path" in /proc/self/cgroup),
+    relative to a mount of mount_root. Without a cgroup namespace the path
+    is the host's, so it starts with the mount root, which is stripped.
+    """
+    path = "/"
+    try:
+        with open(os.path.join(proc_root, "self", "cgroup"), encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    path = line[3:].strip()
+                    break
+    except OSError:
+        pass
+    mount_root = mount_root.rstrip("/")
+    if mount_root and (path == mount_root or path.startswith(mount_root + "/")):
+        path = path[len(mount_root):] or "/"
+    return path
+
+
+def expand(patterns, root, mount_root="/"):
+    """
+    Turns "self, system.slice/*.service" into cgroup directories under root,
+    the cgroup2 mount point (whose own cgroup path is mount_root).
+    """
+    directories = []
+    for pattern in patterns.replace(",", " ").split():
+        if pattern == SELF:
+            pattern = own_cgroup(mount_root=mount_root)
+        matches = sorted(glob.glob(os.path.join(root, pattern.lstrip("/")))) if glob.has_magic(pattern) else [
+            os.path.join(root, pattern.lstrip("/"))
+        ]
+        for directory in matches:
+            directory = os.path.normpath(directory)
+            if os.path.isdir(directory) and directory not in directories:
+                directories.append(directory)
+    return directories
+
+
+def _parse_cpus(text):
+    """
+    Counts the CPUs in a cpuset list such as "0-3,8,10-11".
+    """
+    count = 0
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        if first:
+            count += int(last or first) - int(first) + 1
+    return count
+
+
+def _field(buf, length, key):
+    """
+    Returns the integer after key (e.g. b"usage_usec ") in a flat-keyed file, or -1.
+    """
+    start = buf.find(key, 0, length)
+    if start < 0:
+        return -1
+    start += len(key)
+    end = buf.find(b"\n", start, length)
+    return int(buf[start:end if end >= 0 else length])
+
+
+class CgroupReader:
+    """
+    Reads one cgroup's CPU and memory accounting from its cgroup v2 files.
+
+    cpu.stat, cpu.max, memory.current, memory.max, memory.stat and
+    memory.pressure are opened once and kept open; each read() re-reads them
+    with one preadv each into reused buffers. Files a cgroup does not have
+    (the root cgroup, or a controller that is not enabled) are skipped and
+    the host's figures used instead.
+
+    read() returns a dict with:
+      cpu_percent        usage as a share of the CPUs the cgroup may use:
+                         its cpu.max quota, or its effective cpuset
+      cpu_limit          that number of CPUs
+      throttled_percent  share of scheduler periods the quota throttled
+      mem_used           memory.current minus inactive file cache, as
+                         docker stats counts it
+      mem_limit          memory.max, or the host's memory when unlimited
+      mem_percent        mem_used against mem_limit
+      mem_pressure       memory.pressure "some avg10", or None
+    """
+
+    FILES = ("cpu.stat", "cpu.max", "memory.current", "memory.max", "memory.stat", "memory.pressure")
+
+    def __init__(self, directory, root=None, proc_root=PROC_ROOT):
+        self.directory = directory
+        if root is None:
+            found = find_root(proc_root)
+            root = found[0] if found is not None else ""
+        self.name = os.path.relpath(directory, root) if root else directory
+        if self.name == ".":
+            self.name = "/"
+        self.fds = {}
+        for name in self.FILES:
+            try:
+                self.fds[name] = os.open(os.path.join(directory, name), os.O_RDONLY)
+            except OSError:
+                pass
+        if "cpu.stat" not in self.fds:
+            self.close()
+            raise OSError(f"{directory} is not a cgroup v2 directory")
+        self.buffers = {name: bytearray(READ_SIZE) for name in self.fds}
+        self.cpus = self._effective_cpus()
+        self.proc_root = proc_root
+        self._meminfo_fd = None  # Only opened for cgroups without memory accounting
+        self._meminfo_buf = bytearray(READ_SIZE)
+        self._previous = None
+
+    def _effective_cpus(self):
+        try:
+            with open(os.path.join(self.directory, "cpuset.cpus.effective"), encoding="utf-8") as f:
+                return _parse_cpus(f.read()) or os.cpu_count() or 1
+        except (OSError, ValueError):
+            return os.cpu_count() or 1
+
+    def _read(self, name):
+        """
+        Returns (buffer, length) for one held file, or (None, 0) without it.
+        """
+        fd = self.fds.get(name)
+        if fd is None:
+            return None, 0
+        while True:
+            buf = self.buffers[name]
+            length = os.preadv(fd, [buf], 0)
+            if length < len(buf):
+                return buf, length
+            self.buffers[name] = bytearray(2 * len(buf))
+
+    def cpu_limit(self):
+        """
+        Returns how many CPUs the cgroup may use: its quota, else its cpuset.
+        """
+        buf, length = self._read("cpu.max")
+        if buf is not None:
+            quota, _, period = bytes(buf[:length]).partition(b" ")
+            if quota != b"max" and int(period):
+                return min(int(quota) / int(period), self.cpus)
+        return self.cpus
+
+    def host_memory(self):
+        """
+        Returns (total, available) host memory, for what the cgroup does not account.
+        """
+        if self._meminfo_fd is None:
+            self._meminfo_fd = os.open(os.path.join(self.proc_root, "meminfo"), os.O_RDONLY)
+        buf = self._meminfo_buf
+        length = os.preadv(self._meminfo_fd, [buf], 0)
+        return _meminfo_value(buf, length, b"MemTotal:"), _meminfo_value(buf, length, b"MemAvailable:")
+
+    def read(self):
+        now = time.monotonic()
+        buf, length = self._read("cpu.stat")
+        usage = _field(buf, length, b"usage_usec ")
+        periods = _field(buf, length, b"nr_periods ")
+        throttled = _field(buf, length, b"nr_throttled ")
+        cpu_limit = self.cpu_limit()
+
+        previous, self._previous = self._previous, (now, usage, periods, throttled)
+        cpu_percent = throttled_percent = 0.0
+        if previous is not None and now > previous[0]:
+            elapsed_us = (now - previous[0]) * 1e6
+            cpu_percent = min(100.0, max(0.0, (usage - previous[1]) / (elapsed_us * cpu_limit) * 100))
+            if periods > previous[2] >= 0:
+                throttled_percent = (throttled - previous[3]) / (periods - previous[2]) * 100
+
+        total, available = None, None
+        buf, length = self._read("memory.current")
+        if buf is not None:
+            used = int(buf[:length])
+            stat, stat_length = self._read("memory.stat")
+            if stat is not None:
+                used -= max(0, _field(stat, stat_length, b"inactive_file "))
+        else:
+            total, available = self.host_memory()
+            used = total - available
+        buf, length = self._read("memory.max")
+        if buf is not None and not buf.startswith(b"max"):
+            limit = int(buf[:length])
+        else:
+            limit = total if total is not None else self.host_memory()[0]
+
+        pressure = None
+        buf, length = self._read("memory.pressure")
+        if buf is not None:
+            start = buf.find(b"some avg10=", 0, length)
+            if start >= 0:
+                start += len(b"some avg10=")
+                pressure = float(buf[start:buf.find(b" ", start, length)])
+
+        return {
+            "name": self.name,
+            "cpu_percent": round(cpu_percent, 1),
+            "cpu_limit": round(cpu_limit, 2),
+            "throttled_percent": round(throttled_percent, 1),
+            "mem_used": max(0, used),
+            "mem_limit": limit,
+            "mem_percent": round(100.0 * max(0, used) / limit, 1) if limit else 0.0,
+            "mem_pressure": pressure,
+        }
+
+    def close(self):
+        fds = list(self.fds.values())
+        if getattr(self, "_meminfo_fd", None) is not None:
+            fds.append(self._meminfo_fd)
+            self._meminfo_fd = None
+        for fd in fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.fds = {}
+
+
+class CgroupMonitor:
+    """
+    Reads a list of cgroups every tick. Every cgroup's files stay open, so a
+    tick costs a few preadv calls per cgroup and no path lookups; dozens of
+    cgroups fit in a normal tick without a thread of their own.
+
+    read() returns one CgroupReader.read() dict per cgroup, busiest first.
+    """
+
+    def __init__(self, patterns, root=None):
+        found = (root, "/") if root else find_root()
+        if found is None:
+            raise OSError("no cgroup v2 hierarchy is mounted")
+        root, mount_root = found
+        self.readers = []
+        for directory in expand(patterns, root, mount_root):
+            try:
+                self.readers.append(CgroupReader(directory, root))
+            except OSError as e:
+                print(f"Warning: skipping cgroup {directory}: {e}")
+
+    def read(self):
+        stats = []
+        for reader in self.readers:
+            try:
+                stats.append(reader.read())
+            except (OSError, ValueError):
+                pass  # The cgroup went away mid-read; it drops out of the list
+        stats.sort(key=lambda entry: entry["cpu_percent"], reverse=True)
+        return stats
+
+    def close(self):
+        for reader in self.readers:
+            reader.close()
+        self.readers = []
+
+
+class CgroupSource(SampleSource):
+    """
+    Source for running inside a container: CPU and memory of this process's
+    own cgroup measured against its limits, instead of the whole host's.
+    The per-core strip is not available in this mode.
+    """
+
+    name = "cgroup"
+
+    def __init__(self):
+        found = find_root()
+        if found is None:
+            raise OSError("no cgroup v2 hierarchy is mounted")
+        root, mount_root = found
+        self.reader = CgroupReader(os.path.join(root, own_cgroup(mount_root=mount_root).lstrip("/")), root)
+        self.reader.read()  # Prime the CPU counters
+
+    def read(self):
+        stats = self.reader.read()
+        return stats["cpu_percent"], stats["mem_percent"], stats["mem_used"], stats["mem_limit"]
+
+    def close(self):
+        self.reader.close()
@@ -0,0 +1,133 @@
+import os
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QSettings, QTimer, pyqtSignal
+
+from settings_schema import FIELDS, SCHEMA
+
+# --- Configuration ---
+SYNC_DELAY_MS = 500
+# --- End Configuration ---
+
+
+class Config(QObject):
+    """
+    Typed, cached view of the widget's QSettings.
+
+    Every field in SCHEMA is read and coerced once at construction; after
+    that reads are plain attribute lookups (config.widget_width). set()
+    updates the cache, notifies watchers of that one field, and marks the
+    key dirty; dirty keys are written together in a single debounced sync().
+    When the settings file changes on disk (another process, or a hand edit)
+    it is re-read and watchers are notified only for fields whose value
+    actually changed.
+    """
+
+    changed = pyqtSignal(str, object)
+
+    def __init__(self, settings=None, parent=None):
+        super().__init__(parent)
+        self.settings = settings if settings is not None else QSettings("MyApplication", "SystemMonitorWidget")
+        self._values = {field.name: field.coerce(self.settings.value(field.name)) for field in SCHEMA}
+        self._dirty = set()
+        self._watchers = {}
+
+        self._sync_timer = QTimer(self)
+        self._sync_timer.setSingleShot(True)
+        self._sync_timer.setInterval(SYNC_DELAY_MS)
+        self._sync_timer.timeout.connect(self.sync)
+
+        self._file_watcher = QFileSystemWatcher(self)
+        self._file_watcher.fileChanged.connect(self.reload)
+        self._watch_file()
+
+    def __getattr__(self, name):
+        values = self.__dict__.get("_values")
+        if values is not None and name in values:
+            return values[name]
+        raise AttributeError(name)
+
+    def get(self, name):
+        return self._values[name]
+
+    def values(self):
+        """
+        Returns a copy of every field's current value.
+        """
+        return dict(self._values)
+
+    def watch(self, names, callback):
+        """
+        Calls callback(name, value) whenever one of the named fields changes.
+        """
+        if isinstance(names, str):
+            names = (names,)
+        for name in names:
+            self._watchers.setdefault(name, []).append(callback)
+
+    def set(self, name, value):
+        """
+        Validates and stores a value. The write to disk is deferred and
+        coalesced with any other changes made within SYNC_DELAY_MS. A value
+        the field does not accept is reported and the current one kept.
+        Returns whether the value was accepted.
+        """
+        try:
+            value = FIELDS[name].validate(value)
+        except ValueError as e:
+            print(f"Error: not setting {name}: {e}")
+            return False
+        if value == self._values[name]:
+            return True
+        self._values[name] = value
+        self._dirty.add(name)
+        self._sync_timer.start()
+        self._notify(name, value)
+        return True
+
+    def sync(self):
+        """
+        Writes all pending changes to the backing store at once.
+        """
+        self._sync_timer.stop()
+        if not self._dirty:
+            return
+        for name in self._dirty:
+            self.settings.setValue(name, self._values[name])
+        self._dirty.clear()
+        self.settings.sync()
+        self._watch_file()
+
+    def reload(self):
+        """
+        Re-reads the backing store and notifies watchers of changed fields.
+        Fields with pending local changes keep their local value.
+        """
+        self.settings.sync()
+        for field in SCHEMA:
+            if field.name in self._dirty:
+                continue
+            stored = self.settings.value(field.name)
+            if stored is None:
+                value = field.default
+            else:
+                try:
+                    value = field.validate(stored)
+                except ValueError as e:
+                    print(f"Warning: ignoring {field.name} from the settings file: {e}")
+                    continue
+            if value != self._values[field.name]:
+                self._values[field.name] = value
+                self._notify(field.name, value)
+        self._watch_file()
+
+    def _watch_file(self):
+        # Only file-backed stores can be watched (not the Windows registry).
+        # Editors and QSettings itself replace the file, which drops the watch.
+        path = self.settings.fileName()
+        if os.path.isfile(path) and path not in self._file_watcher.files():
+            self._file_watcher.addPath(path)
+
+    def _notify(self, name, value):
+        self.changed.emit(name, value)
+        for callback in self._watchers.get(name, ()):
+            callback(name, value)
@@ -0,0 +1,127 @@
+import colorsys
+import operator
+
+np = None  # NumPy, once _load_numpy() has found it
+
+# --- Configuration ---
+HEAT_ALPHA = 220
+HEAT_LEVELS = 256
+# --- End Configuration ---
+
+
+def _build_heat_palette():
+    """
+    Builds a green -> yellow -> red palette as 32-bit pixels in QImage's
+    Format_ARGB32 byte order (B, G, R, A on little-endian machines).
+    """
+    palette = []
+    for level in range(HEAT_LEVELS):
+        hue = (1.0 - level / (HEAT_LEVELS - 1)) / 3.0
+        r, g, b = colorsys.hsv_to_rgb(hue, 0.9, 1.0)
+        palette.append(bytes((int(b * 255), int(g * 255), int(r * 255), HEAT_ALPHA)))
+    return palette
+
+
+HEAT_PALETTE = _build_heat_palette()
+_HEAT_PALETTE_ARRAY = None
+_numpy_checked = False
+
+
+def _load_numpy():
+    """
+    Imports NumPy the first time per-core math is needed, so startup does
+    not pay for it unless the per-core view is on. NumPy is optional;
+    plain lists are used without it.
+    """
+    global np, _HEAT_PALETTE_ARRAY, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+        except ImportError:
+            return None
+        _HEAT_PALETTE_ARRAY = numpy.frombuffer(b"".join(HEAT_PALETTE), dtype=numpy.uint32)
+        np = numpy
+    return np
+
+
+class CoreUsage:
+    """
+    Turns the per-core jiffy counters of /proc/stat into busy fractions.
+
+    All cores are handled in one batched operation: with NumPy the counters
+    become one (cores x fields) array and the deltas are a handful of vector
+    operations; without it the same column-wise math runs through map/zip.
+    Either way there is no Python-level loop per core, so the cost of a tick
+    stays flat as the core count grows.
+    """
+
+    def __init__(self):
+        self._prev_total = None
+        self._prev_idle = None
+
+    def update(self, chunk):
+        """
+        Takes the consecutive "cpuN ..." lines of /proc/stat as bytes and
+        returns the busy fraction (0.0 - 1.0) of every core since the last call.
+        """
+        ncores = chunk.count(b"\n") + 1
+        if _load_numpy() is not None:
+            return self._update_numpy(chunk, ncores)
+        tokens = chunk.split()
+        return self._update_python(tokens, len(tokens) // ncores)
+
+    def _update_numpy(self, chunk, ncores):
+        # Dropping the letters turns "cpuN" into a plain N column, so NumPy
+        # parses the whole chunk straight into integers in one call.
+        values = np.fromstring(chunk.translate(None, b"cpu"), dtype=np.int64, sep=" ")
+        # Columns: N user nice system idle iowait irq softirq steal [guest guest_nice]
+        counters = values.reshape(ncores, -1)[:, 1:9]
+        total = counters.sum(axis=1)
+        idle = counters[:, 3] + counters[:, 4]
+
+        prev_total, prev_idle = self._prev_total, self._prev_idle
+        self._prev_total, self._prev_idle = total, idle
+        if prev_total is None or prev_total.shape != total.shape:
+            return np.zeros(ncores)
+
+        total_delta = total - prev_total
+        busy_delta = total_delta - (idle - prev_idle)
+        busy = np.divide(
+            busy_delta, total_delta, out=np.zeros(ncores), where=total_delta > 0
+        )
+        return np.clip(busy, 0.0, 1.0, out=busy)
+
+    def _update_python(self, tokens, width):
+        del tokens[::width]  # Drop the "cpuN" labels
+        values = list(map(int, tokens))
+        stride = width - 1
+        columns = [values[i::stride] for i in range(8)]
+        total = list(map(sum, zip(*columns)))
+        idle = list(map(operator.add, columns[3], columns[4]))
+
+        prev_total, prev_idle = self._prev_total, self._prev_idle
+        self._prev_total, self._prev_idle = total, idle
+        if prev_total is None or len(prev_total) != len(total):
+            return [0.0] * len(total)
+
+        total_delta = list(map(operator.sub, total, prev_total))
+        idle_delta = list(map(operator.sub, idle, prev_idle))
+        return list(map(_busy_fraction, total_delta, idle_delta))
+
+
+def _busy_fraction(total_delta, idle_delta):
+    if total_delta <= 0:
+        return 0.0
+    return min(1.0, max(0.0, (total_delta - idle_delta) / total_delta))
+
+
+def heat_pixels(fractions):
+    """
+    Maps busy fractions to one row of ARGB32 pixels using HEAT_PALETTE.
+    """
+    if _load_numpy() is not None:
+        levels = (np.asarray(fractions, dtype=np.float64) * (HEAT_LEVELS - 1)).astype(np.intp)
+        return _HEAT_PALETTE_ARRAY[levels].tobytes()
+    scale = HEAT_LEVELS - 1
+    return b"".join(map(HEAT_PALETTE.__getitem__, (int(f * scale) for f in fractions)))
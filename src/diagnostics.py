@@ -0,0 +1,223 @@
+import os
+import time
+import tracemalloc
+from collections import deque
+
+import psutil
+
+from tsdb import data_directory
+
+# --- Configuration ---
+DIAGNOSTICS_WINDOW = 120  # Ticks kept for the mean/max figures
+MISSED_FRACTION = 0.5  # A tick later than this fraction of the interval missed its deadline
+TRACEMALLOC_FRAMES = 10
+PROFILE_TOP = 25
+PROCESS_USAGE_MIN_S = 1.0  # Shortest window the widget's own CPU% is measured over
+# --- End Configuration ---
+
+
+def diagnostics_directory():
+    return os.path.join(data_directory(), "diagnostics")
+
+
+class Diagnostics:
+    """
+    Measures what the widget itself costs.
+
+    - The process's own CPU time and RSS (sampler thread included).
+    - Timer jitter: the real time between two timer ticks compared to the
+      interval the timer was set to, and how many ticks were late by more
+      than MISSED_FRACTION of it.
+    - How long each phase of a tick took. begin() starts a tick and each
+      mark(name) closes the phase that ran since the previous mark; record()
+      takes durations measured elsewhere (painting, the sampler thread).
+
+    Recording is a perf_counter call and a deque append, so it stays on all
+    the time; the figures only need computing when they are shown or dumped.
+    cProfile and tracemalloc can be switched on at runtime; switching them
+    off writes their report next to the JSON dumps.
+    """
+
+    def __init__(self, window=DIAGNOSTICS_WINDOW):
+        self.window = window
+        self.process = psutil.Process()
+        self.phases = {}
+        self.jitter = deque(maxlen=window)
+        self.ticks = 0
+        self.missed = 0
+        self.profiler = None
+        self._last_fire = None
+        self._mark = None
+        self._last_cpu = None
+        self._usage = (0.0, 0)
+
+    def timer_fired(self, interval_ms):
+        """
+        Records one timer tick against the interval the timer was set to.
+        """
+        now = time.perf_counter()
+        last, self._last_fire = self._last_fire, now
+        if last is None or interval_ms <= 0:
+            return
+        late_ms = (now - last) * 1000 - interval_ms
+        self.ticks += 1
+        self.jitter.append(late_ms)
+        if late_ms > interval_ms * MISSED_FRACTION:
+            self.missed += 1
+
+    def reset_timer(self):
+        """
+        Forgets the last tick, for when the timer is restarted or stopped.
+        """
+        self._last_fire = None
+
+    def begin(self):
+        self._mark = time.perf_counter()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        if self._mark is not None:
+            self.record(name, now - self._mark)
+        self._mark = now
+
+    def record(self, name, seconds):
+        durations = self.phases.get(name)
+        if durations is None:
+            durations = self.phases[name] = deque(maxlen=self.window)
+        durations.append(seconds)
+
+    def process_usage(self):
+        """
+        Returns (cpu_percent, rss) of this process. The CPU figure covers at
+        least PROCESS_USAGE_MIN_S; calls in between return the last figures,
+        so the row and a dump do not shorten each other's window.
+        """
+        now = time.monotonic()
+        last = self._last_cpu
+        if last is not None and now - last[0] < PROCESS_USAGE_MIN_S:
+            return self._usage
+        with self.process.oneshot():
+            times = self.process.cpu_times()
+            rss = self.process.memory_info().rss
+        cpu_time = times.user + times.system
+        self._last_cpu = (now, cpu_time)
+        cpu_percent = 0.0 if last is None else (cpu_time - last[1]) / (now - last[0]) * 100
+        self._usage = (cpu_percent, rss)
+        return self._usage
+
+    def tick_ms(self):
+        """
+        Returns the mean total cost of a tick over the window, in ms.
+        """
+        return sum(sum(d) / len(d) for d in self.phases.values() if d) * 1000
+
+    def jitter_ms(self):
+        """
+        Returns (mean absolute, worst) lateness over the window, in ms.
+        """
+        if not self.jitter:
+            return 0.0, 0.0
+        return sum(abs(j) for j in self.jitter) / len(self.jitter), max(self.jitter)
+
+    def snapshot(self):
+        """
+        Returns everything measured so far as a JSON-friendly dict.
+        """
+        cpu_percent, rss = self.process_usage()
+        times = self.process.cpu_times()
+        mean_jitter, max_jitter = self.jitter_ms()
+        return {
+            "timestamp": time.time(),
+            "pid": self.process.pid,
+            "cpu_percent": round(cpu_percent, 2),
+            "cpu_user_s": times.user,
+            "cpu_system_s": times.system,
+            "rss": rss,
+            "threads": self.process.num_threads(),
+            "timer": {
+                "ticks": self.ticks,
+                "missed": self.missed,
+                "mean_jitter_ms": round(mean_jitter, 3),
+                "max_jitter_ms": round(max_jitter, 3),
+            },
+            "phases": {
+                name: {
+                    "count": len(d),
+                    "last_ms": round(d[-1] * 1000, 4),
+                    "mean_ms": round(sum(d) / len(d) * 1000, 4),
+                    "max_ms": round(max(d) * 1000, 4),
+                }
+                for name, d in self.phases.items() if d
+            },
+            "profiling": self.profiler is not None,
+            "tracing_allocations": self.tracing(),
+        }
+
+    def dump(self, extra=None, directory=None):
+        """
+        Writes snapshot() (plus any extra fields) to a timestamped JSON
+        file and returns its path.
+        """
+        import json  # Only needed when a dump is asked for
+
+        record = self.snapshot()
+        if extra:
+            record.update(extra)
+        path = self._report_path("diagnostics", "json", directory)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+        return path
+
+    def set_profiling(self, enabled, directory=None):
+        """
+        Starts or stops cProfile on the calling (GUI) thread. Stopping saves
+        the .prof file, prints the top entries and returns the file's path.
+        """
+        if enabled:
+            if self.profiler is None:
+                import cProfile  # Only loaded when profiling is switched on
+
+                self.profiler = cProfile.Profile()
+                self.profiler.enable()
+            return None
+        if self.profiler is None:
+            return None
+        import io
+        import pstats
+
+        profiler, self.profiler = self.profiler, None
+        profiler.disable()
+        path = self._report_path("profile", "prof", directory)
+        profiler.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(report.getvalue())
+        return path
+
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def set_tracing(self, enabled, directory=None):
+        """
+        Starts or stops tracemalloc. Stopping writes the biggest allocation
+        sites still alive to a text file and returns its path.
+        """
+        if enabled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            return None
+        if not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        path = self._report_path("tracemalloc", "txt", directory)
+        with open(path, "w", encoding="utf-8") as f:
+            for stat in snapshot.statistics("traceback")[:PROFILE_TOP]:
+                f.write(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                f.writelines(f"    {line}\n" for line in stat.traceback.format())
+        return path
+
+    def _report_path(self, kind, extension, directory=None):
+        directory = directory or diagnostics_directory()
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.{extension}")
@@ -0,0 +1,23 @@
+def format_bytes(bytes, decimals=1):
+    """
+    Helper function to format bytes into human-readable units.
+    """
+    KB = 1024
+    MB = KB * 1024
+    GB = MB * 1024
+
+    if bytes < KB:
+        return f"{bytes:.0f} B"
+    elif bytes < MB:
+        return f"{bytes / KB:.{decimals}f} KB"
+    elif bytes < GB:
+        return f"{bytes / MB:.{decimals}f} MB"
+    else:
+        return f"{bytes / GB:.{decimals}f} GB"
+
+
+def format_rate(bytes_per_second, decimals=1):
+    """
+    Formats a throughput in bytes per second, e.g. "1.2 MB/s".
+    """
+    return f"{format_bytes(bytes_per_second, decimals)}/s"
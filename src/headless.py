@@ -0,0 +1,265 @@
+"""
+Headless exporter: samples the same numbers as the widget without importing Qt.
+
+Run from the root folder with:
+    python src/headless.py [--interval-ms N] [--output PATH] [--io] [--source cgroup] [--cgroups PATTERNS]
+    python src/headless.py --prometheus PORT
+    python src/headless.py --publish [NAME]    # Shared sampler daemon
+    python src/headless.py --attach [NAME]     # Read a daemon instead of sampling
+    python src/headless.py --agent [PORT]      # Serve samples to multi-host dashboards
+    python src/headless.py --alerts "cpu > 90 for 30s hook='notify-send busy'"
+or through the widget entry point:
+    python src/system_widget.py --headless ...
+"""
+import argparse
+import json
+import signal
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from alerts import AlertEngine, parse_rules
+from sampler import SAMPLE_FIELDS, SAMPLE_SOURCE, SUBSAMPLE_MS, Sampler
+from settings_schema import DEFAULTS
+from shared import SHARED_NAME, SharedSampler, SharedSampleWriter
+from sources import create_source
+from tsdb import StoreLocked, TimeSeriesStore, default_store_directory
+
+# --- Configuration ---
+PROMETHEUS_HOST = "127.0.0.1"
+METRIC_PREFIX = "system_widget"
+# --- End Configuration ---
+
+PROMETHEUS_METRICS = (
+    ("cpu_percent", "cpu_percent", "CPU utilization across all cores, in percent."),
+    ("mem_percent", "memory_percent", "Memory utilization, in percent."),
+    ("mem_used", "memory_used_bytes", "Memory in use, in bytes."),
+    ("mem_total", "memory_total_bytes", "Total physical memory, in bytes."),
+)
+
+
+IO_METRICS = (
+    ("disk_read", "disk_read_bytes_per_second", "Bytes read from all disks per second."),
+    ("disk_write", "disk_write_bytes_per_second", "Bytes written to all disks per second."),
+    ("disk_read_iops", "disk_reads_per_second", "Completed disk reads per second."),
+    ("disk_write_iops", "disk_writes_per_second", "Completed disk writes per second."),
+)
+
+
+def sample_to_dict(sample, core_usage=(), io_rates=None, cgroup_stats=None, spread=None):
+    """
+    Converts a sample tuple (SAMPLE_FIELDS order) into a JSON-friendly dict.
+    With a sub-sampling spread for it, the lowest and highest readings of
+    the interval are included too.
+    """
+    record = dict(zip(SAMPLE_FIELDS, sample))
+    record["mem_used"] = int(record["mem_used"])
+    record["mem_total"] = int(record["mem_total"])
+    if len(core_usage):
+        record["cores"] = [round(float(f) * 100, 1) for f in core_usage]
+    if io_rates is not None:
+        for field, _, _ in IO_METRICS:
+            record[field] = round(io_rates[field], 1)
+        record["net"] = {
+            name: {"rx": round(rx, 1), "tx": round(tx, 1)} for name, rx, tx, _ in io_rates["net"]
+        }
+    if cgroup_stats is not None:
+        record["cgroups"] = cgroup_stats
+    if spread is not None and spread[0] == sample[0] and spread[1] is not None:
+        _, (cpu_min, cpu_max, _, readings), (mem_min, mem_max, _, _) = spread
+        record.update(cpu_min=cpu_min, cpu_max=cpu_max, mem_min=mem_min, mem_max=mem_max, readings=readings)
+    return record
+
+
+def format_prometheus(sample, core_usage=(), io_rates=None):
+    """
+    Renders a sample in the Prometheus text exposition format.
+    """
+    record = dict(zip(SAMPLE_FIELDS, sample))
+    lines = []
+    for field, metric, help_text in PROMETHEUS_METRICS:
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {record[field]:g}")
+    if len(core_usage):
+        name = f"{METRIC_PREFIX}_core_busy_ratio"
+        lines.append(f"# HELP {name} Busy fraction of each CPU core.")
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(f'{name}{{core="{i}"}} {float(f):g}' for i, f in enumerate(core_usage))
+    if io_rates is not None:
+        for field, metric, help_text in IO_METRICS:
+            name = f"{METRIC_PREFIX}_{metric}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {io_rates[field]:g}")
+        for direction, index in (("receive", 1), ("transmit", 2)):
+            name = f"{METRIC_PREFIX}_network_{direction}_bytes_per_second"
+            lines.append(f"# HELP {name} Bytes {direction}d per second on each interface.")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f'{name}{{interface="{entry[0]}"}} {entry[index]:g}' for entry in io_rates["net"])
+    return "\n".join(lines) + "\n"
+
+
+def stream_json(sampler, output, count=None):
+    """
+    Writes one JSON line per interval to output, driving the sampler inline
+    (including its sub-sampling readings, if any).
+    """
+    written = 0
+    next_tick = time.monotonic()
+    subsample_s = getattr(sampler, "subsample_ms", 0) / 1000
+    while count is None or written < count:
+        next_tick += sampler.interval_ms / 1000
+        while subsample_s and next_tick - time.monotonic() > subsample_s:
+            time.sleep(subsample_s)
+            sampler.subsample()
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+        sample = sampler.tick()
+        if sample is None:
+            continue  # An attached daemon has not published yet
+        record = sample_to_dict(
+            sample, sampler.core_usage, sampler.io_rates, sampler.cgroup_stats, getattr(sampler, "spread", None)
+        )
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        written += 1
+
+
+def serve_prometheus(sampler, port, host=PROMETHEUS_HOST):
+    """
+    Serves the latest sample on http://host:port/metrics until interrupted.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            sample = sampler.buffer.latest()
+            if sample is None:
+                self.send_error(503, "No sample yet")
+                return
+            body = format_prometheus(sample, sampler.core_usage, sampler.io_rates).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep stderr quiet on every scrape
+
+    sampler.start()
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    print(f"Serving metrics on http://{host}:{port}/metrics", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def run_agent(sampler, port=None, host=PROMETHEUS_HOST):
+    """
+    Serves samples to RemoteHosts dashboards on host:port (remote.AGENT_PORT
+    by default) until interrupted.
+    """
+    # Only agents need asyncio, which costs ~90 ms of startup to import
+    import asyncio
+    from remote import AGENT_PORT, serve_agent
+
+    port = port or AGENT_PORT
+    sampler.start()
+    print(f"Serving samples to dashboards on {host}:{port}", file=sys.stderr)
+    asyncio.run(serve_agent(sampler, host, port))
+
+
+def print_alert(rule, active, value):
+    """
+    Alert listener for headless runs: every action but hooks becomes a line on stderr.
+    """
+    print(f"Alert {'fired' if active else 'cleared'}: {rule.text} ({value:.1f})", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless system monitor exporter.")
+    parser.add_argument("--interval-ms", type=int, default=DEFAULTS["update_interval_ms"])
+    parser.add_argument("--source", choices=("auto", "proc", "psutil", "cgroup"), default=SAMPLE_SOURCE)
+    parser.add_argument("--per-core", action="store_true", help="Include per-core usage.")
+    parser.add_argument("--subsample-ms", type=int, nargs="?", const=SUBSAMPLE_MS, default=0, metavar="MS",
+                        help=f"Also read CPU/MEM every MS ms ({SUBSAMPLE_MS} if omitted) and report each interval's min/max.")
+    parser.add_argument("--io", action="store_true", help="Include disk and network rates.")
+    parser.add_argument("--cgroups", default="", metavar="PATTERNS",
+                        help="Also report these cgroups (paths or globs under the cgroup v2 root, 'self').")
+    parser.add_argument("--output", default=None, help="JSON lines file, or - for stdout (the default).")
+    parser.add_argument("--count", type=int, default=None, help="Stop after N samples.")
+    parser.add_argument("--prometheus", type=int, metavar="PORT", default=None,
+                        help="Serve Prometheus text on localhost instead of streaming JSON.")
+    parser.add_argument("--agent", type=int, nargs="?", const=0, default=None, metavar="PORT",
+                        help="Serve samples to multi-host dashboards over TCP (port 7079 if omitted).")
+    parser.add_argument("--host", default=PROMETHEUS_HOST,
+                        help="Address --prometheus and --agent listen on (use 0.0.0.0 for every interface).")
+    parser.add_argument("--store", nargs="?", const=default_store_directory(), default=None,
+                        metavar="DIR", help="Also append samples to the on-disk history.")
+    parser.add_argument("--publish", nargs="?", const=SHARED_NAME, default=None, metavar="NAME",
+                        help="Publish samples to shared memory for widgets and other readers.")
+    parser.add_argument("--attach", nargs="?", const=SHARED_NAME, default=None, metavar="NAME",
+                        help="Read a --publish daemon's samples instead of sampling.")
+    parser.add_argument("--alerts", default="", metavar="RULES",
+                        help="';'-separated alert rules, checked against every sample.")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.attach is not None:
+            sampler = SharedSampler(args.attach)
+            if args.alerts:
+                print("Warning: alerts are checked by the sampler; pass --alerts to the --publish daemon.", file=sys.stderr)
+        else:
+            sampler = Sampler(args.interval_ms, source=create_source(args.source))
+            sampler.set_per_core(args.per_core)
+            sampler.set_subsample(args.subsample_ms)
+            sampler.set_io(args.io)
+            sampler.set_cgroups(args.cgroups)
+            if args.store is not None:
+                try:
+                    sampler.set_store(TimeSeriesStore(args.store))
+                except StoreLocked as e:
+                    print(f"Warning: not storing history: {e}", file=sys.stderr)
+            if args.publish is not None:
+                sampler.publisher = SharedSampleWriter(args.publish)
+            rules = parse_rules(args.alerts)
+            if rules:
+                sampler.set_alerts(AlertEngine(rules, print_alert))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        if args.prometheus is not None:
+            serve_prometheus(sampler, args.prometheus, args.host)
+        elif args.agent is not None:
+            run_agent(sampler, args.agent, args.host)
+        elif args.publish is not None and args.output is None:
+            print(f"Publishing samples as '{args.publish}'", file=sys.stderr)
+            signal.signal(signal.SIGTERM, lambda signum, frame: sampler.stop())  # Unlink the block on exit
+            sampler.start()
+            while sampler.is_alive():
+                sampler.join(1.0)
+        elif args.output in (None, "-"):
+            stream_json(sampler, sys.stdout, args.count)
+        else:
+            with open(args.output, "a", encoding="utf-8") as output:
+                stream_json(sampler, output, args.count)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if sampler.is_alive():
+            sampler.stop()
+            sampler.join()
+        else:
+            sampler.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
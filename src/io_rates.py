@@ -0,0 +1,209 @@
+import os
+import sys
+import time
+
+import psutil
+
+# --- Configuration ---
+PROC_ROOT = "/proc"
+SYS_BLOCK = "/sys/block"
+SECTOR_SIZE = 512
+# Stacked or virtual block devices whose I/O is already counted on a real disk
+VIRTUAL_DISK_PREFIXES = ("loop", "ram", "zram", "dm-", "md", "sr", "fd", "nbd")
+IGNORED_INTERFACES = ("lo",)
+# --- End Configuration ---
+
+# /proc counters are 64 bits wide on 64-bit kernels and 32 bits on 32-bit ones.
+# Only a drop from within WRAP_WINDOW of 2^32 to within WRAP_WINDOW of 0 is
+# taken as a 32-bit wrap; any other drop is a reset (e.g. a re-created
+# interface) and counts as no growth, not as a multi-gigabyte spike.
+WRAP_MODULUS = 2 ** 32
+WRAP_WINDOW = 2 ** 30
+
+
+def counter_delta(current, previous):
+    """
+    Returns how much a raw cumulative counter grew; 0 if it was reset.
+    """
+    if current >= previous:
+        return current - previous
+    if WRAP_MODULUS - WRAP_WINDOW <= previous < WRAP_MODULUS and current < WRAP_WINDOW:
+        return current + WRAP_MODULUS - previous
+    return 0
+
+
+class ProcIOCounters:
+    """
+    Reads cumulative disk and network counters from /proc/diskstats and
+    /proc/net/dev. Both files stay open and are re-read in one bulk preadv
+    per tick into reused buffers.
+
+    read() returns (disks, interfaces): disks maps each whole disk to its
+    raw (read_sectors, write_sectors, read_ops, write_ops) and interfaces
+    maps each network interface to (rx_bytes, tx_bytes). The counters are
+    left as the kernel keeps them, so wraps can be recognised; disk_units
+    turns the disk deltas into bytes and operations.
+    """
+
+    disk_units = (SECTOR_SIZE, SECTOR_SIZE, 1, 1)
+
+    def __init__(self, proc_root=PROC_ROOT):
+        self._diskstats_fd = os.open(os.path.join(proc_root, "diskstats"), os.O_RDONLY)
+        self._netdev_fd = os.open(os.path.join(proc_root, "net", "dev"), os.O_RDONLY)
+        self._buffers = {self._diskstats_fd: bytearray(8192), self._netdev_fd: bytearray(8192)}
+        self._disks = set()
+        self._not_disks = set()
+
+    def _read(self, fd):
+        while True:
+            buf = self._buffers[fd]
+            length = os.preadv(fd, [buf], 0)
+            if length < len(buf):
+                return bytes(buf[:length])
+            self._buffers[fd] = bytearray(2 * len(buf))
+
+    def _is_disk(self, name):
+        """
+        Classifies a block device once; partitions and virtual devices are
+        skipped so nothing is counted twice. New names (hotplug) are
+        classified the first time they show up.
+        """
+        if name in self._disks:
+            return True
+        if name in self._not_disks:
+            return False
+        whole = os.path.exists(os.path.join(SYS_BLOCK, name.replace("/", "!")))
+        if whole and not name.startswith(VIRTUAL_DISK_PREFIXES):
+            self._disks.add(name)
+            return True
+        self._not_disks.add(name)
+        return False
+
+    def read(self):
+        disks = {}
+        for line in self._read(self._diskstats_fd).splitlines():
+            # major minor name reads merged sectors ms writes merged sectors ...
+            parts = line.split()
+            if len(parts) < 10:
+                continue
+            name = parts[2].decode()
+            if self._is_disk(name):
+                disks[name] = (int(parts[5]), int(parts[9]), int(parts[3]), int(parts[7]))
+
+        interfaces = {}
+        for line in self._read(self._netdev_fd).splitlines()[2:]:
+            name, _, data = line.partition(b":")
+            name = name.strip().decode()
+            if name in IGNORED_INTERFACES:
+                continue
+            fields = data.split()
+            interfaces[name] = (int(fields[0]), int(fields[8]))
+        return disks, interfaces
+
+    def close(self):
+        for fd in self._buffers:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class PsutilIOCounters:
+    """
+    Portable counters from psutil's disk_io_counters and net_io_counters.
+
+    psutil is left to unwrap these itself (nowrap=True), so they never go
+    down and counter_delta's 32-bit rule never applies: its disk bytes are
+    sectors times 512, where a 32-bit sector wrap shows up at 2^41.
+    """
+
+    disk_units = (1, 1, 1, 1)  # psutil already reports bytes
+
+    def read(self):
+        disks = {
+            name: (c.read_bytes, c.write_bytes, c.read_count, c.write_count)
+            for name, c in (psutil.disk_io_counters(perdisk=True, nowrap=True) or {}).items()
+        }
+        interfaces = {
+            name: (c.bytes_recv, c.bytes_sent)
+            for name, c in (psutil.net_io_counters(pernic=True, nowrap=True) or {}).items()
+            if name not in IGNORED_INTERFACES
+        }
+        return disks, interfaces
+
+    def close(self):
+        pass
+
+
+def create_io_counters():
+    """
+    Returns the /proc counter reader on Linux, psutil's anywhere else.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return ProcIOCounters()
+        except OSError as e:
+            print(f"Warning: /proc I/O counters unavailable ({e}). Falling back to psutil.")
+    return PsutilIOCounters()
+
+
+class IORates:
+    """
+    Turns cumulative disk and network counters into per-second rates.
+
+    Devices present in both the previous and the current read are compared;
+    a device that just appeared (hotplug) gets a baseline this tick and rates
+    from the next one, and a device that vanished is simply dropped. Deltas
+    are taken on the raw counters (see counter_delta), then scaled.
+
+    read() returns None until it has a baseline, then a dict with
+    disk_read, disk_write (bytes/s), disk_read_iops, disk_write_iops, and
+    net: a list of (interface, rx bytes/s, tx bytes/s, total bytes so far),
+    busiest (by current rate) first.
+    """
+
+    def __init__(self, counters=None):
+        self.counters = counters if counters is not None else create_io_counters()
+        self._previous = None
+        self._previous_time = None
+
+    def read(self):
+        now = time.monotonic()
+        disks, interfaces = self.counters.read()
+        previous, previous_time = self._previous, self._previous_time
+        self._previous, self._previous_time = (disks, interfaces), now
+
+        if previous is None or now <= previous_time:
+            return None
+        elapsed = now - previous_time
+        rates = {}
+        previous_disks, previous_interfaces = previous
+
+        totals = [0, 0, 0, 0]
+        for name, values in disks.items():
+            old_values = previous_disks.get(name)
+            if old_values is None:
+                continue
+            for i, (value, old_value) in enumerate(zip(values, old_values)):
+                totals[i] += counter_delta(value, old_value)
+        totals = [total * unit for total, unit in zip(totals, self.counters.disk_units)]
+        rates["disk_read"] = totals[0] / elapsed
+        rates["disk_write"] = totals[1] / elapsed
+        rates["disk_read_iops"] = totals[2] / elapsed
+        rates["disk_write_iops"] = totals[3] / elapsed
+
+        net = []
+        for name, (rx, tx) in interfaces.items():
+            old_values = previous_interfaces.get(name)
+            if old_values is None:
+                continue
+            rx_rate = counter_delta(rx, old_values[0]) / elapsed
+            tx_rate = counter_delta(tx, old_values[1]) / elapsed
+            net.append((name, rx_rate, tx_rate, rx + tx))
+        # Busiest right now; lifetime traffic only orders the idle ones
+        net.sort(key=lambda entry: (entry[1] + entry[2], entry[3]), reverse=True)
+        rates["net"] = net
+        return rates
+
+    def close(self):
+        self.counters.close()
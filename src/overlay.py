@@ -0,0 +1,163 @@
+import math
+from array import array
+
+from PyQt6.QtCore import QRect, Qt
+from PyQt6.QtGui import QFont, QPainter, QPainterPath, QPen, QStaticText, QTransform
+
+
+class TextRow:
+    """
+    One line of text that the widget paints itself from a cached QStaticText.
+
+    The glyph layout is prepared once per text change and kept with
+    AggressiveCaching, so painting is a single drawStaticText call. setText()
+    only schedules a repaint of the row's old and new rectangles, and does
+    nothing at all when the text is unchanged. Rows have no layout cost of
+    their own: the owner places them with place().
+    """
+
+    def __init__(self, widget, text="", font=None):
+        self.widget = widget
+        self.font = QFont(font if font is not None else widget.font())
+        self.static_text = QStaticText()
+        self.static_text.setTextFormat(Qt.TextFormat.PlainText)
+        self.static_text.setPerformanceHint(QStaticText.PerformanceHint.AggressiveCaching)
+        self.visible = True
+        self.color = None  # Overrides the widget's text color when set
+        self.rect = QRect()
+        self._text = None
+        self._x = 0
+        self._y = 0
+        self._height = 0
+        self._align_right = False
+        self.setText(text)
+
+    def text(self):
+        return self._text
+
+    def setText(self, text):
+        """
+        Changes the text, re-preparing the glyph layout only if it differs.
+        """
+        if text == self._text:
+            return
+        self._text = text
+        self.static_text.setText(text)
+        self.static_text.prepare(QTransform(), self.font)
+        self._relayout()
+
+    def setFont(self, font):
+        self.font = QFont(font)
+        self.static_text.prepare(QTransform(), self.font)
+        self._relayout()
+
+    def setColor(self, color):
+        """
+        Sets a QColor for this row only, or None for the widget's color.
+        """
+        if color != self.color:
+            self.color = color
+            if self.visible:
+                self.widget.update(self.rect)
+
+    def setVisible(self, visible):
+        if visible != self.visible:
+            self.visible = visible
+            self.widget.update(self.rect)
+
+    def place(self, x, y, height, align_right=False):
+        """
+        Positions the row. x is the left edge, or the right edge when
+        align_right is set; the text is centred vertically in height.
+        """
+        self._x = x
+        self._y = y
+        self._height = height
+        self._align_right = align_right
+        self._relayout()
+
+    def _relayout(self):
+        old_rect = self.rect
+        size = self.static_text.size()
+        width = math.ceil(size.width())
+        height = math.ceil(size.height())
+        x = self._x - width if self._align_right else self._x
+        y = self._y + (self._height - height) // 2
+        self.rect = QRect(x, y, width, height)
+        if self.visible:
+            self.widget.update(old_rect.united(self.rect))
+
+    def paint(self, painter):
+        painter.setFont(self.font)
+        painter.drawStaticText(self.rect.topLeft(), self.static_text)
+
+
+class Sparkline:
+    """
+    A fixed-length history of percentages drawn as one QPainterPath.
+
+    Values live in a preallocated array('f') ring, so memory use is fixed by
+    the history length. The path is extended by one lineTo() per sample with
+    the sample number as x, and painting shifts and scales it into place with
+    a transform. Points that have scrolled out of view are only dropped when
+    the path holds twice the history length, by rebuilding it from the ring,
+    so the per-sample and per-frame cost stay constant.
+    """
+
+    def __init__(self, widget, length):
+        self.widget = widget
+        self.length = max(2, int(length))
+        self.values = array("f", bytes(4 * self.length))
+        self.count = 0
+        self.path = QPainterPath()
+        self.path_start = 0
+        self.rect = QRect()
+
+    def append(self, value):
+        """
+        Adds one sample (0 - 100) and schedules a repaint of the sparkline.
+        """
+        self.values[self.count % self.length] = value
+        self.count += 1
+        if self.count - self.path_start > 2 * self.length:
+            self._rebuild()
+        elif self.count - 1 == self.path_start:
+            self.path.moveTo(self.count - 1, -value)
+        else:
+            self.path.lineTo(self.count - 1, -value)
+        self.widget.update(self.rect)
+
+    def clear(self):
+        self.count = 0
+        self.path = QPainterPath()
+        self.path_start = 0
+        self.widget.update(self.rect)
+
+    def _rebuild(self):
+        self.path_start = self.count - self.length
+        self.path = QPainterPath()
+        for index in range(self.path_start, self.count):
+            value = self.values[index % self.length]
+            if index == self.path_start:
+                self.path.moveTo(index, -value)
+            else:
+                self.path.lineTo(index, -value)
+
+    def paint(self, painter, color):
+        if self.count < 2 or self.rect.isEmpty():
+            return
+        rect = self.rect
+        x_scale = rect.width() / (self.length - 1)
+        transform = QTransform()
+        transform.translate(rect.right() - (self.count - 1) * x_scale, rect.bottom())
+        transform.scale(x_scale, rect.height() / 100)
+
+        pen = QPen(color)
+        pen.setCosmetic(True)  # Keep the line 1px wide under the scale
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setClipRect(rect)
+        painter.setTransform(transform)
+        painter.setPen(pen)
+        painter.drawPath(self.path)
+        painter.restore()
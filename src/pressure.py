@@ -0,0 +1,173 @@
+import os
+import time
+
+from providers import CHEAP, MetricProvider, register
+
+# --- Configuration ---
+PRESSURE_ROOT = "/proc/pressure"
+RESOURCES = ("cpu", "memory", "io")
+PRESSURE_INTERVAL_MS = 2000
+TRIGGER_STALL_MS = 200  # A trigger fires when some tasks stall this long...
+TRIGGER_WINDOW_MS = 2000  # ...within this window (a multiple of 2 s, or only root may register it)
+MIN_SPAN_S = 0.1  # Shortest span a stall share is worked out over
+READ_SIZE = 256
+# --- End Configuration ---
+
+LABELS = {"cpu": "CPU", "memory": "MEM", "io": "IO"}
+
+
+def parse_pressure(data):
+    """
+    Parses a /proc/pressure file into {"some": (avg10, total_us), "full": ...}.
+    """
+    lines = {}
+    for line in data.split(b"\n"):
+        kind, _, rest = line.partition(b" ")
+        if not rest:
+            continue
+        fields = dict(item.split(b"=", 1) for item in rest.split())
+        lines[kind.decode()] = (float(fields[b"avg10"]), int(fields[b"total"]))
+    return lines
+
+
+def open_trigger(resource, root=PRESSURE_ROOT):
+    """
+    Registers a PSI trigger on one resource and returns its fd, which
+    signals POLLPRI whenever some tasks stall for TRIGGER_STALL_MS within
+    TRIGGER_WINDOW_MS. The kernel sends at most one event per window, and
+    drops the trigger when the fd is closed.
+    """
+    fd = os.open(os.path.join(root, resource), os.O_RDWR | os.O_NONBLOCK)
+    try:
+        os.write(fd, f"some {TRIGGER_STALL_MS * 1000} {TRIGGER_WINDOW_MS * 1000}".encode() + b"\0")
+    except OSError:
+        os.close(fd)
+        raise
+    return fd
+
+
+class PressureReader:
+    """
+    Reads pressure stall information from /proc/pressure/{cpu,memory,io}.
+    The files stay open and each read() re-reads them with one preadv.
+
+    read() maps each resource to {"some": percent, "full": percent}: the
+    share of wall time in which some (or all non-idle) tasks were stalled
+    on it since the previous read, from the kernel's cumulative stall
+    totals. The first read, and one less than MIN_SPAN_S after the last,
+    uses the kernel's own 10 s average instead.
+    """
+
+    def __init__(self, root=PRESSURE_ROOT):
+        self.fds = {}
+        for resource in RESOURCES:
+            try:
+                self.fds[resource] = os.open(os.path.join(root, resource), os.O_RDONLY)
+            except OSError:
+                pass
+        if not self.fds:
+            raise OSError("no pressure stall information (needs Linux 4.20+ with CONFIG_PSI)")
+        self.resources = tuple(self.fds)
+        self.buf = bytearray(READ_SIZE)
+        self._previous = {}  # resource -> (monotonic time, {kind: total_us})
+        try:
+            self.read()  # Kernels booted with psi=0 only fail here, with EOPNOTSUPP
+        except OSError:
+            self.close()
+            raise
+
+    def read(self):
+        now = time.monotonic()
+        stalls = {}
+        for resource, fd in self.fds.items():
+            length = os.preadv(fd, [self.buf], 0)
+            lines = parse_pressure(bytes(self.buf[:length]))
+            previous = self._previous.get(resource)
+            span = now - previous[0] if previous is not None else 0.0
+            figures = {}
+            for kind, (avg10, total) in lines.items():
+                if span >= MIN_SPAN_S and kind in previous[1]:
+                    figures[kind] = min(100.0, max(0.0, (total - previous[1][kind]) / (span * 1e4)))
+                else:
+                    figures[kind] = avg10
+            stalls[resource] = figures
+            if previous is None or span >= MIN_SPAN_S:
+                self._previous[resource] = (now, {kind: total for kind, (_, total) in lines.items()})
+        return stalls
+
+    def close(self):
+        for fd in self.fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.fds = {}
+
+
+@register
+class PressureProvider(MetricProvider):
+    """
+    The pressure stall panel: how much of the time tasks waited for CPU,
+    memory or I/O. Where the kernel allows it, a PSI trigger on each
+    resource wakes the widget the moment a stall crosses TRIGGER_STALL_MS
+    within TRIGGER_WINDOW_MS, and the panel is refreshed and flagged right
+    away. Otherwise (kernels before 5.2, or when triggers are not
+    permitted) the panel only follows the averages at its interval.
+    """
+
+    name = "pressure"
+    label = "Pressure Stalls (PSI)"
+    setting = "show_pressure"
+    interval_setting = "pressure_interval_ms"
+    interval_ms = PRESSURE_INTERVAL_MS
+    cost = CHEAP
+    fields = ("stalls", "stalled", "triggers")
+    rows = len(RESOURCES)
+
+    def __init__(self, interval_ms=None):
+        super().__init__(interval_ms)
+        self.reader = PressureReader()
+        self.triggers = {}  # fd -> resource
+        self.fired = set()  # Resources whose trigger fired since the last collect()
+        for resource in self.reader.resources:
+            try:
+                self.triggers[open_trigger(resource)] = resource
+            except OSError as e:
+                self.close_triggers()
+                print(f"Warning: PSI triggers unavailable ({e.strerror or e}); polling the averages instead")
+                break
+
+    def event_fds(self):
+        return list(self.triggers)
+
+    def event(self, fd):
+        resource = self.triggers.get(fd)
+        if resource is not None:
+            self.fired.add(resource)
+
+    def collect(self):
+        fired, self.fired = self.fired, set()
+        return {"stalls": self.reader.read(), "stalled": fired, "triggers": bool(self.triggers)}
+
+    def format(self, values):
+        lines = []
+        for resource, figures in values["stalls"].items():
+            line = f"PSI {LABELS[resource]:<3} {figures.get('some', 0.0):5.1f}%"
+            if resource != "cpu" and "full" in figures:  # CPU "full" is always 0 system-wide
+                line += f"  full {figures['full']:.1f}%"
+            if resource in values["stalled"]:
+                line += "  STALL"
+            lines.append(line)
+        return lines
+
+    def close_triggers(self):
+        for fd in self.triggers:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.triggers = {}
+
+    def close(self):
+        self.close_triggers()
+        self.reader.close()
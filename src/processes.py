@@ -0,0 +1,117 @@
+import heapq
+
+import psutil
+
+from formatting import format_bytes
+from providers import BLOCKING, MetricProvider, register
+
+# --- Configuration ---
+PROCESS_INTERVAL_MS = 5000
+TOP_N = 5
+# --- End Configuration ---
+
+
+class ProcessScanner:
+    """
+    Finds the top N processes by CPU and by RSS.
+
+    psutil.Process objects are cached by pid, so each scan only diffs the pid
+    set: new pids get a Process (and a primed CPU counter), vanished pids are
+    dropped, and everything else is re-read inside oneshot(). The top N are
+    kept in bounded min-heaps while iterating instead of sorting every process.
+    """
+
+    def __init__(self, top_n=TOP_N):
+        self.top_n = top_n
+        self.top_cpu = []  # [(cpu_percent, pid, name)], highest first
+        self.top_rss = []  # [(rss_bytes, pid, name)], highest first
+        self.version = 0
+        self._processes = {}  # pid -> (psutil.Process, name)
+
+    def _sync_pids(self):
+        """
+        Adds Process objects for new pids and forgets vanished ones.
+        Returns the set of newly added pids.
+        """
+        pids = set(psutil.pids())
+        known = self._processes.keys()
+        for pid in known - pids:
+            del self._processes[pid]
+        added = pids - known
+        for pid in added:
+            try:
+                process = psutil.Process(pid)
+                process.cpu_percent(interval=None)  # Prime the CPU counter
+                self._processes[pid] = (process, process.name())
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return added
+
+    def scan(self):
+        """
+        Refreshes top_cpu and top_rss.
+        """
+        added = self._sync_pids()
+        top_n = self.top_n
+        cpu_heap = []
+        rss_heap = []
+        vanished = []
+        for pid, (process, name) in self._processes.items():
+            try:
+                with process.oneshot():
+                    # A counter primed moments ago has nothing meaningful yet
+                    cpu = 0.0 if pid in added else process.cpu_percent(interval=None)
+                    rss = process.memory_info().rss
+            except psutil.NoSuchProcess:
+                vanished.append(pid)
+                continue
+            except psutil.AccessDenied:
+                continue
+
+            if len(cpu_heap) < top_n:
+                heapq.heappush(cpu_heap, (cpu, pid, name))
+            elif cpu > cpu_heap[0][0]:
+                heapq.heapreplace(cpu_heap, (cpu, pid, name))
+            if len(rss_heap) < top_n:
+                heapq.heappush(rss_heap, (rss, pid, name))
+            elif rss > rss_heap[0][0]:
+                heapq.heapreplace(rss_heap, (rss, pid, name))
+
+        for pid in vanished:
+            del self._processes[pid]
+
+        self.top_cpu = sorted(cpu_heap, reverse=True)
+        self.top_rss = sorted(rss_heap, reverse=True)
+        self.version += 1
+
+
+@register
+class ProcessProvider(MetricProvider):
+    """
+    The top-processes panel. A scan touches every process on the system,
+    so it runs on the provider pool at its own, slower cadence.
+    """
+
+    name = "processes"
+    label = "Top Processes"
+    setting = "show_processes"
+    interval_setting = "process_interval_ms"
+    interval_ms = PROCESS_INTERVAL_MS
+    cost = BLOCKING
+    fields = ("top_cpu", "top_rss")
+    rows = 2 * TOP_N + 2
+
+    def __init__(self, interval_ms=None):
+        super().__init__(interval_ms)
+        self.scanner = ProcessScanner()
+
+    def collect(self):
+        self.scanner.scan()
+        return {"top_cpu": self.scanner.top_cpu, "top_rss": self.scanner.top_rss}
+
+    def format(self, values):
+        lines = ["TOP CPU"]
+        lines.extend(f"{cpu:6.1f}%  {name[:20]} ({pid})" for cpu, pid, name in values["top_cpu"])
+        lines.append("TOP MEM")
+        lines.extend(f"{format_bytes(rss):>7}  {name[:20]} ({pid})" for rss, pid, name in values["top_rss"])
+        return lines
@@ -0,0 +1,299 @@
+import threading
+import time
+
+# --- Configuration ---
+POOL_WORKERS = 4
+GROUP_SLACK_MS = 50  # Providers due within this much of each other run in the same tick
+DEFAULT_TIMEOUT_MS = 2000
+# --- End Configuration ---
+
+CHEAP = "cheap"  # Microseconds of work: run inline on the scheduler thread
+BLOCKING = "blocking"  # Slow or may block (scans, sysfs, network): run on the worker pool
+
+PROVIDERS = {}  # name -> MetricProvider subclass, in registration (display) order
+
+
+def register(cls):
+    """
+    Class decorator that makes a provider available to the widget, which
+    builds one panel of rows for each registered provider.
+    """
+    PROVIDERS[cls.name] = cls
+    return cls
+
+
+class MetricProvider:
+    """
+    A source of extra metrics that runs on its own cadence, away from both
+    the CPU/MEM sampler and the GUI thread.
+
+    Subclasses declare:
+      name              unique key; also the key of its results
+      label             context menu text for turning it on and off
+      setting           bool config field that turns it on
+      interval_setting  int config field with its interval in ms, if any
+      interval_ms       interval when there is no interval_setting
+      cost              CHEAP or BLOCKING
+      timeout_ms        how long a BLOCKING collect() may take before its
+                        result is thrown away
+      fields            names of the values collect() returns
+      rows              how many display rows format() fills
+
+    collect() returns a dict of the declared fields and runs on a scheduler
+    or pool thread, never two at once for the same provider. format(values)
+    turns a result into at most `rows` lines of text and runs on the GUI
+    thread. close() releases whatever collect() held open.
+
+    A provider that learns about changes from the kernel rather than by
+    polling returns those file descriptors from event_fds(). The widget
+    watches them for POLLPRI; when one signals, event(fd) is called on the
+    GUI thread and the provider is refreshed at once (see
+    ProviderScheduler.refresh) instead of at its next interval.
+    """
+
+    name = "base"
+    label = None
+    setting = None
+    interval_setting = None
+    interval_ms = 5000
+    cost = CHEAP
+    timeout_ms = DEFAULT_TIMEOUT_MS
+    fields = ()
+    rows = 1
+
+    def __init__(self, interval_ms=None):
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+
+    def collect(self):
+        raise NotImplementedError
+
+    def format(self, values):
+        return [f"{field} {values[field]}" for field in self.fields][:self.rows]
+
+    def event_fds(self):
+        return ()
+
+    def event(self, fd):
+        pass
+
+    def close(self):
+        pass
+
+
+class ProviderState:
+    """
+    The scheduler's bookkeeping for one provider.
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.next_due = 0.0
+        self.future = None
+        self.deadline = None
+        self.timed_out = False
+        self.skipped = 0  # Ticks dropped because the previous run had not finished
+        self.removed = False
+        self.urgent = False  # Refreshed out of cadence; tell the listener when done
+
+
+class ProviderScheduler(threading.Thread):
+    """
+    Runs every added provider at its own interval.
+
+    Providers that are due at about the same time (within GROUP_SLACK_MS)
+    are handled in one wakeup. CHEAP providers run inline on this thread;
+    BLOCKING ones are handed to a small thread pool. A provider whose
+    previous run is still going is skipped, not queued, and a run that
+    outlives its timeout has its result thrown away when it finally
+    returns, so nothing ever piles up behind a stuck provider and nothing
+    stale is shown. The CPU/MEM sampler is a separate thread, so no
+    provider can hold it up.
+
+    results maps each provider's name to (timestamp, values, error); values
+    is None when the provider failed or timed out. version goes up on every
+    change, so readers can tell when to look again. The result of a
+    refresh() is also announced by calling listener(name) on this thread,
+    for readers that should not wait for their next look.
+
+    While paused nothing is collected at all; runs already on the pool are
+    still reaped, and removed providers are still closed.
+    """
+
+    def __init__(self, workers=POOL_WORKERS):
+        super().__init__(name="ProviderScheduler", daemon=True)
+        self.workers = workers
+        self.results = {}
+        self.version = 0
+        self.listener = None
+        self.paused = False
+        self.pool = None  # Created with the first BLOCKING provider
+        self._states = {}
+        self._closing = []  # Removed providers for this thread to close between runs
+        self._finished = False
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def add(self, provider):
+        """
+        Starts running a provider, replacing any with the same name.
+        """
+        self.remove(provider.name)
+        with self._lock:
+            self._states[provider.name] = ProviderState(provider)
+        self._wake_event.set()
+
+    def remove(self, name):
+        """
+        Stops running a provider and closes it once it is not in use. A
+        CHEAP provider may be in collect() on this thread right now, so it
+        is closed by the scheduler thread between runs; a BLOCKING one that
+        is running is closed when its run finishes.
+        """
+        with self._lock:
+            state = self._states.pop(name, None)
+            if state is None:
+                return
+            state.removed = True
+            running = state.future is not None and not state.future.done()
+            inline = not running and not self._finished and self.is_alive() and threading.current_thread() is not self
+            if inline:
+                self._closing.append(state.provider)
+        self.results.pop(name, None)
+        if running:
+            state.future.add_done_callback(lambda future: state.provider.close())
+        elif inline:
+            self._wake_event.set()
+        else:
+            state.provider.close()  # Nothing can be collecting it
+
+    def set_interval(self, name, interval_ms):
+        with self._lock:
+            state = self._states.get(name)
+            if state is not None:
+                state.provider.interval_ms = interval_ms
+                state.next_due = 0.0  # Run it now on the new cadence
+        self._wake_event.set()
+
+    def set_paused(self, paused):
+        """
+        Stops running providers while nothing shows their results, or
+        resumes them; those that fell due in the meantime run at once.
+        """
+        if paused == self.paused:
+            return
+        self.paused = paused
+        self._wake_event.set()
+
+    def refresh(self, name):
+        """
+        Runs a provider now, out of its cadence, and restarts its interval
+        from there. A run already in progress counts as the refresh; while
+        paused, it runs as soon as the scheduler resumes.
+        """
+        with self._lock:
+            state = self._states.get(name)
+            if state is None:
+                return
+            state.urgent = True
+            if state.future is None:
+                state.next_due = 0.0
+        self._wake_event.set()
+
+    def stop(self):
+        """
+        Asks the scheduler to exit; it closes every provider on its way out.
+        """
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._close_removed()
+            now = time.monotonic()
+            with self._lock:
+                states = list(self._states.values())
+            for state in states:
+                self._reap(state, now)
+            if self.paused:
+                self._wake_event.wait()
+                self._wake_event.clear()
+                continue
+            for state in states:
+                if state.next_due <= now + GROUP_SLACK_MS / 1000:
+                    self._dispatch(state, now)
+            wakeups = [state.next_due for state in states]
+            wakeups.extend(state.deadline for state in states if state.deadline is not None)
+            delay = min(wakeups) - time.monotonic() if wakeups else None
+            self._wake_event.wait(None if delay is None else max(0.0, delay))
+            self._wake_event.clear()
+        with self._lock:
+            names = list(self._states)
+        for name in names:
+            self.remove(name)
+        with self._lock:
+            self._finished = True
+        self._close_removed()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _close_removed(self):
+        with self._lock:
+            closing, self._closing = self._closing, []
+        for provider in closing:
+            provider.close()
+
+    def _dispatch(self, state, now):
+        provider = state.provider
+        if state.removed:
+            return
+        # Fixed cadence: a run pulled in early by GROUP_SLACK_MS keeps its slot,
+        # and ticks missed while busy are dropped, not made up
+        state.next_due = max(state.next_due, now) + provider.interval_ms / 1000
+        if state.future is not None:
+            state.skipped += 1
+            return
+        if provider.cost == CHEAP:
+            try:
+                self._publish(state, provider.collect(), None)
+            except Exception as e:
+                self._publish(state, None, str(e) or type(e).__name__)
+            return
+        if self.pool is None:
+            from concurrent.futures import ThreadPoolExecutor  # Only loaded once a BLOCKING provider runs
+
+            self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="Provider")
+        state.timed_out = False
+        state.deadline = now + provider.timeout_ms / 1000
+        state.future = self.pool.submit(provider.collect)
+        state.future.add_done_callback(lambda future: self._wake_event.set())
+
+    def _reap(self, state, now):
+        future = state.future
+        if future is None:
+            return
+        if not future.done():
+            if not state.timed_out and now >= state.deadline:
+                state.timed_out = True
+                state.deadline = None
+                self._publish(state, None, "timed out")
+            return
+        state.future = None
+        state.deadline = None
+        if state.timed_out:
+            return  # Too late to be worth showing
+        try:
+            self._publish(state, future.result(), None)
+        except Exception as e:
+            self._publish(state, None, str(e) or type(e).__name__)
+
+    def _publish(self, state, values, error):
+        if state.removed:
+            return
+        self.results[state.provider.name] = (time.time(), values, error)
+        self.version += 1
+        if state.urgent:
+            state.urgent = False
+            if self.listener is not None:
+                self.listener(state.provider.name)
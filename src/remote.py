@@ -0,0 +1,269 @@
+import asyncio
+import random
+import socket
+import struct
+import threading
+import time
+
+# --- Configuration ---
+AGENT_PORT = 7079
+REMOTE_INTERVAL_MS = 2000
+CONNECT_TIMEOUT_S = 2.0
+REQUEST_TIMEOUT_S = 2.0
+MAX_IN_FLIGHT = 64  # Hosts polled at once
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 60.0
+MAX_PAYLOAD = 1 << 20
+# --- End Configuration ---
+
+# Every frame is a fixed header followed by its payload.
+MAGIC = b"SW"
+VERSION = 1
+HEADER = struct.Struct("!2sBBI")  # magic, version, message type, payload length
+MSG_HELLO = 1  # agent -> client on connect: hostname (UTF-8)
+MSG_POLL = 2  # client -> agent: samples already seen (SEEN)
+MSG_SAMPLES = 3  # agent -> client: BATCH, then that many SAMPLE records
+MSG_ERROR = 4  # either way: message (UTF-8), then the connection closes
+SEEN = struct.Struct("!Q")
+BATCH = struct.Struct("!QH")  # samples published so far, samples in this frame
+SAMPLE = struct.Struct("!dffQQ")  # timestamp, cpu %, mem %, mem used, mem total
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_frame(message, payload=b""):
+    return HEADER.pack(MAGIC, VERSION, message, len(payload)) + payload
+
+
+async def read_frame(reader):
+    """
+    Reads one frame and returns (message, payload).
+    """
+    magic, version, message, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ProtocolError("not a system widget agent")
+    if length > MAX_PAYLOAD:
+        raise ProtocolError(f"frame of {length} bytes is too large")
+    payload = await reader.readexactly(length) if length else b""
+    if message == MSG_ERROR:
+        raise ProtocolError(payload.decode(errors="replace"))
+    return message, payload
+
+
+def encode_samples(count, samples):
+    """
+    Packs every sample a client has not seen into one MSG_SAMPLES frame.
+    """
+    parts = [BATCH.pack(count, len(samples))]
+    parts.extend(SAMPLE.pack(s[0], s[1], s[2], int(s[3]), int(s[4])) for s in samples)
+    return encode_frame(MSG_SAMPLES, b"".join(parts))
+
+
+def decode_samples(payload):
+    """
+    Returns (count, samples) from a MSG_SAMPLES payload.
+    """
+    count, n = BATCH.unpack_from(payload, 0)
+    if len(payload) != BATCH.size + n * SAMPLE.size:
+        raise ProtocolError("truncated sample batch")
+    return count, [SAMPLE.unpack_from(payload, BATCH.size + i * SAMPLE.size) for i in range(n)]
+
+
+async def serve_agent(sampler, host, port):
+    """
+    Serves the sampler's samples to dashboard clients until cancelled.
+
+    Each connection is persistent: after the hello, the client sends a poll
+    with how many samples it has seen and gets everything newer back in a
+    single frame, read straight from the sampler's ring.
+    """
+    hello = encode_frame(MSG_HELLO, socket.gethostname().encode())
+
+    async def handle(reader, writer):
+        writer.write(hello)
+        try:
+            while True:
+                message, payload = await read_frame(reader)
+                if message != MSG_POLL or len(payload) != SEEN.size:
+                    writer.write(encode_frame(MSG_ERROR, b"expected a poll"))
+                    break
+                count, samples = sampler.buffer.since(SEEN.unpack(payload)[0])
+                writer.write(encode_samples(count, samples))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def parse_hosts(text, default_port=AGENT_PORT):
+    """
+    Turns "web1, web2:7080 [::1]:7079" into [(host, port), ...].
+    """
+    hosts = []
+    for entry in text.replace(",", " ").split():
+        host, port = entry, default_port
+        if entry.startswith("["):  # [IPv6]:port
+            host, _, rest = entry[1:].partition("]")
+            if rest.startswith(":") and rest[1:].isdigit():
+                port = int(rest[1:])
+        elif entry.count(":") == 1:
+            name, _, number = entry.partition(":")
+            if number.isdigit():
+                host, port = name, int(number)
+        if (host, port) not in hosts:
+            hosts.append((host, port))
+    return hosts
+
+
+class HostState:
+    """
+    What the client knows about one agent. Only touched on the loop thread.
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self.name = f"{address[0]}:{address[1]}"
+        self.reader = None
+        self.writer = None
+        self.seen = 0
+        self.sample = None
+        self.error = None
+        self.failures = 0
+        self.retry_at = 0.0
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class RemoteHosts(threading.Thread):
+    """
+    Polls a group of agents from an asyncio loop running in its own thread.
+
+    Every interval all hosts are polled at once (at most MAX_IN_FLIGHT at a
+    time) over persistent connections, each reply batching every sample
+    since the previous poll. A host that fails is retried with exponential,
+    jittered backoff instead of every round. After each round the results
+    are published as a new immutable snapshot, so the GUI thread only ever
+    reads an attribute and is never blocked by the network.
+
+    snapshot is a list of (name, sample, error, retry_in_s) per host; sample
+    is the latest (timestamp, cpu %, mem %, used, total) or None.
+    round_seconds is how long the last round took. Nothing is polled while
+    paused is set.
+    """
+
+    def __init__(self, hosts, interval_ms=REMOTE_INTERVAL_MS):
+        super().__init__(name="RemoteHosts", daemon=True)
+        self.interval_ms = interval_ms
+        self.snapshot = []
+        self.version = 0
+        self.round_seconds = 0.0
+        self.paused = False
+        self._hosts = {address: HostState(address) for address in hosts}
+        self._loop = None
+        self._task = None
+        self._started = threading.Event()
+
+    def set_hosts(self, hosts):
+        """
+        Replaces the polled hosts; connections to hosts still listed are kept.
+        """
+        self._started.wait()
+        self._loop.call_soon_threadsafe(self._set_hosts, list(hosts))
+
+    def _set_hosts(self, hosts):
+        old = self._hosts
+        self._hosts = {address: old.pop(address, None) or HostState(address) for address in hosts}
+        for state in old.values():
+            state.close()
+        self._publish()
+
+    def stop(self):
+        """
+        Stops polling and closes every connection.
+        """
+        self._started.wait()
+        self._loop.call_soon_threadsafe(self._task.cancel)
+
+    def run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(self._poll_forever())
+            self._started.set()
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for state in self._hosts.values():
+                state.close()
+            self._loop.run_until_complete(asyncio.sleep(0))  # Let the transports close
+            self._loop.close()
+
+    async def _poll_forever(self):
+        limit = asyncio.Semaphore(MAX_IN_FLIGHT)
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            if not self.paused:
+                states = list(self._hosts.values())
+                await asyncio.gather(*(self._poll(state, limit) for state in states))
+                self.round_seconds = loop.time() - started
+                self._publish()
+            elapsed = loop.time() - started
+            await asyncio.sleep(max(0.0, self.interval_ms / 1000 - elapsed))
+
+    async def _poll(self, state, limit):
+        now = time.monotonic()
+        if now < state.retry_at:
+            return
+        async with limit:
+            try:
+                if state.writer is None:
+                    await self._connect(state)
+                state.writer.write(encode_frame(MSG_POLL, SEEN.pack(state.seen)))
+                message, payload = await asyncio.wait_for(read_frame(state.reader), REQUEST_TIMEOUT_S)
+                if message != MSG_SAMPLES:
+                    raise ProtocolError(f"unexpected message {message}")
+                count, samples = decode_samples(payload)
+                if count < state.seen:
+                    state.seen = 0  # The agent restarted
+                else:
+                    state.seen = count
+                if samples:
+                    state.sample = samples[-1]
+                state.error = None
+                state.failures = 0
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ProtocolError, struct.error) as e:
+                state.close()
+                state.failures += 1
+                state.error = str(e) or type(e).__name__
+                backoff = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (state.failures - 1))
+                state.retry_at = time.monotonic() + backoff * random.uniform(0.8, 1.2)
+
+    async def _connect(self, state):
+        host, port = state.address
+        state.reader, state.writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), CONNECT_TIMEOUT_S
+        )
+        message, payload = await asyncio.wait_for(read_frame(state.reader), REQUEST_TIMEOUT_S)
+        if message != MSG_HELLO:
+            raise ProtocolError("no hello from agent")
+        state.name = payload.decode(errors="replace") or state.name
+        state.seen = 0
+
+    def _publish(self):
+        now = time.monotonic()
+        self.snapshot = [
+            (state.name, state.sample if state.error is None else None, state.error, max(0.0, state.retry_at - now))
+            for state in self._hosts.values()
+        ]
+        self.version += 1
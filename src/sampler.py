@@ -0,0 +1,419 @@
+import os
+import struct
+import threading
+import time
+from array import array
+
+from cgroups import CgroupMonitor
+from io_rates import IORates
+from sources import create_source
+from stats import Aggregate
+
+# --- Configuration ---
+RING_CAPACITY = 64
+SAMPLE_SOURCE = "auto"  # "auto", "proc" or "psutil"
+SAMPLE_FIELDS = ("timestamp", "cpu_percent", "mem_percent", "mem_used", "mem_total")
+FIRST_SAMPLE_MS = 250  # Shortest window the first CPU reading covers
+SUBSAMPLE_MS = 100  # Reading interval within each sample when sub-sampling
+# --- End Configuration ---
+
+LAST_SAMPLE = struct.Struct("<5d")  # One sample in SAMPLE_FIELDS order
+
+
+class RingBuffer:
+    """
+    A fixed-size, preallocated ring buffer of timestamped samples.
+
+    Every slot holds one double per field in a single flat array, so writing a
+    sample never grows or reallocates anything. There is exactly one writer;
+    it fills a slot and only then bumps the write counter, so readers never see
+    a half-written latest slot.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY, fields=SAMPLE_FIELDS):
+        self.capacity = capacity
+        self.fields = fields
+        self.width = len(fields)
+        self.data = array("d", bytes(8 * capacity * self.width))
+        self.count = 0
+
+    def write(self, values):
+        """
+        Writes one sample into the next slot and publishes it.
+        """
+        base = (self.count % self.capacity) * self.width
+        data = self.data
+        for i, value in enumerate(values):
+            data[base + i] = value
+        self.count += 1
+
+    def latest(self):
+        """
+        Returns the most recently published sample as a tuple, or None if
+        nothing has been written yet.
+        """
+        while True:
+            count = self.count
+            if count == 0:
+                return None
+            base = ((count - 1) % self.capacity) * self.width
+            values = tuple(self.data[base:base + self.width])
+            # The slot is only reused once the writer has lapped the buffer.
+            if self.count - count < self.capacity - 1:
+                return values
+
+    def since(self, seen):
+        """
+        Returns (count, samples) with every sample published after the first
+        `seen` ones, oldest first. Samples the writer has already overwritten
+        are skipped, so at most capacity - 1 come back.
+        """
+        count = self.count
+        first = max(seen, count - self.capacity + 1)
+        width = self.width
+        data = self.data
+        samples = []
+        for index in range(first, count):
+            base = (index % self.capacity) * width
+            samples.append(tuple(data[base:base + width]))
+        return count, samples
+
+
+class Sampler(threading.Thread):
+    """
+    Background thread that samples CPU and Memory usage and writes
+    timestamped samples into a RingBuffer.
+
+    The GUI never touches the sample source itself; it only reads the latest
+    slot, so a slow sample on a loaded machine cannot stall painting, dragging
+    or menus. Without a scheduler the interval is fixed; with an
+    AdaptiveInterval it stretches while readings are steady. While paused the
+    thread takes no samples at all and sleeps until it is resumed. With a
+    TimeSeriesStore attached, every sample is also appended to disk. With
+    I/O rates enabled, disk and network throughput are published in io_rates
+    alongside each sample, and with a list of cgroups their usage goes in
+    cgroup_stats the same way. With a publisher (a shared.SharedSampleWriter)
+    every sample is also published for other processes to read. With an
+    alerts.AlertEngine, every sample is checked against the alert rules
+    here, so alerts keep working however the samples are displayed.
+
+    With sub-sampling on, CPU and MEM are also read every subsample_ms in
+    between samples. Each sample then carries the time-weighted mean CPU
+    over its interval, and spread holds (timestamp, cpu, mem) for it, with
+    (minimum, maximum, mean, count) of the readings behind each figure, so
+    bursts shorter than the interval still show. Only the sample is written
+    to the buffer, so readers wake no more often than before.
+    """
+
+    def __init__(self, interval_ms, capacity=RING_CAPACITY, source=None):
+        super().__init__(name="SystemSampler", daemon=True)
+        self.interval_ms = interval_ms
+        self.current_interval_ms = interval_ms
+        self.scheduler = None
+        self.store = None
+        self.publisher = None
+        self.alerts = None
+        self.paused = False
+        self.source = source if source is not None else create_source(SAMPLE_SOURCE)
+        self.buffer = RingBuffer(capacity)
+        self.core_usage = ()
+        self.io = None
+        self.io_rates = None
+        self.cgroups = None
+        self.cgroup_stats = None
+        self.subsample_ms = 0  # 0 for no readings between samples
+        self.spread = None
+        self.tick_seconds = 0.0  # Cost of the last tick, for diagnostics
+        self._primed_at = time.monotonic()
+        self._pending_store = None
+        self._pending_io = None
+        self._pending_cgroups = None
+        self._cpu_spread = Aggregate()  # Only touched by the sampling thread
+        self._mem_spread = Aggregate()
+        self._last_read = None
+        self._last_tick = None  # When the last sample was taken; None samples at once
+        self._next_subsample = 0.0
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def set_interval(self, interval_ms):
+        """
+        Changes the sampling interval and wakes the thread so it takes effect now.
+        """
+        self.interval_ms = interval_ms
+        self.current_interval_ms = interval_ms
+        if self.scheduler is not None:
+            self.scheduler.reset(interval_ms)
+        self._last_tick = None
+        self._wake_event.set()
+
+    def set_scheduler(self, scheduler):
+        """
+        Installs an AdaptiveInterval (or None for a fixed interval).
+        """
+        self.scheduler = scheduler
+        self.current_interval_ms = self.interval_ms
+        self._wake_event.set()
+
+    def set_store(self, store):
+        """
+        Attaches a TimeSeriesStore (or None) that every sample is appended to.
+        The previous store, if any, is closed by the sampling thread.
+        """
+        self._pending_store = store if store is not None else False
+        self._wake_event.set()
+
+    def set_io(self, enabled):
+        """
+        Turns disk and network rate sampling on or off. The counter files
+        are opened and closed by the sampling thread.
+        """
+        self._pending_io = enabled
+        self._wake_event.set()
+
+    def set_cgroups(self, patterns):
+        """
+        Starts reading the cgroups matching patterns (see cgroups.expand),
+        or stops with an empty string. The files are opened and closed by
+        the sampling thread.
+        """
+        self._pending_cgroups = patterns
+        self._wake_event.set()
+
+    def set_subsample(self, subsample_ms):
+        """
+        Reads CPU and MEM every subsample_ms between samples, for the
+        min/max/mean in spread, or only once per sample with 0.
+        """
+        self.subsample_ms = subsample_ms
+        self._wake_event.set()
+
+    def set_alerts(self, alerts):
+        """
+        Installs an AlertEngine (or None) that every sample is checked against.
+        """
+        self.alerts = alerts
+
+    def set_paused(self, paused):
+        """
+        Suspends sampling, or resumes it with an immediate fresh sample.
+        """
+        if paused == self.paused:
+            return
+        self.paused = paused
+        if not paused and self.scheduler is not None:
+            self.scheduler.reset()
+            self.current_interval_ms = self.interval_ms
+        self._last_tick = None
+        self._wake_event.set()
+
+    def set_per_core(self, enabled):
+        """
+        Turns per-core sampling on or off.
+        """
+        self.source.per_core = enabled
+        if not enabled:
+            self.core_usage = ()
+
+    def stop(self):
+        """
+        Asks the sampling thread to exit.
+        """
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def sample(self):
+        """
+        Takes one sample and returns it in SAMPLE_FIELDS order.
+        """
+        cpu_usage, mem_usage, mem_used, mem_total = self.source.read()
+        if self.subsample_ms:
+            self._accumulate(cpu_usage, mem_usage)
+            timestamp = time.time()
+            cpu = self._cpu_spread.take()
+            self.spread = (timestamp, cpu, self._mem_spread.take())
+            cpu_usage = round(cpu[2], 1)  # As precise as the sources report it
+        else:
+            self._last_read = time.monotonic()
+            self.spread = None
+            if self._cpu_spread.count:  # Sub-sampling was just turned off
+                self._cpu_spread.reset()
+                self._mem_spread.reset()
+            timestamp = time.time()
+        if self.source.per_core:
+            self.core_usage = self.source.core_usage
+        if self.io is not None:
+            self.io_rates = self.io.read()
+        if self.cgroups is not None:
+            self.cgroup_stats = self.cgroups.read()
+        return (timestamp, cpu_usage, mem_usage, mem_used, mem_total)
+
+    def subsample(self):
+        """
+        Takes one reading between samples for the current interval's spread.
+        Per-core counters are left for sample(), so the heat strip covers the
+        whole interval and costs nothing extra.
+        """
+        cpu_usage, mem_usage, _, _ = self.source.read_totals()
+        self._accumulate(cpu_usage, mem_usage)
+
+    def _accumulate(self, cpu_usage, mem_usage):
+        # Each CPU reading covers the time since the previous one; weighting
+        # by it makes the mean the true average over the interval.
+        now = time.monotonic()
+        weight = now - self._last_read if self._last_read is not None else self.subsample_ms / 1000
+        self._last_read = now
+        self._cpu_spread.add(cpu_usage, weight)
+        self._mem_spread.add(mem_usage, weight)
+
+    def tick(self):
+        """
+        Takes one sample, publishes it, stores it and picks the next interval.
+        Returns the sample.
+        """
+        start = time.perf_counter()
+        self._swap_store()
+        self._swap_io()
+        self._swap_cgroups()
+        sample = self.sample()
+        self.buffer.write(sample)
+        if self.store is not None:
+            self.store.append(sample)
+        alerts = self.alerts
+        if alerts is not None:
+            alerts.observe(sample)
+        scheduler = self.scheduler
+        if scheduler is not None:
+            self.current_interval_ms = scheduler.observe(sample[1:3])
+        self.tick_seconds = time.perf_counter() - start
+        if self.publisher is not None:
+            self.publisher.publish(
+                sample, self.core_usage, self.io_rates, self.current_interval_ms, self.tick_seconds
+            )
+        return sample
+
+    def run(self):
+        # The source was primed when it was created. A CPU reading over a
+        # few milliseconds is meaningless (often a flat 0.0), so the first
+        # sample waits until it covers at least FIRST_SAMPLE_MS.
+        elapsed = time.monotonic() - self._primed_at
+        self._stop_event.wait(max(0.0, FIRST_SAMPLE_MS / 1000 - elapsed))
+        # Setters called before start() have already been picked up; their
+        # wakeups must not cause a second sample right after the first.
+        self._wake_event.clear()
+        while not self._stop_event.is_set():
+            self._swap_store()
+            self._swap_io()
+            self._swap_cgroups()
+            if self.paused:
+                self._wake_event.wait()
+                self._wake_event.clear()
+                continue
+            # Other wakeups (a new store, I/O or cgroups, a new scheduler)
+            # only recompute the wait: a sample over a sliver of time reads
+            # as 0% or 100%. Only set_interval() and resuming sample at once.
+            now = time.monotonic()
+            subsample_ms = self.subsample_ms
+            if self._last_tick is None or now >= self._last_tick + self.current_interval_ms / 1000:
+                try:
+                    self.tick()
+                except Exception as e:
+                    print(f"Error sampling stats: {e}")
+                self._last_tick = time.monotonic()
+                self._next_subsample = self._last_tick + subsample_ms / 1000
+            elif subsample_ms and now >= self._next_subsample:
+                try:
+                    self.subsample()
+                except Exception as e:
+                    print(f"Error sampling stats: {e}")
+                self._next_subsample = now + subsample_ms / 1000
+            deadline = self._last_tick + self.current_interval_ms / 1000
+            if subsample_ms:
+                deadline = min(deadline, self._next_subsample)
+            self._wake_event.wait(max(0.0, deadline - time.monotonic()))
+            self._wake_event.clear()
+        self.close()
+
+    def close(self):
+        """
+        Releases the source, the store and the publisher. run() does this
+        on its way out; call it directly only when driving the sampler with
+        tick().
+        """
+        self.source.close()
+        self._pending_store = False
+        self._swap_store()
+        self._pending_io = False
+        self._swap_io()
+        self._pending_cgroups = ""
+        self._swap_cgroups()
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+
+    def _swap_store(self):
+        # The store is only ever touched from the sampling thread, so
+        # swapping it here needs no lock. False means "close, attach none".
+        pending = self._pending_store
+        if pending is None:
+            return
+        self._pending_store = None
+        if self.store is not None:
+            self.store.close()
+        self.store = pending or None
+
+    def _swap_io(self):
+        pending = self._pending_io
+        if pending is None:
+            return
+        self._pending_io = None
+        if pending and self.io is None:
+            self.io = IORates()
+        elif not pending and self.io is not None:
+            self.io.close()
+            self.io = None
+            self.io_rates = None
+
+    def _swap_cgroups(self):
+        pending = self._pending_cgroups
+        if pending is None:
+            return
+        self._pending_cgroups = None
+        if self.cgroups is not None:
+            self.cgroups.close()
+            self.cgroups = None
+            self.cgroup_stats = None
+        if pending:
+            try:
+                self.cgroups = CgroupMonitor(pending)
+            except OSError as e:
+                print(f"Warning: cgroups unavailable: {e}")
+
+
+def save_last_sample(path, sample):
+    """
+    Writes one sample to path so the next launch can paint it straight away.
+    The file is replaced atomically; a failed write leaves the old one.
+    """
+    temporary = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, "wb") as f:
+            f.write(LAST_SAMPLE.pack(*sample))
+        os.replace(temporary, path)
+    except OSError as e:
+        print(f"Warning: could not save the last sample: {e}")
+
+
+def load_last_sample(path):
+    """
+    Returns the sample saved by save_last_sample, or None if there is none.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(LAST_SAMPLE.size + 1)
+    except OSError:
+        return None
+    if len(data) != LAST_SAMPLE.size:
+        return None
+    return LAST_SAMPLE.unpack(data)
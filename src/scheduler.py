@@ -0,0 +1,58 @@
+# --- Configuration ---
+ADAPTIVE_MAX_MS = 10000
+CHANGE_THRESHOLD = 5.0  # Percentage points
+BACKOFF_FACTOR = 1.5
+STEADY_SAMPLES = 3
+# --- End Configuration ---
+
+
+class AdaptiveInterval:
+    """
+    Decides how long the sampler should wait before its next sample.
+
+    Each observed sample is compared with the reference sample taken when the
+    rate last snapped back. While every value stays within the threshold of
+    that reference, the interval stretches by BACKOFF_FACTOR after every
+    STEADY_SAMPLES steady samples, up to max_ms. As soon as any value moves
+    by the threshold or more, the interval snaps back to base_ms. Because the
+    comparison is against the reference and not the previous sample, a slow
+    drift triggers it too.
+    """
+
+    def __init__(self, base_ms, max_ms=ADAPTIVE_MAX_MS, threshold=CHANGE_THRESHOLD):
+        self.base_ms = base_ms
+        self.max_ms = max(max_ms, base_ms)
+        self.threshold = threshold
+        self.current_ms = base_ms
+        self._reference = None
+        self._steady = 0
+
+    def reset(self, base_ms=None):
+        """
+        Returns to the fast rate, optionally with a new base interval.
+        """
+        if base_ms is not None:
+            self.base_ms = base_ms
+            self.max_ms = max(self.max_ms, base_ms)
+        self.current_ms = self.base_ms
+        self._reference = None
+        self._steady = 0
+
+    def observe(self, values):
+        """
+        Feeds one sample's values and returns the interval to wait next, in ms.
+        """
+        reference = self._reference
+        if reference is None or any(
+            abs(value - previous) >= self.threshold for value, previous in zip(values, reference)
+        ):
+            self._reference = values
+            self._steady = 0
+            self.current_ms = self.base_ms
+            return self.current_ms
+
+        self._steady += 1
+        if self._steady >= STEADY_SAMPLES:
+            self._steady = 0
+            self.current_ms = min(self.max_ms, int(self.current_ms * BACKOFF_FACTOR))
+        return self.current_ms
@@ -0,0 +1,211 @@
+import glob
+import os
+
+from providers import BLOCKING, MetricProvider, register
+
+# --- Configuration ---
+HWMON_ROOT = "/sys/class/hwmon"
+CPUFREQ_ROOT = "/sys/devices/system/cpu/cpufreq"
+SENSOR_INTERVAL_MS = 5000
+# hwmon drivers whose temperatures are the CPU's (package, dies or cores)
+CPU_CHIPS = ("coretemp", "k10temp", "zenpower", "cpu_thermal", "soc_thermal")
+MAX_FANS = 3
+READ_SIZE = 64
+# --- End Configuration ---
+
+
+def _read_text(path):
+    """
+    Returns a small sysfs file's stripped contents, or None if it cannot be read.
+    """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _index(path, prefix):
+    """
+    Returns the N in ".../tempN_input" for sorting, or 0.
+    """
+    digits = os.path.basename(path)[len(prefix):].partition("_")[0]
+    return int(digits) if digits.isdigit() else 0
+
+
+class SensorFile:
+    """
+    One held-open sysfs attribute, re-read in place with a single preadv.
+    """
+
+    def __init__(self, path, label):
+        self.path = path
+        self.label = label
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self, buf):
+        """
+        Returns the attribute's integer value, or None while the sensor
+        cannot be read (many drivers return EIO or ENODATA when busy).
+        """
+        try:
+            length = os.preadv(self.fd, [buf], 0)
+            return int(buf[:length])
+        except (OSError, ValueError):
+            return None
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class SensorReader:
+    """
+    Reads CPU temperatures, CPU frequencies and fan speeds from sysfs.
+
+    /sys/class/hwmon and the cpufreq policies hold hundreds of small files,
+    so they are walked once, when the reader is created. Only the chosen
+    files are kept open, and read() re-reads each of those with one preadv
+    into a reused buffer: no directory walks or path lookups per refresh.
+
+    read() returns a dict with:
+      package    the CPU package (or die) temperature in °C, the hottest
+                 one on multi-socket machines, or None
+      cores      per-core temperatures in °C
+      freq_cur   current frequency of each cpufreq policy in kHz
+      freq_max   the highest cpuinfo_max_freq in kHz (fixed), or None
+      fans       [(label, rpm)] for up to MAX_FANS fans
+    """
+
+    def __init__(self, hwmon_root=HWMON_ROOT, cpufreq_root=CPUFREQ_ROOT):
+        self.package = []
+        self.cores = []
+        self.fans = []
+        self.frequencies = []
+        self.freq_max = None
+        self.buf = bytearray(READ_SIZE)
+        self._discover_hwmon(hwmon_root)
+        self._discover_cpufreq(cpufreq_root)
+        if not (self.package or self.cores or self.fans or self.frequencies):
+            raise OSError("no temperature, frequency or fan sensors found")
+
+    def _open(self, files, path, label):
+        try:
+            files.append(SensorFile(path, label))
+        except OSError:
+            pass
+
+    def _discover_hwmon(self, root):
+        for chip in sorted(glob.glob(os.path.join(root, "hwmon*"))):
+            name = _read_text(os.path.join(chip, "name")) or os.path.basename(chip)
+            if name in CPU_CHIPS:
+                package = []
+                temps = sorted(glob.glob(os.path.join(chip, "temp*_input")), key=lambda p: _index(p, "temp"))
+                for path in temps:
+                    label = _read_text(path[:-len("input")] + "label") or ""
+                    # coretemp: "Package id 0" and "Core N"; k10temp: "Tctl"/"Tdie" and "Tccd N"
+                    if label.startswith(("Core", "Tccd")):
+                        self._open(self.cores, path, label)
+                    elif label.startswith(("Package", "Tdie")) or not package:
+                        if label.startswith("Tdie"):
+                            self._close(package)  # Tdie is Tctl without AMD's offset
+                        self._open(package, path, label)
+                self.package.extend(package)
+            fans = sorted(glob.glob(os.path.join(chip, "fan*_input")), key=lambda p: _index(p, "fan"))
+            for path in fans:
+                if len(self.fans) >= MAX_FANS:
+                    break
+                label = _read_text(path[:-len("input")] + "label") or f"{name} {os.path.basename(path)[:-6]}"
+                self._open(self.fans, path, label)
+
+    def _discover_cpufreq(self, root):
+        policies = sorted(glob.glob(os.path.join(root, "policy*")), key=lambda p: _index(p, "policy"))
+        for policy in policies:
+            self._open(self.frequencies, os.path.join(policy, "scaling_cur_freq"), os.path.basename(policy))
+            maximum = _read_text(os.path.join(policy, "cpuinfo_max_freq"))
+            if maximum and maximum.isdigit():
+                self.freq_max = max(self.freq_max or 0, int(maximum))
+
+    def _values(self, files):
+        buf = self.buf
+        values = []
+        for sensor in files:
+            value = sensor.read(buf)
+            if value is not None:
+                values.append(value)
+        return values
+
+    def read(self):
+        package = self._values(self.package)
+        fans = []
+        buf = self.buf
+        for sensor in self.fans:
+            rpm = sensor.read(buf)
+            if rpm is not None:
+                fans.append((sensor.label, rpm))
+        return {
+            "package": max(package) / 1000 if package else None,  # The hottest socket
+            "cores": [value / 1000 for value in self._values(self.cores)],
+            "freq_cur": self._values(self.frequencies),
+            "freq_max": self.freq_max,
+            "fans": fans,
+        }
+
+    def _close(self, files):
+        for sensor in files:
+            sensor.close()
+        files.clear()
+
+    def close(self):
+        for files in (self.package, self.cores, self.fans, self.frequencies):
+            self._close(files)
+
+
+@register
+class SensorProvider(MetricProvider):
+    """
+    The hardware sensors panel: CPU temperature, frequency and fans. Some
+    hwmon drivers take milliseconds to answer (they talk to the chip over
+    I2C or ACPI), so reads run on the provider pool at a slower cadence
+    than CPU and MEM.
+    """
+
+    name = "sensors"
+    label = "Sensors"
+    setting = "show_sensors"
+    interval_setting = "sensor_interval_ms"
+    interval_ms = SENSOR_INTERVAL_MS
+    cost = BLOCKING
+    fields = ("package", "cores", "freq_cur", "freq_max", "fans")
+    rows = 2 + MAX_FANS
+
+    def __init__(self, interval_ms=None):
+        super().__init__(interval_ms)
+        self.reader = SensorReader()
+
+    def collect(self):
+        return self.reader.read()
+
+    def format(self, values):
+        lines = []
+        package, cores = values["package"], values["cores"]
+        if package is not None or cores:
+            line = "TEMP"
+            if package is not None:
+                line += f" {package:.0f}°C"
+            if cores:
+                line += f"  cores {min(cores):.0f}-{max(cores):.0f}°C"
+            lines.append(line)
+        freq_cur = values["freq_cur"]
+        if freq_cur:
+            line = f"FREQ {sum(freq_cur) / len(freq_cur) / 1e6:.2f} GHz avg, {max(freq_cur) / 1e6:.2f} top"
+            if values["freq_max"]:
+                line += f" / {values['freq_max'] / 1e6:.2f}"
+            lines.append(line)
+        lines.extend(f"FAN {label[:16]} {rpm} rpm" for label, rpm in values["fans"])
+        return lines
+
+    def close(self):
+        self.reader.close()
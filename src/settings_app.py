@@ -1,17 +1,35 @@
 import sys
-from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QTabWidget,
+from PyQt6.QtWidgets import (QApplication, QDialog, QWidget, QVBoxLayout, QTabWidget,
                              QLabel, QLineEdit, QPushButton, QColorDialog,
                              QGridLayout, QHBoxLayout, QComboBox)
-from PyQt6.QtCore import QSettings, Qt
-from PyQt6.QtGui import QColor, QPalette
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QIntValidator
 
-class SettingsWindow(QWidget):
-    def __init__(self):
-        super().__init__()
+from settings_schema import DEFAULTS, SCHEMA
+
+# Integer fields with a label are edited on the General tab
+INTEGER_SETTINGS = [field for field in SCHEMA if field.type is int and field.label]
+
+
+class SettingsWindow(QDialog):
+    """
+    Settings dialog shown in the widget's own process.
+
+    Every valid edit is emitted through setting_changed as it happens, so the
+    widget previews it immediately; there is nothing left to apply on close.
+    Numbers are emitted once typing is done (Enter, or leaving the field),
+    not per keystroke: typing 1500 would otherwise apply 1, 15 and 150 first.
+    """
+
+    setting_changed = pyqtSignal(str, object)
+
+    def __init__(self, values, parent=None):
+        super().__init__(parent)
         self.setWindowTitle("Widget Settings")
         self.setGeometry(200, 200, 400, 300)
 
-        self.settings = QSettings("SettingsApp", "TempSettings")
+        self.values = dict(DEFAULTS)
+        self.values.update(values)
 
         layout = QVBoxLayout()
         tab_widget = QTabWidget()
@@ -20,40 +38,16 @@ class SettingsWindow(QWidget):
         general_tab = QWidget()
         general_layout = QGridLayout()
 
-        # Update Interval
-        interval_label = QLabel("Update Interval (ms):", general_tab)
-        self.interval_input = QLineEdit(general_tab)
-        self.interval_input.setText(str(self.settings.value("update_interval_ms", 2000)))
-        general_layout.addWidget(interval_label, 0, 0)
-        general_layout.addWidget(self.interval_input, 0, 1)
-
-        # Corner Margin
-        margin_label = QLabel("Corner Margin (pixels):", general_tab)
-        self.margin_input = QLineEdit(general_tab)
-        self.margin_input.setText(str(self.settings.value("corner_margin", 10)))
-        general_layout.addWidget(margin_label, 1, 0)
-        general_layout.addWidget(self.margin_input, 1, 1)
-
-        # Widget Width
-        width_label = QLabel("Widget Width (pixels):", general_tab)
-        self.width_input = QLineEdit(general_tab)
-        self.width_input.setText(str(self.settings.value("widget_width", 250)))
-        general_layout.addWidget(width_label, 2, 0)
-        general_layout.addWidget(self.width_input, 2, 1)
-
-        # Label Height
-        height_label = QLabel("Label Height (pixels):", general_tab)
-        self.height_input = QLineEdit(general_tab)
-        self.height_input.setText(str(self.settings.value("label_height", 20)))
-        general_layout.addWidget(height_label, 3, 0)
-        general_layout.addWidget(self.height_input, 3, 1)
-
-        # Label Padding
-        padding_label = QLabel("Label Padding (pixels):", general_tab)
-        self.padding_input = QLineEdit(general_tab)
-        self.padding_input.setText(str(self.settings.value("label_padding", 5)))
-        general_layout.addWidget(padding_label, 4, 0)
-        general_layout.addWidget(self.padding_input, 4, 1)
+        self.inputs = {}
+        for row, field in enumerate(INTEGER_SETTINGS):
+            label = QLabel(field.label, general_tab)
+            line_edit = QLineEdit(general_tab)
+            line_edit.setValidator(QIntValidator(field.minimum, field.maximum, line_edit))
+            line_edit.setText(str(self.values[field.name]))
+            line_edit.editingFinished.connect(lambda key=field.name: self.on_integer_changed(key))
+            general_layout.addWidget(label, row, 0)
+            general_layout.addWidget(line_edit, row, 1)
+            self.inputs[field.name] = line_edit
 
         # Corner Selection (QComboBox)
         corner_label = QLabel("Widget Corner:", general_tab)
@@ -61,18 +55,20 @@ class SettingsWindow(QWidget):
         self.corner_combo.addItems(["Top-Left", "Top-Right"])
 
         # Set the correct initial selection
-        corner = self.settings.value("corner", "top-left")
+        corner = self.values["corner"]
         if corner == "top-right":
             self.corner_combo.setCurrentIndex(1)  # Index for "Top-Right"
         else:
             self.corner_combo.setCurrentIndex(0)  # Index for "Top-Left"
+        self.corner_combo.currentIndexChanged.connect(self.on_corner_changed)
 
-        general_layout.addWidget(corner_label, 5, 0)
-        general_layout.addWidget(self.corner_combo, 5, 1)
+        corner_row = len(INTEGER_SETTINGS)
+        general_layout.addWidget(corner_label, corner_row, 0)
+        general_layout.addWidget(self.corner_combo, corner_row, 1)
 
         # Empty label for spacing
         empty_label = QLabel("", general_tab)
-        general_layout.addWidget(empty_label, 6, 0, 1, 2)  # Span 2 columns
+        general_layout.addWidget(empty_label, corner_row + 1, 0, 1, 2)  # Span 2 columns
 
         general_tab.setLayout(general_layout)
         tab_widget.addTab(general_tab, "General")
@@ -98,23 +94,36 @@ class SettingsWindow(QWidget):
 
         layout.addWidget(tab_widget)
 
-        apply_button = QPushButton("Apply", self)
-        apply_button.clicked.connect(self.apply_settings)
-        layout.addWidget(apply_button)
+        close_button = QPushButton("Close", self)
+        close_button.clicked.connect(self.accept)
+        layout.addWidget(close_button)
 
         self.setLayout(layout)
 
-        # Store input values as attributes
-        self.interval = self.settings.value("update_interval_ms", 2000)
-        self.margin = self.settings.value("corner_margin", 10)
-        self.width = self.settings.value("widget_width", 250)
-        self.height = self.settings.value("label_height", 20)
-        self.padding = self.settings.value("label_padding", 5)
-        self.color = self.settings.value("text_color", "white")
+    def on_integer_changed(self, key):
+        """Emits an integer setting once its finished input holds a valid value."""
+        line_edit = self.inputs[key]
+        if not line_edit.hasAcceptableInput():
+            return
+        value = int(line_edit.text())
+        if value != self.values.get(key):
+            self.values[key] = value
+            self.setting_changed.emit(key, value)
+
+    def done(self, result):
+        # Escape or the title bar closes without the field losing focus
+        for key in self.inputs:
+            self.on_integer_changed(key)
+        super().done(result)
+
+    def on_corner_changed(self, index):
+        corner = "top-left" if index == 0 else "top-right"
+        self.values["corner"] = corner
+        self.setting_changed.emit("corner", corner)
 
     def update_color_preview(self):
         """Updates the color preview label with the current text color."""
-        color = self.settings.value("text_color", "white")
+        color = self.values["text_color"]
         self.color_preview.setStyleSheet(
             f"background-color: {color};"
             "height: 20px;"
@@ -124,39 +133,22 @@ class SettingsWindow(QWidget):
         self.color_preview.setFixedWidth(80)
 
     def set_text_color(self):
-        initial_color = QColor(self.settings.value("text_color", "white"))
+        initial_color = QColor(self.values["text_color"])
         color = QColorDialog.getColor(initial_color, self, "Select Text Color")
         if color.isValid():
-            self.settings.setValue("text_color", color.name())
+            self.values["text_color"] = color.name()
             self.update_color_preview()
-            self.color = color.name()
-
-    def apply_settings(self):
-        # Update settings and attributes
-        self.settings.setValue("update_interval_ms", int(self.interval_input.text()))
-        self.settings.setValue("corner_margin", int(self.margin_input.text()))
-        self.settings.setValue("widget_width", int(self.width_input.text()))
-        self.settings.setValue("label_height", int(self.height_input.text()))
-        self.settings.setValue("label_padding", int(self.padding_input.text()))
-        self.settings.setValue("text_color", self.color)
-
-        # Determine the selected corner
-        corner = "top-left" if self.corner_combo.currentIndex() == 0 else "top-right"
-        self.settings.setValue("corner", corner)
-
-        # Emit a signal or use a mechanism to notify the main app
-        # For simplicity, we'll just save to QSettings and assume the main app
-        # will read it when needed. A signal/slot mechanism would be better.
-        self.settings.sync()
-        self.close()
-
-    def closeEvent(self, event):
-        """Override closeEvent to handle window closing."""
-        self.apply_settings()  # Apply settings before closing
-        event.accept()
+            self.setting_changed.emit("text_color", color.name())
 
 if __name__ == '__main__':
+    from config import Config
+
+    # Standalone: edit the widget's stored settings directly. A running
+    # widget picks the changes up through its config hot-reload.
     app = QApplication(sys.argv)
-    window = SettingsWindow()
+    config = Config()
+    window = SettingsWindow(config.values())
+    window.setting_changed.connect(config.set)
+    window.finished.connect(config.sync)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
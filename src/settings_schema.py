@@ -0,0 +1,94 @@
+from scheduler import ADAPTIVE_MAX_MS, CHANGE_THRESHOLD
+
+
+class Field:
+    """
+    One typed setting: its type, default and the values it may take.
+
+    validate() turns whatever it is given (QSettings hands back strings on
+    some platforms) into the field's type and raises ValueError for
+    anything it cannot use. coerce() does the same for values read from the
+    backing store, falling back to the default instead of raising.
+    """
+
+    def __init__(self, name, type, default, minimum=None, maximum=None, choices=None, label=None):
+        self.name = name
+        self.type = type
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = choices
+        self.label = label  # Shown in the settings dialog when set
+
+    def validate(self, value):
+        if value is None:
+            raise ValueError("no value")
+        try:
+            if self.type is bool:
+                if isinstance(value, str):
+                    value = value.strip().lower() in ("true", "1", "yes", "on")
+                else:
+                    value = bool(value)
+            elif self.type is int:
+                value = int(float(value))
+            else:
+                value = self.type(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{value!r} is not a valid {self.type.__name__}") from None
+
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"{value!r} is not one of {', '.join(map(str, self.choices))}")
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{value} is below the minimum of {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{value} is above the maximum of {self.maximum}")
+        return value
+
+    def coerce(self, value):
+        try:
+            return self.validate(value)
+        except ValueError:
+            return self.default
+
+
+# Defaults that live in feature modules (sampler, shared, remote and the
+# providers) are repeated here rather than imported: importing those would
+# load psutil, shared memory, asyncio and the worker pool just to read the
+# settings. Keep them in step with the modules' own constants.
+SCHEMA = (
+    Field("update_interval_ms", int, 2000, 100, 600000, label="Update Interval (ms):"),
+    Field("corner_margin", int, 10, 0, 1000, label="Corner Margin (pixels):"),
+    Field("widget_width", int, 250, 50, 4000, label="Widget Width (pixels):"),
+    Field("label_height", int, 20, 8, 200, label="Label Height (pixels):"),
+    Field("label_padding", int, 5, 0, 100, label="Label Padding (pixels):"),
+    Field("corner", str, "top-left", choices=("top-left", "top-right")),
+    Field("text_color", str, "white"),
+    Field("sample_source", str, "auto", choices=("auto", "proc", "psutil", "cgroup")),
+    Field("per_core", bool, False),
+    Field("subsample", bool, False),  # Read CPU/MEM every subsample_ms and show each interval's CPU peak
+    Field("subsample_ms", int, 100, 20, 10000),
+    Field("show_processes", bool, False),
+    Field("process_interval_ms", int, 5000, 500, 600000),
+    Field("show_pressure", bool, False),
+    Field("pressure_interval_ms", int, 2000, 500, 600000),
+    Field("show_sensors", bool, False),
+    Field("sensor_interval_ms", int, 5000, 500, 600000),
+    Field("show_io", bool, False),
+    Field("show_diagnostics", bool, False),
+    Field("shared_sampler", bool, False),  # Read a headless --publish daemon instead of sampling
+    Field("shared_name", str, "system_widget"),
+    Field("cgroups", str, ""),  # cgroups.expand patterns shown in the cgroup panel, e.g. "self, system.slice/*"
+    Field("alerts", str, ""),  # ';'-separated alerts.AlertRule texts
+    Field("remote_hosts", str, ""),  # "host[:port], ..." of headless --agent instances
+    Field("remote_interval_ms", int, 2000, 500, 600000),
+    Field("adaptive_rate", bool, True),
+    Field("adaptive_max_ms", int, ADAPTIVE_MAX_MS, 100, 600000),
+    Field("change_threshold", float, CHANGE_THRESHOLD, 0.0, 100.0),
+    Field("show_history", bool, True),
+    Field("history_length", int, 60, 2, 3600),
+    Field("store_history", bool, True),
+    Field("history_dir", str, ""),  # Empty means tsdb.default_store_directory()
+)
+
+FIELDS = {field.name: field for field in SCHEMA}
+DEFAULTS = {field.name: field.default for field in SCHEMA}
@@ -0,0 +1,380 @@
+import os
+import struct
+import time
+from array import array
+from multiprocessing import shared_memory
+
+import psutil
+
+from sampler import RING_CAPACITY, SAMPLE_FIELDS
+
+# --- Configuration ---
+SHARED_NAME = "system_widget"
+MAX_CORES = 1024
+NET_SLOTS = 4
+READ_RETRIES = 1000  # Give up on a block whose writer died mid-write
+FALLBACK_INTERVAL_MS = 1000  # Until the writer has published its interval
+# --- End Configuration ---
+
+MAGIC = b"SWSM"
+VERSION = 1
+
+# Block layout. Every region starts on an 8-byte boundary so the doubles can
+# be read through one memoryview cast, without struct calls per value.
+HEADER = struct.Struct("<4sHHHH")  # magic, version, ring capacity, max cores, net slots
+U64 = struct.Struct("<Q")
+U32 = struct.Struct("<I")
+F64 = struct.Struct("<d")
+SEQ_OFFSET = 16
+COUNT_OFFSET = 24  # Samples published so far
+INTERVAL_OFFSET = 32  # The writer's current interval, in ms
+TICK_OFFSET = 40  # What the writer's last tick cost, in seconds
+PID_OFFSET = 48  # Writer's pid, 0 once it has shut down
+CORE_COUNT_OFFSET = 56
+NET_COUNT_OFFSET = 60
+HAS_IO_OFFSET = 64
+RING_OFFSET = 72
+IO_FIELDS = ("disk_read", "disk_write", "disk_read_iops", "disk_write_iops")
+NET_SLOT = struct.Struct("<16sddd")  # interface, rx bytes/s, tx bytes/s, total bytes
+
+_created_here = set()  # Names of the blocks this process is the writer of
+
+
+class Layout:
+    """
+    Offsets of the regions in a block with the given dimensions.
+    """
+
+    def __init__(self, capacity, max_cores, net_slots):
+        self.capacity = capacity
+        self.max_cores = max_cores
+        self.net_slots = net_slots
+        self.width = len(SAMPLE_FIELDS)
+        self.cores_offset = RING_OFFSET + 8 * capacity * self.width
+        self.io_offset = self.cores_offset + 8 * max_cores
+        self.net_offset = self.io_offset + 8 * len(IO_FIELDS)
+        self.size = self.net_offset + NET_SLOT.size * net_slots
+
+
+def _attach(name):
+    """
+    Opens an existing block without taking ownership of it. Before Python
+    3.13 the resource tracker would unlink a block every process merely
+    attached to when that process exits, pulling it from under the writer.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        block = shared_memory.SharedMemory(name=name)
+        if os.name == "posix" and name not in _created_here:
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(block._name, "shared_memory")
+        return block
+
+
+class SharedSampleWriter:
+    """
+    Publishes samples into a named shared memory block that any number of
+    SharedSampler readers, in any process, can map.
+
+    The block is guarded by a seqlock: the sequence number is made odd before
+    anything is written and even again afterwards. Readers take no lock; they
+    read the sequence, read what they need straight from the mapping, and
+    retry if the sequence was odd or has moved. Publishing costs the same no
+    matter how many readers are attached, and readers never make the writer
+    wait. (The seqlock relies on stores becoming visible in program order,
+    which x86 guarantees; weakly-ordered CPUs make torn reads rarer to catch,
+    not impossible.)
+    """
+
+    def __init__(self, name=SHARED_NAME, capacity=RING_CAPACITY, max_cores=MAX_CORES, net_slots=NET_SLOTS):
+        self.layout = Layout(capacity, max_cores, net_slots)
+        self.block = self._create(name, self.layout.size)
+        self.name = name
+        _created_here.add(name)
+        buf = self.block.buf
+        HEADER.pack_into(buf, 0, MAGIC, VERSION, capacity, max_cores, net_slots)
+        self.doubles = buf.cast("d")
+        self.seq = U64.unpack_from(buf, SEQ_OFFSET)[0] & ~1
+        U64.pack_into(buf, PID_OFFSET, os.getpid())
+
+    def _create(self, name, size):
+        try:
+            return shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            pass
+        # Left over from a writer that did not shut down cleanly, or in use
+        stale = _attach(name)
+        try:
+            pid = U64.unpack_from(stale.buf, PID_OFFSET)[0] if stale.size >= RING_OFFSET else 0
+            if pid and pid != os.getpid() and psutil.pid_exists(pid):
+                raise FileExistsError(f"Shared sampler '{name}' is already published by pid {pid}")
+        finally:
+            stale.close()
+        stale = shared_memory.SharedMemory(name=name)
+        stale.unlink()
+        stale.close()
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+    def publish(self, sample, core_usage=(), io_rates=None, interval_ms=0, tick_seconds=0.0):
+        """
+        Writes one sample (SAMPLE_FIELDS order) plus the per-core fractions
+        and I/O rates that came with it.
+        """
+        layout = self.layout
+        buf = self.block.buf
+        doubles = self.doubles
+        U64.pack_into(buf, SEQ_OFFSET, self.seq + 1)  # Odd: write in progress
+
+        count = U64.unpack_from(buf, COUNT_OFFSET)[0]
+        base = RING_OFFSET // 8 + (count % layout.capacity) * layout.width
+        doubles[base:base + layout.width] = _as_doubles(sample)
+        U64.pack_into(buf, COUNT_OFFSET, count + 1)
+        F64.pack_into(buf, INTERVAL_OFFSET, interval_ms)
+        F64.pack_into(buf, TICK_OFFSET, tick_seconds)
+
+        cores = min(len(core_usage), layout.max_cores)
+        if cores:
+            start = layout.cores_offset // 8
+            doubles[start:start + cores] = _as_doubles(core_usage[:cores])
+        U32.pack_into(buf, CORE_COUNT_OFFSET, cores)
+
+        U32.pack_into(buf, HAS_IO_OFFSET, io_rates is not None)
+        if io_rates is not None:
+            start = layout.io_offset // 8
+            doubles[start:start + len(IO_FIELDS)] = _as_doubles(io_rates[field] for field in IO_FIELDS)
+            net = io_rates["net"][:layout.net_slots]
+            for i, (name, rx, tx, total) in enumerate(net):
+                NET_SLOT.pack_into(buf, layout.net_offset + i * NET_SLOT.size, name.encode()[:16], rx, tx, total)
+            U32.pack_into(buf, NET_COUNT_OFFSET, len(net))
+
+        self.seq += 2
+        U64.pack_into(buf, SEQ_OFFSET, self.seq)  # Even: consistent again
+
+    def close(self):
+        """
+        Marks the block as orphaned, then removes it.
+        """
+        if self.block is None:
+            return
+        U64.pack_into(self.block.buf, PID_OFFSET, 0)
+        self.doubles.release()
+        self.block.close()
+        try:
+            self.block.unlink()
+        except FileNotFoundError:
+            pass
+        _created_here.discard(self.name)
+        self.block = None
+
+
+def _as_doubles(values):
+    return memoryview(array("d", values))
+
+
+class SharedRing:
+    """
+    The sample ring of a shared block, with RingBuffer's reading interface.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+
+    @property
+    def count(self):
+        return self.reader.read(self.reader.read_count) or 0
+
+    def latest(self):
+        return self.reader.read(self.reader.read_latest)
+
+    def since(self, seen):
+        result = self.reader.read(lambda: self.reader.read_since(seen))
+        return result if result is not None else (seen, [])
+
+
+class SharedSampler:
+    """
+    Reads samples a SharedSampleWriter publishes, in place of a Sampler.
+
+    It has the Sampler interface the widget and the headless exporter use,
+    so either can run off a shared sampler daemon without knowing it. What is
+    sampled (interval, per-core, I/O) is decided by the daemon; the set_*
+    calls are accepted and ignored, and nothing is paused because other
+    viewers may still be watching. The exception is set_alerts(): the
+    reader's own alert rules are checked against the daemon's samples each
+    time check_alerts() is called.
+    """
+
+    def __init__(self, name=SHARED_NAME):
+        self.name = name
+        self.block = _attach(name)
+        buf = self.block.buf
+        magic, version, capacity, max_cores, net_slots = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.block.close()
+            raise ValueError(f"'{name}' is not a compatible shared sampler block")
+        self.layout = Layout(capacity, max_cores, net_slots)
+        self.doubles = buf.cast("d")
+        self.buffer = SharedRing(self)
+        self.cgroup_stats = None  # Not published
+        self.spread = None
+        self.scheduler = None
+        self.store = None
+        self.alerts = None
+        self.paused = False
+        self._alerts_seen = 0
+
+    def read(self, fn):
+        """
+        Runs fn under the seqlock and returns its result, or None if no
+        consistent read was possible.
+        """
+        buf = self.block.buf
+        for attempt in range(READ_RETRIES):
+            seq = U64.unpack_from(buf, SEQ_OFFSET)[0]
+            if not seq & 1:
+                value = fn()
+                if U64.unpack_from(buf, SEQ_OFFSET)[0] == seq:
+                    return value
+            time.sleep(0)  # Let the writer finish
+        return None
+
+    def read_count(self):
+        return U64.unpack_from(self.block.buf, COUNT_OFFSET)[0]
+
+    def read_latest(self):
+        count = self.read_count()
+        if count == 0:
+            return None
+        layout = self.layout
+        base = RING_OFFSET // 8 + ((count - 1) % layout.capacity) * layout.width
+        return tuple(self.doubles[base:base + layout.width])
+
+    def read_since(self, seen):
+        layout = self.layout
+        count = self.read_count()
+        first = max(seen, count - layout.capacity + 1)
+        samples = []
+        for index in range(first, count):
+            base = RING_OFFSET // 8 + (index % layout.capacity) * layout.width
+            samples.append(tuple(self.doubles[base:base + layout.width]))
+        return count, samples
+
+    def read_cores(self):
+        cores = U32.unpack_from(self.block.buf, CORE_COUNT_OFFSET)[0]
+        start = self.layout.cores_offset // 8
+        return self.doubles[start:start + cores].tolist()
+
+    def read_io(self):
+        buf = self.block.buf
+        if not U32.unpack_from(buf, HAS_IO_OFFSET)[0]:
+            return None
+        start = self.layout.io_offset // 8
+        rates = dict(zip(IO_FIELDS, self.doubles[start:start + len(IO_FIELDS)].tolist()))
+        net = []
+        for i in range(U32.unpack_from(buf, NET_COUNT_OFFSET)[0]):
+            name, rx, tx, total = NET_SLOT.unpack_from(buf, self.layout.net_offset + i * NET_SLOT.size)
+            net.append((name.rstrip(b"\0").decode(errors="replace"), rx, tx, total))
+        rates["net"] = net
+        return rates
+
+    @property
+    def core_usage(self):
+        return self.read(self.read_cores) or ()
+
+    @property
+    def io_rates(self):
+        return self.read(self.read_io)
+
+    @property
+    def current_interval_ms(self):
+        return int(F64.unpack_from(self.block.buf, INTERVAL_OFFSET)[0]) or FALLBACK_INTERVAL_MS
+
+    @property
+    def interval_ms(self):
+        return self.current_interval_ms
+
+    @property
+    def tick_seconds(self):
+        return F64.unpack_from(self.block.buf, TICK_OFFSET)[0]
+
+    @property
+    def publishing(self):
+        """
+        Whether the writer is still running.
+        """
+        pid = U64.unpack_from(self.block.buf, PID_OFFSET)[0]
+        return bool(pid) and psutil.pid_exists(pid)
+
+    def tick(self):
+        """
+        Returns the latest published sample (None before the first one).
+        """
+        return self.buffer.latest()
+
+    # --- Sampler interface; the daemon owns these ---
+    def set_interval(self, interval_ms):
+        pass
+
+    def set_scheduler(self, scheduler):
+        pass
+
+    def set_store(self, store):
+        if store:
+            store.close()
+
+    def set_paused(self, paused):
+        pass
+
+    def set_per_core(self, enabled):
+        pass
+
+    def set_io(self, enabled):
+        pass
+
+    def set_cgroups(self, patterns):
+        pass
+
+    def set_subsample(self, subsample_ms):
+        pass
+
+    def set_alerts(self, alerts):
+        """
+        Installs an AlertEngine (or None) for check_alerts() to feed. Only
+        samples published from now on are checked.
+        """
+        self._alerts_seen = self.buffer.count
+        self.alerts = alerts
+
+    def check_alerts(self):
+        """
+        Runs every sample published since the last call through the alert
+        rules, on the calling thread. Samples the ring has already dropped
+        (more than its capacity since the last call) are skipped.
+        """
+        alerts = self.alerts
+        if alerts is None:
+            return
+        self._alerts_seen, samples = self.buffer.since(self._alerts_seen)
+        for sample in samples:
+            alerts.observe(sample)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def join(self, timeout=None):
+        pass
+
+    def is_alive(self):
+        return False
+
+    def close(self):
+        if self.block is None:
+            return
+        self.doubles.release()
+        self.block.close()
+        self.block = None
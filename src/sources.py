@@ -0,0 +1,207 @@
+import os
+import sys
+
+import psutil
+
+from cores import CoreUsage
+
+# --- Configuration ---
+PROC_ROOT = "/proc"
+STAT_READ_SIZE = 512
+STAT_BUFFER_SIZE = 16384
+MEMINFO_READ_SIZE = 4096
+# --- End Configuration ---
+
+
+class SampleSource:
+    """
+    Interface for the things the Sampler can read CPU and Memory usage from.
+
+    read() returns (cpu_percent, mem_percent, mem_used, mem_total), where the
+    CPU percentage covers the time since the previous read() call. When
+    per_core is set, read() also refreshes core_usage with the busy fraction
+    (0.0 - 1.0) of every core over the same period.
+
+    read_totals() returns the same but never touches the per-core counters,
+    so the next read() still covers every core since the previous read().
+    """
+
+    name = "base"
+    per_core = False
+    core_usage = ()
+
+    def read(self):
+        raise NotImplementedError
+
+    def read_totals(self):
+        return self.read()  # Right for sources without per-core figures
+
+    def close(self):
+        """
+        Releases anything the source holds open.
+        """
+
+
+class PsutilSource(SampleSource):
+    """
+    Portable source backed by psutil. Used wherever /proc is not available.
+    """
+
+    name = "psutil"
+
+    def __init__(self):
+        psutil.cpu_percent(interval=None)  # Prime the CPU counters
+        psutil.cpu_percent(interval=None, percpu=True)
+
+    def read(self):
+        cpu_usage = psutil.cpu_percent(interval=None)
+        if self.per_core:
+            self.core_usage = [p / 100 for p in psutil.cpu_percent(interval=None, percpu=True)]
+        mem_info = psutil.virtual_memory()
+        return cpu_usage, mem_info.percent, mem_info.used, mem_info.total
+
+    def read_totals(self):
+        # psutil keeps separate baselines for the aggregate and per-CPU calls
+        mem_info = psutil.virtual_memory()
+        return psutil.cpu_percent(interval=None), mem_info.percent, mem_info.used, mem_info.total
+
+
+class ProcSource(SampleSource):
+    """
+    Linux source that reads /proc/stat and /proc/meminfo directly.
+
+    Both files are opened once and kept open; every read re-reads them from
+    offset 0 with os.preadv into the same bytearray, and only the handful of
+    fields the widget shows are parsed. In per-core mode the whole of
+    /proc/stat is read in the same single pass and handed to CoreUsage.
+    The numbers match psutil's: CPU busy time excludes idle and iowait, and
+    used memory is MemTotal - MemAvailable.
+    """
+
+    name = "proc"
+
+    def __init__(self, proc_root=PROC_ROOT):
+        self._stat_fd = os.open(os.path.join(proc_root, "stat"), os.O_RDONLY)
+        self._meminfo_fd = os.open(os.path.join(proc_root, "meminfo"), os.O_RDONLY)
+        self._set_stat_buffer(bytearray(STAT_BUFFER_SIZE))
+        self._meminfo_buf = bytearray(MEMINFO_READ_SIZE)
+        self._meminfo_bufs = [self._meminfo_buf]
+        self._prev_total = 0
+        self._prev_idle = 0
+        self._cores = CoreUsage()
+        self.read_cpu()  # Prime the CPU counters
+
+    def _set_stat_buffer(self, buf):
+        self._stat_buf = buf
+        self._stat_bufs = [buf]
+        self._stat_head = [memoryview(buf)[:STAT_READ_SIZE]]
+
+    def _read_stat(self, per_core):
+        """
+        Reads /proc/stat into the reused buffer and returns the byte count.
+
+        Only the first line is needed for the aggregate; in per-core mode the
+        whole file is read, doubling the buffer if it ever fills up.
+        """
+        if not per_core:
+            return os.preadv(self._stat_fd, self._stat_head, 0)
+        while True:
+            length = os.preadv(self._stat_fd, self._stat_bufs, 0)
+            if length < len(self._stat_buf):
+                return length
+            self._set_stat_buffer(bytearray(2 * len(self._stat_buf)))
+
+    def read_cpu(self, per_core=None):
+        """
+        Returns the aggregate CPU busy percentage since the previous call,
+        and refreshes core_usage too if per_core (default: self.per_core).
+        """
+        per_core = self.per_core if per_core is None else per_core
+        length = self._read_stat(per_core)
+        buf = self._stat_buf
+        end = buf.find(b"\n", 0, length)
+        if per_core:
+            last = buf.rfind(b"\ncpu", 0, length)
+            stop = buf.find(b"\n", last + 1, length)
+            self.core_usage = self._cores.update(bytes(buf[end + 1:stop]))
+        # "cpu  user nice system idle iowait irq softirq steal guest guest_nice"
+        fields = buf[4:end].split()
+        total = (
+            int(fields[0]) + int(fields[1]) + int(fields[2]) + int(fields[3])
+            + int(fields[4]) + int(fields[5]) + int(fields[6]) + int(fields[7])
+        )
+        idle = int(fields[3]) + int(fields[4])
+
+        total_delta = total - self._prev_total
+        idle_delta = idle - self._prev_idle
+        self._prev_total = total
+        self._prev_idle = idle
+        if total_delta <= 0:
+            return 0.0
+        return round(100.0 * (total_delta - idle_delta) / total_delta, 1)
+
+    def read_memory(self):
+        """
+        Returns (mem_percent, mem_used, mem_total) in psutil's terms.
+        """
+        buf = self._meminfo_buf
+        length = os.preadv(self._meminfo_fd, self._meminfo_bufs, 0)
+        total = _meminfo_value(buf, length, b"MemTotal:")
+        available = _meminfo_value(buf, length, b"MemAvailable:")
+        if available < 0:
+            available = _meminfo_value(buf, length, b"MemFree:")
+        used = total - available
+        percent = round(100.0 * used / total, 1) if total else 0.0
+        return percent, used, total
+
+    def read(self):
+        cpu_usage = self.read_cpu()
+        mem_usage, mem_used, mem_total = self.read_memory()
+        return cpu_usage, mem_usage, mem_used, mem_total
+
+    def read_totals(self):
+        cpu_usage = self.read_cpu(per_core=False)
+        mem_usage, mem_used, mem_total = self.read_memory()
+        return cpu_usage, mem_usage, mem_used, mem_total
+
+    def close(self):
+        for fd in (self._stat_fd, self._meminfo_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def _meminfo_value(buf, length, key):
+    """
+    Returns the value of one /proc/meminfo field in bytes, or -1 if missing.
+    """
+    start = buf.find(key, 0, length)
+    if start < 0:
+        return -1
+    start += len(key)
+    end = buf.find(b"kB", start, length)
+    return int(buf[start:end]) * 1024
+
+
+def create_source(name="auto"):
+    """
+    Returns a SampleSource by name ("auto", "proc", "psutil" or "cgroup").
+
+    "auto" prefers the /proc reader on Linux and falls back to psutil anywhere
+    it cannot be opened. "cgroup" measures this process's own cgroup against
+    its limits (for containers) and falls back like "auto".
+    """
+    if name == "cgroup":
+        from cgroups import CgroupSource  # Imports this module
+
+        try:
+            return CgroupSource()
+        except (OSError, ValueError) as e:
+            print(f"Warning: cgroup source unavailable ({e}). Using host-wide figures.")
+    if name in ("auto", "proc") and sys.platform.startswith("linux"):
+        try:
+            return ProcSource()
+        except (OSError, ValueError, IndexError) as e:
+            print(f"Warning: /proc source unavailable ({e}). Falling back to psutil.")
+    return PsutilSource()
@@ -0,0 +1,183 @@
+import math
+
+# --- Configuration ---
+EWMA_TAU_S = 30.0  # Time constant of the moving average, in seconds
+QUANTILE_WINDOW = 300  # Samples a streaming percentile covers before it starts over
+# --- End Configuration ---
+
+
+class EWMA:
+    """
+    Exponentially weighted moving average over time.
+
+    Each sample is weighted by how much time passed since the previous one,
+    so the average means the same thing whether samples arrive every 100 ms
+    or, with the adaptive rate, every 30 s. O(1) time and memory per sample.
+    """
+
+    def __init__(self, tau_s=EWMA_TAU_S):
+        self.tau_s = tau_s
+        self.value = None
+        self._last_time = None
+
+    def update(self, value, timestamp):
+        if self.value is None:
+            self.value = value
+        else:
+            elapsed = max(0.0, timestamp - self._last_time)
+            alpha = 1.0 - math.exp(-elapsed / self.tau_s)
+            self.value += alpha * (value - self.value)
+        self._last_time = timestamp
+        return self.value
+
+
+class P2Quantile:
+    """
+    Streaming estimate of one quantile with the P-square algorithm (Jain and
+    Chlamtac, 1985).
+
+    Five markers track the minimum, the p/2, p and (1+p)/2 quantiles and the
+    maximum. Each observation moves marker positions by one and adjusts
+    heights with a piecewise-parabolic fit, so nothing is stored but the
+    markers: O(1) time and memory however many samples are seen.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, value):
+        self.count += 1
+        heights = self.heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Find the cell the value falls in, stretching the extremes if needed
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+        positions = self.positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        desired = self.desired
+        for i in range(5):
+            desired[i] += self.increments[i]
+
+        # Nudge the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            offset = desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (
+                offset <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        n, q = self.positions, self.heights
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i, step):
+        n, q = self.positions, self.heights
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    @property
+    def value(self):
+        """
+        The current estimate, or None before any sample. Until five samples
+        have been seen it is the nearest-rank quantile of those few.
+        """
+        if not self.heights:
+            return None
+        if self.count <= 5:
+            return self.heights[min(len(self.heights) - 1, int(self.p * len(self.heights)))]
+        return self.heights[2]
+
+
+class WindowedQuantile:
+    """
+    A P2Quantile that starts over every `window` samples, so the estimate
+    follows recent behaviour rather than everything since launch. While a
+    fresh window has too few samples to say much, the previous window's
+    final estimate is reported.
+    """
+
+    def __init__(self, p, window=QUANTILE_WINDOW):
+        self.p = p
+        self.window = window
+        self.current = P2Quantile(p)
+        self.previous = None
+
+    def update(self, value):
+        if self.current.count >= self.window:
+            self.previous = self.current.value
+            self.current = P2Quantile(self.p)
+        self.current.update(value)
+
+    @property
+    def value(self):
+        if self.current.count < 5 and self.previous is not None:
+            return self.previous
+        return self.current.value
+
+
+class Aggregate:
+    """
+    Minimum, maximum and time-weighted mean of the values seen since the
+    last take(). O(1) per value and nothing is allocated until take().
+
+    Only one thread (the sampler's) ever calls add() and take(), so no lock
+    is needed; other threads only see the tuples take() returns.
+    """
+
+    __slots__ = ("count", "total", "weight", "minimum", "maximum")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.weight = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value, weight=1.0):
+        self.count += 1
+        self.total += value * weight
+        self.weight += weight
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def take(self):
+        """
+        Returns (minimum, maximum, mean, count) and starts over, or None
+        when nothing was added.
+        """
+        if self.count == 0:
+            return None
+        mean = self.total / self.weight if self.weight > 0 else self.maximum
+        result = (self.minimum, self.maximum, mean, self.count)
+        self.reset()
+        return result
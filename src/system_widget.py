@@ -1,34 +1,53 @@
 import sys
-import psutil
 import os
-from PyQt6.QtWidgets import (
-    QApplication,
-    QWidget,
-    QLabel,
-    QVBoxLayout,
-    QMenu,
-    QSystemTrayIcon,
-    QStyle,
-    QInputDialog,
-    QColorDialog,
-    QPushButton,
-    QTabWidget,
-    QLineEdit,
-    QMessageBox,
-)
-from PyQt6.QtCore import Qt, QTimer, QPoint, QSettings, QEvent, QProcess
-from PyQt6.QtGui import QColor, QPalette, QContextMenuEvent, QAction, QMouseEvent, QIcon, QFontMetrics
+import time
+import importlib
+
+if __name__ == '__main__' and "--headless" in sys.argv[1:]:
+    # Hand off before any Qt import so headless hosts never load PyQt6
+    from headless import main
+    sys.exit(main([arg for arg in sys.argv[1:] if arg != "--headless"]))
+
+from PyQt6.QtWidgets import QApplication, QWidget, QMenu, QSystemTrayIcon
+from PyQt6.QtCore import Qt, QTimer, QPoint, QRect, QEvent, QSocketNotifier, pyqtSignal
+from PyQt6.QtGui import QColor, QContextMenuEvent, QAction, QMouseEvent, QIcon, QFont, QFontMetrics, QImage, QPainter
+
+from config import Config
+from cores import heat_pixels
+from diagnostics import Diagnostics
+from formatting import format_bytes, format_rate
+from overlay import Sparkline, TextRow
+from providers import PROVIDERS, ProviderScheduler
+from sampler import Sampler, load_last_sample, save_last_sample
+from scheduler import AdaptiveInterval
+from settings_schema import FIELDS
+from sources import create_source
+from tsdb import StoreLocked, TimeSeriesStore, data_directory, default_store_directory
 
 # --- Configuration ---
-UPDATE_INTERVAL_MS = 2000
-TEXT_COLOR = "white"
-DEFAULT_CORNER = "top-left"
-CORNER_MARGIN = 10
-LABEL_HEIGHT = 20
-WIDGET_WIDTH = 250
-LABEL_PADDING = 5
+HEAT_STRIP_HEIGHT = 6
+SPARKLINE_WIDTH = 60
+SPARKLINE_GAP = 8
+NET_ROWS = 2  # Busiest network interfaces shown
+HOST_ROWS = 8  # Remote hosts shown; down hosts first, then the busiest
+CGROUP_ROWS = 6  # Busiest cgroups shown
+FIRST_SAMPLE_POLL_MS = 25
+MIN_ALERT_POLL_MS = 250  # Fastest a shared sampler's samples are checked against the alerts
 # --- End Configuration ---
 
+# Set to make the widget print when its first frames are painted and quit
+# once live values are on screen (see benchmarks/bench_startup.py).
+STARTUP_PROBE_ENV = "SYSTEM_WIDGET_STARTUP_PROBE"
+
+# Built-in provider modules, in display order, keyed by the setting that turns
+# each one on. A module is only imported (registering its provider) once its
+# panel is turned on or the context menu lists it.
+PROVIDER_MODULES = {
+    "show_pressure": "pressure",
+    "show_processes": "processes",
+    "show_sensors": "sensors",
+}
+
 
 class SystemMonitorWidget(QWidget):
     """
@@ -36,13 +55,20 @@ class SystemMonitorWidget(QWidget):
     positioned in a screen corner, with user-selectable corner and settings persistence.
     """
 
-    def __init__(self):
+    alert_changed = pyqtSignal(object, bool, float)  # Emitted on the sampler thread; delivered queued
+    provider_refreshed = pyqtSignal(str)  # Emitted on the provider scheduler thread; delivered queued
+
+    def __init__(self, config=None):
         super().__init__()
         self.old_pos = None
+        self.settings_window = None
+        self.shut_down = False
+        self.startup_probe = STARTUP_PROBE_ENV in os.environ
+        self.first_frame_painted = False
 
         # --- Settings ---
-        self.settings = QSettings("MyApplication", "SystemMonitorWidget")
-        self.load_settings()  # Load settings
+        self.config = config if config is not None else Config(parent=self)
+        self.relayout_pending = False
 
         # --- Window Setup ---
         self.setup_window()
@@ -51,25 +77,88 @@ class SystemMonitorWidget(QWidget):
         # --- Initial Positioning ---
         self.position_in_corner()
 
+        # --- Last Sample From the Previous Run ---
+        self.last_sample_path = os.path.join(data_directory(), "last_sample")
+        self.sample_state = "none"  # "none", then "cached", then "live"
+        cached = load_last_sample(self.last_sample_path)
+        if cached is not None:
+            self.show_sample(cached)
+            self.sample_state = "cached"
+
+        # --- Alerts, Checked by the Sampler ---
+        self.tray_icon = None
+        self.alert_changed.connect(self.on_alert)
+        self.alerts = self.create_alerts()
+        self.shared_alert_timer = QTimer(self)  # Feeds the alerts from a shared sampler's samples
+        self.shared_alert_timer.timeout.connect(self.check_shared_alerts)
+
+        # --- Background Sampling ---
+        self.sampler = self.create_sampler()
+        self.sampler.start()
+        self.sync_shared_alerts()
+        self.occluded = False
+        self.watching_exposure = False
+        self.seen_samples = 0
+
+        # --- Metric Providers, Each on Its Own Cadence ---
+        self.providers = ProviderScheduler()
+        self.providers.listener = self.provider_refreshed.emit
+        self.provider_refreshed.connect(lambda name: self.update_provider_rows())
+        self.provider_instances = {}
+        self.provider_notifiers = {}  # name -> QSocketNotifiers on its event_fds()
+        self.providers_version = 0
+        for setting in PROVIDER_MODULES:
+            if self.config.get(setting):
+                self.start_provider(self.provider_class(setting))
+        self.providers.start()
+        self.remote = None
+        self.remote_version = 0
+        if self.config.remote_hosts:
+            self.start_remote()
+
         # --- Timer for Updates ---
+        self.diagnostics = Diagnostics()
         self.start_timer()
+        self.watch_config()
         self.update_stats()
 
-    def load_settings(self):
-        """Loads settings from QSettings."""
-        self.current_corner = self.settings.value("corner", DEFAULT_CORNER)
-        if self.current_corner not in ["top-left", "top-right"]:
-            self.current_corner = DEFAULT_CORNER
-
-        self.widget_width = self.settings.value("widget_width", WIDGET_WIDTH)
-        if not isinstance(self.widget_width, int):
-            self.widget_width = WIDGET_WIDTH
+    def watch_config(self):
+        """
+        Subscribes to the config fields the widget reacts to, so a change
+        only redoes the work that depends on it.
+        """
+        self.config.watch("update_interval_ms", self.on_interval_changed)
+        self.config.watch("text_color", lambda name, value: self.update_text_color())
+        self.config.watch(
+            ("corner", "corner_margin", "widget_width", "label_height", "label_padding"),
+            lambda name, value: self.schedule_relayout(),
+        )
+        self.config.watch("per_core", self.on_per_core_changed)
+        self.config.watch(("subsample", "subsample_ms"), self.on_subsample_changed)
+        self.config.watch("show_history", self.on_show_history_changed)
+        self.config.watch("history_length", self.on_history_length_changed)
+        self.config.watch(("adaptive_rate", "adaptive_max_ms", "change_threshold"), self.on_schedule_changed)
+        for setting in PROVIDER_MODULES:
+            self.config.watch(setting, lambda name, enabled: self.on_provider_toggled(self.provider_class(name), enabled))
+        self.config.watch("show_io", self.on_show_io_changed)
+        self.config.watch("show_diagnostics", self.on_show_diagnostics_changed)
+        self.config.watch(("store_history", "history_dir"), self.on_store_changed)
+        self.config.watch(("shared_sampler", "shared_name", "sample_source"), self.on_sampler_changed)
+        self.config.watch("cgroups", self.on_cgroups_changed)
+        self.config.watch(("remote_hosts", "remote_interval_ms"), self.on_remote_changed)
+        self.config.watch("alerts", self.on_alerts_changed)
+
+    def schedule_relayout(self):
+        """
+        Repositions the widget once, after the current batch of changes.
+        """
+        if not self.relayout_pending:
+            self.relayout_pending = True
+            QTimer.singleShot(0, self.relayout)
 
-        self.update_interval_ms = int(self.settings.value("update_interval_ms", UPDATE_INTERVAL_MS))
-        self.text_color = str(self.settings.value("text_color", TEXT_COLOR))
-        self.corner_margin = int(self.settings.value("corner_margin", CORNER_MARGIN))
-        self.label_height = int(self.settings.value("label_height", LABEL_HEIGHT))
-        self.label_padding = int(self.settings.value("label_padding", LABEL_PADDING))
+    def relayout(self):
+        self.relayout_pending = False
+        self.position_in_corner()
 
     def setup_window(self):
         """Sets up the main window properties."""
@@ -80,15 +169,44 @@ class SystemMonitorWidget(QWidget):
         self.installEventFilter(self)  # Event filter for context menu
 
     def create_ui_elements(self):
-        """Creates and configures the UI elements (labels)."""
-        self.mem_label = QLabel("MEM: --%", self)
-        self.cpu_label = QLabel("CPU: --%", self)
-        self.update_text_color()
-
-        font = self.cpu_label.font()
+        """Creates the painted rows (text, sparklines, heat strip and panels)."""
+        font = QFont(self.font())
         font.setPointSize(12)
-        self.cpu_label.setFont(font)
-        self.mem_label.setFont(font)
+        rate_font = QFont(font)
+        rate_font.setPointSize(8)
+        self.panel_font = QFont("monospace")
+        self.panel_font.setStyleHint(QFont.StyleHint.Monospace)
+        self.panel_font.setPointSize(9)
+
+        self.mem_label = TextRow(self, "MEM: --%", font)
+        self.cpu_label = TextRow(self, "CPU: --%", font)
+        self.rate_label = TextRow(self, "", rate_font)
+        self.io_rows = [TextRow(self, "", self.panel_font) for _ in range(2 + NET_ROWS)]
+        for row in self.io_rows:
+            row.setVisible(self.config.show_io)
+        self.provider_classes = {}  # setting -> provider class, once its module is loaded
+        self.provider_rows = {}  # One panel per loaded provider
+        self.cgroup_rows = [TextRow(self, "", self.panel_font) for _ in range(CGROUP_ROWS)]
+        for row in self.cgroup_rows:
+            row.setVisible(bool(self.config.cgroups))
+        self.host_rows = [TextRow(self, "", self.panel_font) for _ in range(1 + HOST_ROWS)]
+        for row in self.host_rows:
+            row.setVisible(bool(self.config.remote_hosts))
+        self.diagnostic_rows = [TextRow(self, "", self.panel_font) for _ in range(2)]
+        for row in self.diagnostic_rows:
+            row.setVisible(self.config.show_diagnostics)
+        self.rows = [self.mem_label, self.cpu_label, self.rate_label]
+        for rows, _ in self.panels():
+            self.rows.extend(rows)
+        for setting in PROVIDER_MODULES:
+            if self.config.get(setting):
+                self.provider_class(setting)  # Creates its panel
+
+        self.core_image = None
+        self.core_strip_rect = QRect()
+        self.cpu_history = Sparkline(self, self.config.history_length)
+        self.mem_history = Sparkline(self, self.config.history_length)
+        self.update_text_color()
 
     def position_in_corner(self):
         """
@@ -100,33 +218,31 @@ class SystemMonitorWidget(QWidget):
             screen_geometry = QApplication.primaryScreen().availableGeometry()
 
             # Calculate widget dimensions
-            widget_height = int(self.label_height) * 2 + 10
-
-            self.resize(self.widget_width, widget_height)
+            widget_height = self.config.label_height * 2 + 10
+            panel_top = widget_height - 5
+            if self.config.per_core:
+                widget_height += HEAT_STRIP_HEIGHT
+                panel_top += HEAT_STRIP_HEIGHT
+            line_spacing = QFontMetrics(self.panel_font).lineSpacing()
+            for rows, shown in self.panels():
+                if shown:
+                    widget_height += line_spacing * len(rows)
+
+            total_width = self.total_width()
+            self.resize(total_width, widget_height)
 
             pos_x = 0
-            pos_y = screen_geometry.top() + int(self.corner_margin)
-
-            if self.current_corner == "top-right":
-                pos_x = screen_geometry.right() - int(self.widget_width) - int(
-                    self.corner_margin
-                )
-                self.mem_label.move(
-                    int(self.widget_width) - self.mem_label.width() - int(self.corner_margin), 5
-                )
-                self.cpu_label.move(
-                    int(self.widget_width) - self.cpu_label.width() - int(self.corner_margin),
-                    int(self.label_height) + 5,
-                )
-            elif self.current_corner == "top-left":
-                pos_x = screen_geometry.left() + int(self.corner_margin)
-                self.mem_label.move(int(self.corner_margin), 5)
-                self.cpu_label.move(int(self.corner_margin), int(self.label_height) + 5)
+            pos_y = screen_geometry.top() + self.config.corner_margin
+
+            if self.config.corner == "top-right":
+                pos_x = screen_geometry.right() - total_width - self.config.corner_margin
+            elif self.config.corner == "top-left":
+                pos_x = screen_geometry.left() + self.config.corner_margin
             else:
                 print("Warning: Invalid corner setting. Defaulting to top-left.")
-                pos_x = screen_geometry.left() + int(self.corner_margin)
-                self.mem_label.move(int(self.corner_margin), 5)
-                self.cpu_label.move(int(self.corner_margin), int(self.label_height) + 5)
+                pos_x = screen_geometry.left() + self.config.corner_margin
+
+            self.layout_rows(panel_top, line_spacing)
 
             pos_x = max(screen_geometry.left(), pos_x)
             pos_y = max(screen_geometry.top(), pos_y)
@@ -137,50 +253,496 @@ class SystemMonitorWidget(QWidget):
             print(f"Error positioning widget: {e}")
             self.move(50, 50)
 
+    def panels(self):
+        """
+        Returns the row panels below the heat strip, top to bottom, as
+        (rows, shown) pairs.
+        """
+        panels = [(self.io_rows, self.config.show_io)]
+        panels.extend(
+            (self.provider_rows[self.provider_classes[setting].name], bool(self.config.get(setting)))
+            for setting in PROVIDER_MODULES if setting in self.provider_classes
+        )
+        panels.extend((
+            (self.cgroup_rows, bool(self.config.cgroups)),
+            (self.host_rows, bool(self.config.remote_hosts)),
+            (self.diagnostic_rows, self.config.show_diagnostics),
+        ))
+        return panels
+
+    def total_width(self):
+        """
+        Returns the widget width including the sparkline column, if shown.
+        """
+        width = self.config.widget_width
+        if self.config.show_history:
+            width += SPARKLINE_WIDTH + SPARKLINE_GAP
+        return width
+
+    def layout_rows(self, panel_top, line_spacing):
+        """
+        Places every painted row. Rows hug the chosen screen edge; the
+        sparklines take a column at the opposite edge, and the rate
+        indicator sits at the inner end of the CPU row. Below the heat strip
+        come the shown panels, in panels() order.
+        """
+        margin = self.config.corner_margin
+        height = self.config.label_height
+        width = self.total_width()
+        right = self.config.corner == "top-right"
+        near = width - margin if right else margin
+        far = margin if right else width - margin
+
+        if self.config.show_history:
+            spark_x = margin if right else width - margin - SPARKLINE_WIDTH
+            self.mem_history.rect = QRect(spark_x, 8, SPARKLINE_WIDTH, height - 6)
+            self.cpu_history.rect = QRect(spark_x, height + 8, SPARKLINE_WIDTH, height - 6)
+            inset = SPARKLINE_WIDTH + SPARKLINE_GAP
+            far = far + inset if right else far - inset
+        else:
+            self.mem_history.rect = QRect()
+            self.cpu_history.rect = QRect()
+
+        self.mem_label.place(near, 5, height, right)
+        self.cpu_label.place(near, height + 5, height, right)
+        self.rate_label.place(far, height + 5, height, not right)
+        self.core_strip_rect = QRect(margin, height * 2 + 5, width - 2 * margin, HEAT_STRIP_HEIGHT)
+        for rows, shown in self.panels():
+            for i, row in enumerate(rows):
+                row.place(near, panel_top + i * line_spacing, line_spacing, right)
+            if shown:
+                panel_top += line_spacing * len(rows)
+        self.update()
+
     def start_timer(self):
         """Starts the timer for updating stats."""
         self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_stats)
-        self.timer.start(self.update_interval_ms)
+        self.timer.timeout.connect(self.on_timer)
+        self.restart_timer(self.config.update_interval_ms)
 
-    def update_stats(self):
+    def restart_timer(self, interval_ms):
+        """
+        (Re)starts the GUI timer. Jitter is measured from the next tick on.
+        """
+        self.diagnostics.reset_timer()
+        self.timer.start(interval_ms)
+
+    def on_timer(self):
+        self.diagnostics.timer_fired(self.timer.interval())
+        self.update_stats()
+
+    def create_sampler(self):
+        """
+        Returns where samples come from: a shared sampler daemon's block
+        when shared_sampler is on and one is publishing, otherwise a
+        Sampler of this process's own, set up from the config.
+        """
+        if self.config.shared_sampler:
+            from shared import SharedSampler  # Shared memory is only loaded for a shared sampler
+
+            try:
+                sampler = SharedSampler(self.config.shared_name)
+                sampler.set_alerts(self.alerts)
+                return sampler
+            except (OSError, ValueError) as e:
+                print(f"Warning: shared sampler '{self.config.shared_name}' unavailable ({e}). Sampling in-process.")
+        sampler = Sampler(self.config.update_interval_ms, source=create_source(self.config.sample_source))
+        sampler.set_per_core(self.config.per_core)
+        sampler.set_subsample(self.config.subsample_ms if self.config.subsample else 0)
+        sampler.set_io(self.config.show_io)
+        sampler.set_cgroups(self.config.cgroups)
+        sampler.set_scheduler(self.create_scheduler())
+        sampler.set_store(self.create_store())
+        sampler.set_alerts(self.alerts)
+        return sampler
+
+    def on_sampler_changed(self, name, value):
+        old = self.sampler
+        self.sampler = self.create_sampler()
+        self.sampler.start()
+        old.stop()
+        if not old.is_alive():
+            old.close()  # Nothing else will release it
+        self.seen_samples = 0
+        self.cpu_history.clear()
+        self.mem_history.clear()
+        self.sync_shared_alerts()
+        self.sync_schedule()
+
+    def pause_sampler(self, paused):
+        """
+        Pauses or resumes sampling and the providers while the widget is
+        hidden or covered. With alerts set up the sampler keeps going, since
+        it is what evaluates them; the providers never feed alerts.
+        """
+        self.sampler.set_paused(paused and self.alerts is None)
+        self.providers.set_paused(paused)
+
+    def create_alerts(self):
+        """
+        Returns an AlertEngine for the configured rules, or None if there are none.
+        """
+        if not self.config.alerts.strip():
+            return None
+        from alerts import AlertEngine, parse_rules  # subprocess is only loaded when alerts are set
+
+        rules = parse_rules(self.config.alerts)
+        return AlertEngine(rules, self.alert_changed.emit) if rules else None
+
+    def on_alerts_changed(self, name, value):
+        self.alerts = self.create_alerts()
+        self.sampler.set_alerts(self.alerts)
+        self.pause_sampler(not self.isVisible() or self.occluded)
+        self.sync_shared_alerts()
+        self.update_alert_colors()
+
+    def sync_shared_alerts(self):
+        """
+        A shared sampler's daemon does not know this widget's alert rules,
+        so with one the widget checks them itself against the daemon's
+        samples, on a timer that keeps running while it is hidden.
+        """
+        if not isinstance(self.sampler, Sampler) and self.alerts is not None:  # A SharedSampler
+            self.shared_alert_timer.start(max(MIN_ALERT_POLL_MS, self.sampler.current_interval_ms))
+        else:
+            self.shared_alert_timer.stop()
+
+    def check_shared_alerts(self):
+        self.sampler.check_alerts()
+        interval = max(MIN_ALERT_POLL_MS, self.sampler.current_interval_ms)
+        if self.shared_alert_timer.interval() != interval:
+            self.shared_alert_timer.setInterval(interval)  # Follow the daemon's rate
+
+    def on_alert(self, rule, active, value):
+        """
+        Carries out an alert's display actions when it fires or clears.
+        """
+        self.update_alert_colors()
+        if "notify" in rule.actions:
+            message = f"{rule.text}\n{'Now' if active else 'Back to'} {value:.1f}%"
+            title = "System Monitor alert" if active else "System Monitor alert cleared"
+            if self.tray_icon is not None and self.tray_icon.isVisible():
+                self.tray_icon.showMessage(title, message)
+            else:
+                print(f"{title}: {message}")
+
+    def update_alert_colors(self):
+        """
+        Colors the CPU and MEM rows after the active alerts on them, if any.
+        """
+        rules = self.alerts.active_rules() if self.alerts is not None else []
+        for row, metric in ((self.cpu_label, "cpu"), (self.mem_label, "mem")):
+            color = None
+            for rule in rules:
+                if rule.metric == metric and "color" in rule.actions:
+                    color = QColor(rule.actions["color"])
+            row.setColor(color)
+
+    def set_alert_rules(self):
         """
-        Fetches CPU and Memory usage and updates the labels.
+        Asks for the alert rules, separated by ';'.
         """
+        from PyQt6.QtWidgets import QInputDialog  # Only needed once a prompt is opened
+
+        text, ok = QInputDialog.getText(
+            self, "Alerts", "Rules, e.g. cpu.ewma > 90 clear 80 for 30s notify color=red; mem > 95 notify",
+            text=self.config.alerts,
+        )
+        if ok:
+            self.config.set("alerts", text.strip())
+
+    def create_scheduler(self):
+        """
+        Returns an AdaptiveInterval for the sampler, or None for a fixed rate.
+        """
+        if not self.config.adaptive_rate:
+            return None
+        return AdaptiveInterval(self.config.update_interval_ms, self.config.adaptive_max_ms, self.config.change_threshold)
+
+    def create_store(self):
+        """
+        Opens the on-disk sample history, or returns None if it is disabled
+        or cannot be opened.
+        """
+        if not self.config.store_history:
+            return None
+        directory = self.config.history_dir or default_store_directory()
         try:
-            cpu_usage = psutil.cpu_percent(interval=None)
-            mem_info = psutil.virtual_memory()
-            mem_usage = mem_info.percent
-            mem_total = mem_info.total
-            mem_used = mem_info.used
-
-            # Format memory usage as string
-            mem_str = (
-                f"MEM: {mem_usage:.1f}% ({self.format_bytes(mem_used)} / {self.format_bytes(mem_total)})"
-            )
+            return TimeSeriesStore(directory)
+        except StoreLocked as e:
+            print(f"Warning: not storing history: {e}")
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not open history store at {directory}: {e}")
+            return None
+
+    def on_store_changed(self, name, value):
+        self.sampler.set_store(self.create_store())
+
+    def sync_schedule(self):
+        """
+        Follows the sampler's current rate: pauses sampling and the GUI timer
+        while the window is visible but not exposed (fully covered, or on
+        another virtual desktop), and keeps the GUI timer and the rate
+        indicator in step with the adaptive interval.
+        """
+        if not self.isVisible():
+            return
+        window = self.windowHandle()
+        occluded = window is not None and not window.isExposed()
+        if occluded != self.occluded:
+            self.occluded = occluded
+            self.pause_sampler(occluded)
+            if occluded:
+                self.timer.stop()
+            else:
+                self.restart_timer(self.sampler.current_interval_ms)
+
+        interval = self.sampler.current_interval_ms
+        if not occluded and self.timer.interval() != interval:
+            self.restart_timer(interval)
+        if occluded:
+            rate_text = "paused"
+        elif self.sample_state == "cached":
+            rate_text = "cached"
+        elif not getattr(self.sampler, "publishing", True):
+            rate_text = "no daemon"  # The shared sampler has gone away
+        else:
+            rate_text = f"{interval / 1000:.1f}s"
+        if self.rate_label.text() != rate_text:
+            self.rate_label.setText(rate_text)
 
-            self.mem_label.setText(mem_str)
-            self.cpu_label.setText(f"CPU: {cpu_usage:.1f}%")
+    def update_stats(self):
+        """
+        Reads the latest sample from the background sampler and updates the labels.
+        """
+        diagnostics = self.diagnostics
+        try:
+            diagnostics.begin()
+            sample = self.sampler.buffer.latest()
+            if sample is not None:
+                self.sample_state = "live"
+            self.sync_schedule()
+            diagnostics.mark("schedule")
+            if sample is None:
+                return
+            diagnostics.record("sample", self.sampler.tick_seconds)
+            if self.config.show_history:
+                self.update_history()
+                diagnostics.mark("history")
+            self.show_sample(sample, self.sample_peak(sample))
+            diagnostics.mark("labels")
+            if self.config.per_core:
+                self.update_core_strip(self.sampler.core_usage)
+                diagnostics.mark("cores")
+            if self.config.show_io:
+                self.update_io_rows(self.sampler.io_rates)
+                diagnostics.mark("io")
+            if self.config.cgroups:
+                self.update_cgroup_rows(self.sampler.cgroup_stats)
+                diagnostics.mark("cgroups")
+            if self.providers.version != self.providers_version:
+                self.update_provider_rows()
+                diagnostics.mark("providers")
+            if self.remote is not None and self.remote.version != self.remote_version:
+                self.update_host_rows()
+                diagnostics.mark("hosts")
+            if self.config.show_diagnostics:
+                self.update_diagnostic_rows()
 
         except Exception as e:
             print(f"Error updating stats: {e}")
 
-    def format_bytes(self, bytes, decimals=1):
+    def sample_peak(self, sample):
+        """
+        Returns the highest CPU reading behind sample when sub-sampling,
+        otherwise None.
+        """
+        spread = self.sampler.spread
+        if spread is None or spread[0] != sample[0] or spread[1] is None:
+            return None  # Off, or the sampler has already moved on
+        return spread[1][1]
+
+    def show_sample(self, sample, peak=None):
+        """
+        Writes one sample (SAMPLE_FIELDS order) into the CPU and MEM rows,
+        with the interval's CPU peak when there is one.
+        """
+        _, cpu_usage, mem_usage, mem_used, mem_total = sample
+        mem_used = int(mem_used)
+        mem_total = int(mem_total)
+
+        # Format memory usage as string
+        mem_str = (
+            f"MEM: {mem_usage:.1f}% ({format_bytes(mem_used)} / {format_bytes(mem_total)})"
+        )
+
+        self.mem_label.setText(mem_str)
+        if peak is None:
+            self.cpu_label.setText(f"CPU: {cpu_usage:.1f}%")
+        else:
+            self.cpu_label.setText(f"CPU: {cpu_usage:.1f}% (peak {peak:.0f}%)")
+
+    def poll_first_sample(self):
         """
-        Helper function to format bytes into human-readable units.
+        Shows the sampler's first sample as soon as it is published rather
+        than a whole interval later.
         """
-        KB = 1024
-        MB = KB * 1024
-        GB = MB * 1024
+        if self.sampler.buffer.count:
+            self.update_stats()
+        elif self.isVisible():
+            QTimer.singleShot(FIRST_SAMPLE_POLL_MS, self.poll_first_sample)
 
-        if bytes < KB:
-            return f"{bytes} B"
-        elif bytes < MB:
-            return f"{bytes / KB:.{decimals}f} KB"
-        elif bytes < GB:
-            return f"{bytes / MB:.{decimals}f} GB"
+    def update_history(self):
+        """
+        Feeds every sample published since the last tick into the
+        sparklines, so short spikes between ticks are not lost.
+        """
+        self.seen_samples, samples = self.sampler.buffer.since(self.seen_samples)
+        for sample in samples:
+            self.cpu_history.append(sample[1])
+            self.mem_history.append(sample[2])
+
+    def update_core_strip(self, fractions):
+        """
+        Rebuilds the per-core heat strip from busy fractions (0.0 - 1.0).
+        The strip is a single 1-pixel-high image scaled into its rectangle,
+        so painting costs the same for 4 cores or 128.
+        """
+        count = len(fractions)
+        if count == 0:
+            self.core_image = None
         else:
-            return f"{bytes / GB:.{decimals}f} GB"
+            pixels = heat_pixels(fractions)
+            self.core_image = QImage(pixels, count, 1, count * 4, QImage.Format.Format_ARGB32).copy()
+        self.update(self.core_strip_rect)
+
+    def update_io_rows(self, rates):
+        """
+        Shows total disk throughput and IOPS, and the busiest network interfaces.
+        """
+        if rates is None:
+            return  # The first rates need two reads of the counters
+        lines = [
+            f"{'DISK':<6} R{format_rate(rates['disk_read']):>10}  W{format_rate(rates['disk_write']):>10}",
+            f"{'IOPS':<6} R{rates['disk_read_iops']:>10.0f}  W{rates['disk_write_iops']:>10.0f}",
+        ]
+        lines.extend(
+            f"{name[:6]:<6} \u2193{format_rate(rx):>10}  \u2191{format_rate(tx):>10}"
+            for name, rx, tx, _ in rates["net"][:NET_ROWS]
+        )
+        lines.extend([""] * (len(self.io_rows) - len(lines)))
+        for row, line in zip(self.io_rows, lines):
+            row.setText(line)
+
+    def update_cgroup_rows(self, stats):
+        """
+        Shows the busiest cgroups' CPU and memory against their own limits.
+        """
+        if stats is None:
+            return
+        lines = []
+        for entry in stats[:CGROUP_ROWS]:
+            line = f"{entry['name'][-14:]:<14} CPU{entry['cpu_percent']:5.1f}%  MEM{entry['mem_percent']:5.1f}%"
+            if entry["mem_pressure"]:
+                line += f"  psi {entry['mem_pressure']:.1f}"
+            lines.append(line)
+        lines.extend([""] * (len(self.cgroup_rows) - len(lines)))
+        for row, line in zip(self.cgroup_rows, lines):
+            row.setText(line)
+
+    def update_diagnostic_rows(self):
+        """
+        Shows the widget's own CPU and memory use, its mean cost per tick
+        and how late the timer has been firing.
+        """
+        diagnostics = self.diagnostics
+        cpu_percent, rss = diagnostics.process_usage()
+        mean_jitter, max_jitter = diagnostics.jitter_ms()
+        self.diagnostic_rows[0].setText(f"SELF cpu {cpu_percent:.1f}%  rss {format_bytes(rss)}")
+        self.diagnostic_rows[1].setText(
+            f"TICK {diagnostics.tick_ms():.2f} ms  late {mean_jitter:.0f}/{max_jitter:.0f} ms  missed {diagnostics.missed}"
+        )
+
+    def dump_diagnostics(self):
+        """
+        Writes the diagnostics to a JSON file and prints where it went.
+        """
+        try:
+            path = self.diagnostics.dump({
+                "update_interval_ms": self.config.update_interval_ms,
+                "current_interval_ms": self.sampler.current_interval_ms,
+            })
+            print(f"Diagnostics written to {path}")
+        except OSError as e:
+            print(f"Error writing diagnostics: {e}")
+
+    def set_profiling(self, enabled):
+        """
+        Turns cProfile on or off for the GUI thread.
+        """
+        try:
+            path = self.diagnostics.set_profiling(enabled)
+            if path:
+                print(f"Profile written to {path}")
+        except OSError as e:
+            print(f"Error writing profile: {e}")
+
+    def set_tracing(self, enabled):
+        """
+        Turns tracemalloc allocation tracing on or off.
+        """
+        try:
+            path = self.diagnostics.set_tracing(enabled)
+            if path:
+                print(f"Allocation report written to {path}")
+        except OSError as e:
+            print(f"Error writing allocation report: {e}")
+
+    def update_host_rows(self):
+        """
+        Shows how many remote hosts are up, then the hosts that are down
+        and the busiest of the rest. Only reads the client's last published
+        snapshot, so a slow or dead host never holds up the GUI thread.
+        """
+        remote = self.remote
+        self.remote_version = remote.version
+        hosts = remote.snapshot
+        down = [host for host in hosts if host[1] is None]
+        up = sorted((host for host in hosts if host[1] is not None), key=lambda host: host[1][1], reverse=True)
+        lines = [f"HOSTS {len(up)}/{len(hosts)} up"]
+        for name, _, error, retry_in in down[:HOST_ROWS]:
+            state = f"retry {retry_in:.0f}s" if error else "connecting"
+            lines.append(f"{name[:14]:<14} {state}")
+        for name, sample, _, _ in up[:HOST_ROWS - len(lines) + 1]:
+            lines.append(f"{name[:14]:<14} CPU{sample[1]:5.1f}%  MEM{sample[2]:5.1f}%")
+        lines.extend([""] * (len(self.host_rows) - len(lines)))
+        for row, line in zip(self.host_rows, lines):
+            row.setText(line)
+
+    def update_provider_rows(self):
+        """
+        Rewrites the panels of the providers that have new results. A provider
+        that failed or timed out shows why instead of its last, stale values.
+        """
+        self.providers_version = self.providers.version
+        results = self.providers.results
+        for name, provider in list(self.provider_instances.items()):
+            entry = results.get(name)
+            if entry is None:
+                continue
+            _, values, error = entry
+            if values is None:
+                lines = [f"{provider.label or name}: {error}"]
+            else:
+                try:
+                    lines = provider.format(values)[:provider.rows]
+                except Exception as e:
+                    lines = [f"{provider.label or name}: {e}"]
+            rows = self.provider_rows[name]
+            lines.extend([""] * (len(rows) - len(lines)))
+            for row, line in zip(rows, lines):
+                row.setText(line)
 
     def contextMenuEvent(self, event: QContextMenuEvent):
         """
@@ -194,6 +756,92 @@ class SystemMonitorWidget(QWidget):
         config_action.triggered.connect(self.open_settings_window)
         context_menu.addAction(config_action)
 
+        per_core_action = QAction("Per-Core CPU", self)
+        per_core_action.setCheckable(True)
+        per_core_action.setChecked(self.config.per_core)
+        per_core_action.toggled.connect(self.set_per_core)
+        context_menu.addAction(per_core_action)
+
+        subsample_action = QAction("Peak Sub-Sampling", self)
+        subsample_action.setCheckable(True)
+        subsample_action.setChecked(self.config.subsample)
+        subsample_action.toggled.connect(self.set_subsample)
+        context_menu.addAction(subsample_action)
+
+        history_action = QAction("History Sparklines", self)
+        history_action.setCheckable(True)
+        history_action.setChecked(self.config.show_history)
+        history_action.toggled.connect(self.set_show_history)
+        context_menu.addAction(history_action)
+
+        adaptive_action = QAction("Adaptive Rate", self)
+        adaptive_action.setCheckable(True)
+        adaptive_action.setChecked(self.config.adaptive_rate)
+        adaptive_action.toggled.connect(self.set_adaptive_rate)
+        context_menu.addAction(adaptive_action)
+
+        shared_action = QAction("Shared Sampler", self)
+        shared_action.setCheckable(True)
+        shared_action.setChecked(not isinstance(self.sampler, Sampler))
+        shared_action.toggled.connect(self.set_shared_sampler)
+        context_menu.addAction(shared_action)
+
+        cgroup_action = QAction("Container Limits (cgroup)", self)
+        cgroup_action.setCheckable(True)
+        cgroup_action.setChecked(self.config.sample_source == "cgroup")
+        cgroup_action.toggled.connect(self.set_cgroup_source)
+        context_menu.addAction(cgroup_action)
+
+        cgroups_action = QAction("Cgroups...", self)
+        cgroups_action.triggered.connect(self.set_cgroups)
+        context_menu.addAction(cgroups_action)
+
+        io_action = QAction("Disk / Network", self)
+        io_action.setCheckable(True)
+        io_action.setChecked(self.config.show_io)
+        io_action.toggled.connect(self.set_show_io)
+        context_menu.addAction(io_action)
+
+        for setting in PROVIDER_MODULES:
+            cls = self.provider_class(setting)
+            if cls.label:
+                provider_action = QAction(cls.label, self)
+                provider_action.setCheckable(True)
+                provider_action.setChecked(bool(self.config.get(cls.setting)))
+                provider_action.toggled.connect(lambda enabled, cls=cls: self.config.set(cls.setting, enabled))
+                context_menu.addAction(provider_action)
+
+        alerts_action = QAction("Alerts...", self)
+        alerts_action.triggered.connect(self.set_alert_rules)
+        context_menu.addAction(alerts_action)
+
+        remote_action = QAction("Remote Hosts...", self)
+        remote_action.triggered.connect(self.set_remote_hosts)
+        context_menu.addAction(remote_action)
+
+        diagnostics_menu = context_menu.addMenu("Diagnostics")
+        show_diagnostics_action = QAction("Show Overhead", self)
+        show_diagnostics_action.setCheckable(True)
+        show_diagnostics_action.setChecked(self.config.show_diagnostics)
+        show_diagnostics_action.toggled.connect(self.set_show_diagnostics)
+        diagnostics_menu.addAction(show_diagnostics_action)
+
+        dump_action = QAction("Dump to JSON", self)
+        dump_action.triggered.connect(self.dump_diagnostics)
+        diagnostics_menu.addAction(dump_action)
+
+        profile_action = QAction("Profile (cProfile)", self)
+        profile_action.setCheckable(True)
+        profile_action.setChecked(self.diagnostics.profiler is not None)
+        profile_action.toggled.connect(self.set_profiling)
+        diagnostics_menu.addAction(profile_action)
+
+        tracing_action = QAction("Trace Allocations (tracemalloc)", self)
+        tracing_action.setCheckable(True)
+        tracing_action.setChecked(self.diagnostics.tracing())
+        tracing_action.toggled.connect(self.set_tracing)
+        diagnostics_menu.addAction(tracing_action)
+
         # --- Close Action ---
         close_action = QAction("Close Widget", self)
         close_action.triggered.connect(self.close)
@@ -228,128 +876,439 @@ class SystemMonitorWidget(QWidget):
 
     def open_settings_window(self):
         """
-        Opens a separate window to display and modify widget settings,
-        organized into tabs.
+        Opens the settings dialog in this process. Changes are applied live
+        through its setting_changed signal; opening it again while it is
+        already shown just raises it.
         """
-        self.settings_process = QProcess()
-        self.settings_process.start("python", ["settings_app.py"])  # Adjust path if needed
-        self.settings_process.finished.connect(self.read_settings)
+        if self.settings_window is not None:
+            self.settings_window.raise_()
+            self.settings_window.activateWindow()
+            return
 
-    def read_settings(self):
-        """
-        Reads the settings from QSettings (or a file) after the settings process finishes.
-        """
-        temp_settings = QSettings("SettingsApp", "TempSettings")  # Same scope as settings_app
-        self.update_interval_ms = int(temp_settings.value("update_interval_ms", 2000))
-        self.corner_margin = int(temp_settings.value("corner_margin", 10))
-        self.widget_width = int(temp_settings.value("widget_width", 250))
-        self.label_height = int(temp_settings.value("label_height", 20))
-        self.label_padding = int(temp_settings.value("label_padding", 5))
-        self.text_color = str(temp_settings.value("text_color", "white"))
-        self.current_corner = str(temp_settings.value("corner", "top-left"))
+        from settings_app import SettingsWindow  # Only needed once the dialog is opened
 
-        self.settings.setValue("update_interval_ms", self.update_interval_ms)
-        self.settings.setValue("corner_margin", self.corner_margin)
-        self.settings.setValue("widget_width", self.widget_width)
-        self.settings.setValue("label_height", self.label_height)
-        self.settings.setValue("label_padding", self.label_padding)
-        self.settings.setValue("text_color", self.text_color)
-        self.settings.setValue("corner", self.current_corner)
+        self.settings_window = SettingsWindow(self.config.values(), self)
+        self.settings_window.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose, True)
+        self.settings_window.setting_changed.connect(self.config.set)
+        self.settings_window.finished.connect(self.on_settings_closed)
+        self.settings_window.show()
 
-        self.timer.start(self.update_interval_ms)
-        self.position_in_corner()
-        self.update_text_color()
+    def on_settings_closed(self):
+        self.settings_window = None
+        self.config.sync()
+
+    def on_interval_changed(self, name, value):
+        self.restart_timer(value)
+        self.sampler.set_interval(value)
 
     def set_top_left(self):
         """
         Sets the widget's corner to top-left and repositions it.
         """
-        self.current_corner = "top-left"
-        self.settings.setValue("corner", self.current_corner)
-        self.position_in_corner()
+        self.config.set("corner", "top-left")
 
     def set_top_right(self):
         """
         Sets the widget's corner to top-right and repositions it.
         """
-        self.current_corner = "top-right"
-        self.settings.setValue("corner", self.current_corner)
-        self.position_in_corner()
+        self.config.set("corner", "top-right")
+
+    def set_per_core(self, enabled):
+        """
+        Shows or hides the per-core CPU heat strip.
+        """
+        self.config.set("per_core", enabled)
+
+    def on_per_core_changed(self, name, enabled):
+        self.sampler.set_per_core(enabled)
+        if not enabled:
+            self.core_image = None
+        self.schedule_relayout()  # Resize for the strip
+
+    def set_subsample(self, enabled):
+        """
+        Turns sub-sampling (and the CPU peak on the CPU row) on or off.
+        """
+        self.config.set("subsample", enabled)
+
+    def on_subsample_changed(self, name, value):
+        self.sampler.set_subsample(self.config.subsample_ms if self.config.subsample else 0)
+
+    def set_show_history(self, enabled):
+        """
+        Shows or hides the CPU and memory history sparklines.
+        """
+        self.config.set("show_history", enabled)
+
+    def on_show_history_changed(self, name, enabled):
+        self.cpu_history.clear()
+        self.mem_history.clear()
+        self.seen_samples = self.sampler.buffer.count
+        self.schedule_relayout()  # Resize for the sparkline column
+
+    def on_history_length_changed(self, name, length):
+        self.cpu_history = Sparkline(self, length)
+        self.mem_history = Sparkline(self, length)
+        self.seen_samples = self.sampler.buffer.count
+        self.schedule_relayout()
+
+    def set_adaptive_rate(self, enabled):
+        """
+        Turns the adaptive sampling rate on or off.
+        """
+        self.config.set("adaptive_rate", enabled)
+
+    def on_schedule_changed(self, name, value):
+        self.sampler.set_scheduler(self.create_scheduler())
+        self.sync_schedule()
+
+    def provider_class(self, setting):
+        """
+        Returns the provider class that setting turns on. The first time,
+        this imports its module and creates its (hidden) panel.
+        """
+        cls = self.provider_classes.get(setting)
+        if cls is not None:
+            return cls
+        importlib.import_module(PROVIDER_MODULES[setting])
+        cls = next(cls for cls in PROVIDERS.values() if cls.setting == setting)
+        self.provider_classes[setting] = cls
+        rows = self.provider_rows[cls.name] = [TextRow(self, "", self.panel_font) for _ in range(cls.rows)]
+        for row in rows:
+            row.setVisible(bool(self.config.get(setting)))
+        self.rows.extend(rows)
+        if cls.interval_setting:
+            self.config.watch(
+                cls.interval_setting, lambda name, value, cls=cls: self.providers.set_interval(cls.name, value)
+            )
+        return cls
+
+    def start_provider(self, cls):
+        """
+        Creates a provider from the config and hands it to the scheduler.
+        Returns False if it cannot run here (no sensors in a VM, say); its
+        panel is then hidden and its setting turned back off, so later
+        launches do not warn and reserve an empty panel again.
+        """
+        interval_ms = self.config.get(cls.interval_setting) if cls.interval_setting else None
+        try:
+            provider = cls(interval_ms)
+        except (OSError, ValueError) as e:
+            print(f"Warning: {cls.label or cls.name} unavailable ({e}); turning it off")
+            for row in self.provider_rows[cls.name]:
+                row.setVisible(False)
+            self.config.set(cls.setting, False)
+            self.schedule_relayout()
+            return False
+        self.stop_provider_events(cls.name)
+        self.provider_instances[cls.name] = provider
+        self.providers.add(provider)
+        notifiers = []
+        for fd in provider.event_fds():
+            notifier = QSocketNotifier(fd, QSocketNotifier.Type.Exception, self)  # POLLPRI
+            notifier.activated.connect(lambda *args, fd=fd, provider=provider: self.on_provider_event(provider, fd))
+            notifiers.append(notifier)
+        self.provider_notifiers[cls.name] = notifiers
+        return True
+
+    def stop_provider_events(self, name):
+        """
+        Stops watching a provider's event fds, before the provider closes them.
+        """
+        for notifier in self.provider_notifiers.pop(name, ()):
+            notifier.setEnabled(False)
+            notifier.deleteLater()
+
+    def on_provider_event(self, provider, fd):
+        """
+        Refreshes a provider straight away when the kernel signals one of its
+        fds; its panel is redrawn as soon as the result is in, without
+        waiting for the update timer.
+        """
+        provider.event(fd)
+        self.providers.refresh(provider.name)
+
+    def on_provider_toggled(self, cls, enabled):
+        if enabled:
+            if not self.start_provider(cls):
+                return  # Turned back off
+        else:
+            self.stop_provider_events(cls.name)
+            self.providers.remove(cls.name)
+            self.provider_instances.pop(cls.name, None)
+        for row in self.provider_rows[cls.name]:
+            row.setText("")
+            row.setVisible(enabled)
+        self.schedule_relayout()  # Resize for the panel
+
+    def set_show_io(self, enabled):
+        """
+        Shows or hides the disk and network throughput rows.
+        """
+        self.config.set("show_io", enabled)
+
+    def on_show_io_changed(self, name, enabled):
+        self.sampler.set_io(enabled)
+        for row in self.io_rows:
+            row.setText("")
+            row.setVisible(enabled)
+        self.schedule_relayout()  # Resize for the rows
+
+    def set_shared_sampler(self, enabled):
+        """
+        Switches between reading a shared sampler daemon and sampling here.
+        """
+        if self.config.shared_sampler == enabled:
+            self.on_sampler_changed("shared_sampler", enabled)  # Retry a daemon that was not up yet
+        else:
+            self.config.set("shared_sampler", enabled)
+
+    def start_remote(self):
+        """
+        Starts polling the configured remote agents in the background.
+        """
+        from remote import RemoteHosts, parse_hosts  # asyncio is only loaded when hosts are set
+
+        self.remote = RemoteHosts(parse_hosts(self.config.remote_hosts), self.config.remote_interval_ms)
+        self.remote.start()
+
+    def stop_remote(self):
+        """
+        Stops polling remote agents, if any are configured.
+        """
+        if self.remote is not None:
+            self.remote.stop()
+            self.remote = None
+        self.remote_version = 0
+
+    def set_remote_hosts(self):
+        """
+        Asks for the remote agents to show, as "host[:port], ...".
+        """
+        from PyQt6.QtWidgets import QInputDialog  # Only needed once a prompt is opened
+
+        text, ok = QInputDialog.getText(
+            self, "Remote Hosts", "Agents (host[:port], comma separated; empty for none):",
+            text=self.config.remote_hosts,
+        )
+        if ok:
+            self.config.set("remote_hosts", text.strip())
+
+    def on_remote_changed(self, name, value):
+        from remote import parse_hosts
+
+        hosts = parse_hosts(self.config.remote_hosts)
+        if not hosts:
+            self.stop_remote()
+        elif self.remote is None:
+            self.start_remote()
+        else:
+            self.remote.interval_ms = self.config.remote_interval_ms
+            self.remote.set_hosts(hosts)  # Connections to hosts still listed are kept
+        for row in self.host_rows:
+            row.setText("")
+            row.setVisible(bool(hosts))
+        self.schedule_relayout()  # Resize for the rows
+
+    def set_cgroup_source(self, enabled):
+        """
+        Switches the CPU and MEM rows between this process's cgroup, measured
+        against its limits, and the whole host.
+        """
+        self.config.set("sample_source", "cgroup" if enabled else "auto")
+
+    def set_cgroups(self):
+        """
+        Asks for the cgroups to list in the cgroup panel.
+        """
+        from PyQt6.QtWidgets import QInputDialog  # Only needed once a prompt is opened
+
+        text, ok = QInputDialog.getText(
+            self, "Cgroups", "Cgroups (paths or globs, comma separated; self for this one; empty for none):",
+            text=self.config.cgroups,
+        )
+        if ok:
+            self.config.set("cgroups", text.strip())
+
+    def on_cgroups_changed(self, name, value):
+        self.sampler.set_cgroups(value)
+        for row in self.cgroup_rows:
+            row.setText("")
+            row.setVisible(bool(value))
+        self.schedule_relayout()  # Resize for the rows
+
+    def set_show_diagnostics(self, enabled):
+        """
+        Shows or hides the widget's own overhead rows.
+        """
+        self.config.set("show_diagnostics", enabled)
+
+    def on_show_diagnostics_changed(self, name, enabled):
+        for row in self.diagnostic_rows:
+            row.setText("")
+            row.setVisible(enabled)
+        self.schedule_relayout()  # Resize for the rows
+
+    def prompt_int(self, name, title, label):
+        """
+        Asks for a whole number and stores it in the named setting.
+        """
+        from PyQt6.QtWidgets import QInputDialog  # Only needed once a prompt is opened
+
+        field = FIELDS[name]  # Every int field has bounds; the dialog enforces them
+        value, ok = QInputDialog.getInt(self, title, label, self.config.get(name), field.minimum, field.maximum)
+        if ok:
+            self.config.set(name, value)
 
     def set_widget_width(self):
         """
         Allows the user to set the widget's width.
         """
-        width, ok = QInputDialog.getInt(self, "Set Width", "Enter widget width:", int(self.widget_width))
-        if ok:
-            self.widget_width = width
-            self.settings.setValue("widget_width", self.widget_width)
-            self.position_in_corner()  # Reposition and resize
+        self.prompt_int("widget_width", "Set Width", "Enter widget width:")
 
     def set_update_interval(self):
         """
         Allows the user to set the update interval.
         """
-        interval, ok = QInputDialog.getInt(self, "Set Update Interval", "Enter update interval (ms):", int(self.update_interval_ms))
-        if ok:
-            self.update_interval_ms = interval
-            self.settings.setValue("update_interval_ms", self.update_interval_ms)
-            self.timer.start(self.update_interval_ms)
+        self.prompt_int("update_interval_ms", "Set Update Interval", "Enter update interval (ms):")
 
     def set_text_color(self):
         """
         Allows the user to set the text color using a QColorDialog.
         """
-        initial_color = QColor(self.text_color)  # Start with the current color
+        from PyQt6.QtWidgets import QColorDialog  # Only needed once the picker is opened
+
+        initial_color = QColor(self.config.text_color)  # Start with the current color
         color = QColorDialog.getColor(initial_color, self, "Set Text Color")
         if color.isValid():
-            self.text_color = color.name()  # Get the color's name (e.g., #RRGGBB)
-            self.settings.setValue("text_color", self.text_color)
-            self.update_text_color()
+            self.config.set("text_color", color.name())  # Get the color's name (e.g., #RRGGBB)
 
     def set_corner_margin(self):
         """
         Allows the user to set the corner margin.
         """
-        margin, ok = QInputDialog.getInt(self, "Set Corner Margin", "Enter corner margin (pixels):", int(self.corner_margin))
-        if ok:
-            self.corner_margin = margin
-            self.settings.setValue("corner_margin", self.corner_margin)
-            self.position_in_corner()  # Reposition
+        self.prompt_int("corner_margin", "Set Corner Margin", "Enter corner margin (pixels):")
 
     def set_label_height(self):
         """
         Allows the user to set the label height.
         """
-        height, ok = QInputDialog.getInt(self, "Set Label Height", "Enter label height (pixels):", int(self.label_height))
-        if ok:
-            self.label_height = height
-            self.settings.setValue("label_height", self.label_height)
-            self.position_in_corner()  # Reposition and resize
+        self.prompt_int("label_height", "Set Label Height", "Enter label height (pixels):")
 
     def set_label_padding(self):
         """
         Allows the user to set the label padding.
         """
-        padding, ok = QInputDialog.getInt(self, "Set Label Padding", "Enter label padding (pixels):", int(self.label_padding))
-        if ok:
-            self.label_padding = padding
-            self.settings.setValue("label_padding", self.label_padding)
-            self.position_in_corner()
+        self.prompt_int("label_padding", "Set Label Padding", "Enter label padding (pixels):")
 
     def update_text_color(self):
         """
-        Updates the text color of the labels.
+        Updates the text color of the painted rows.
+        """
+        self.text_qcolor = QColor(self.config.text_color)
+        self.update()
+
+    def paintEvent(self, event):
+        """
+        Paints only the rows that intersect the dirty region.
+        """
+        start = time.perf_counter()
+        dirty = event.rect()
+        painter = QPainter(self)
+        text_color = self.text_qcolor
+        for row in self.rows:
+            if row.visible and row.rect.intersects(dirty):
+                painter.setPen(row.color if row.color is not None else text_color)
+                row.paint(painter)
+        if self.core_image is not None and self.core_strip_rect.intersects(dirty):
+            painter.drawImage(self.core_strip_rect, self.core_image)
+        if self.config.show_history:
+            spark_color = QColor(self.text_qcolor)
+            spark_color.setAlpha(180)
+            for sparkline in (self.mem_history, self.cpu_history):
+                if sparkline.rect.intersects(dirty):
+                    sparkline.paint(painter, spark_color)
+        painter.end()
+        self.diagnostics.record("paint", time.perf_counter() - start)
+        if self.startup_probe:
+            self.report_startup()
+
+    def report_startup(self):
+        """
+        Prints the wall-clock time of the first frame and of the first frame
+        with live values, then quits. Only used by the startup benchmark.
+        """
+        if not self.first_frame_painted:
+            self.first_frame_painted = True
+            print(f"first_frame {time.time():.6f}", flush=True)
+        if self.sample_state == "live":
+            print(f"first_live_frame {time.time():.6f}", flush=True)
+            self.startup_probe = False
+            self.shutdown()
+            QTimer.singleShot(0, QApplication.quit)
+
+    def showEvent(self, event):
+        """
+        Resumes sampling and the GUI timer when the widget is shown.
+        """
+        super().showEvent(event)
+        self.occluded = False
+        self.pause_sampler(False)
+        if self.remote is not None:
+            self.remote.paused = False
+        self.restart_timer(self.sampler.current_interval_ms)
+        window = self.windowHandle()
+        if window is not None and not self.watching_exposure:
+            window.installEventFilter(self)  # Expose events drive occlusion
+            self.watching_exposure = True
+        QTimer.singleShot(0, self.poll_first_sample)
+
+    def hideEvent(self, event):
+        """
+        Suspends sampling and stops the GUI timer while the widget is hidden
+        (e.g. via the tray icon's "Hide").
+        """
+        super().hideEvent(event)
+        self.timer.stop()
+        self.occluded = False
+        self.pause_sampler(True)
+        if self.remote is not None:
+            self.remote.paused = True
+
+    def closeEvent(self, event):
+        """
+        Shuts the widget down when it closes.
+        """
+        self.shutdown()
+        super().closeEvent(event)
+
+    def shutdown(self):
+        """
+        Stops the background sampler and scanner, writes out pending
+        settings and reports, and keeps the last sample for the next launch.
+        Safe to call more than once.
         """
-        palette = QPalette()
-        palette.setColor(QPalette.ColorRole.WindowText, QColor(self.text_color))
-        self.cpu_label.setPalette(palette)
-        self.mem_label.setPalette(palette)
+        if self.shut_down:
+            return
+        self.shut_down = True
+        self.sampler.stop()
+        for name in list(self.provider_notifiers):
+            self.stop_provider_events(name)
+        self.providers.stop()
+        self.stop_remote()
+        self.set_profiling(False)
+        self.set_tracing(False)
+        sample = self.sampler.buffer.latest()
+        if sample is not None:
+            save_last_sample(self.last_sample_path, sample)
+        self.config.sync()
 
     def eventFilter(self, obj, event):
         if obj == self and event.type() == QEvent.Type.ContextMenu:
             self.contextMenuEvent(event)  # Call your existing contextMenuEvent
             return True  # Indicate that you've handled the event
+        if obj is self.windowHandle() and event.type() == QEvent.Type.Expose:
+            QTimer.singleShot(0, self.sync_schedule)  # Exposure settles after the event
         return super().eventFilter(obj, event)
 
 class SystemTrayIcon(QSystemTrayIcon):
@@ -399,6 +1358,7 @@ class SystemTrayIcon(QSystemTrayIcon):
         """
         Quits the application and its processes.
         """
+        self.widget.shutdown()
         QApplication.quit()
 
     def on_tray_icon_activated(self, reason):
@@ -416,7 +1376,9 @@ if __name__ == '__main__':
     app = QApplication(sys.argv)
 
     widget = SystemMonitorWidget()
+    app.aboutToQuit.connect(widget.shutdown)  # Also covers logout and session end
     tray_icon = SystemTrayIcon(widget)
+    widget.tray_icon = tray_icon  # For alert notifications
 
     widget.show()
 
@@ -0,0 +1,334 @@
+import mmap
+import os
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- Configuration ---
+SEGMENT_RECORDS = 65536
+MAX_SEGMENTS = 16
+# --- End Configuration ---
+
+MAGIC = b"SWTS"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")  # magic, version, record size, record count
+
+# timestamp, cpu_percent, mem_percent, mem_used, mem_total
+RAW_RECORD = struct.Struct("<dffqq")
+# bucket start, sample count, cpu min/max/mean, mem_percent min/max/mean
+ROLLUP_RECORD = struct.Struct("<dIffffff")
+
+# (name, bucket seconds, records per segment, segments kept)
+ROLLUPS = (
+    ("1s", 1, SEGMENT_RECORDS, MAX_SEGMENTS),
+    ("1m", 60, SEGMENT_RECORDS, 4),
+    ("1h", 3600, 8760, 4),
+)
+
+
+class StoreLocked(OSError):
+    """
+    Raised when another process is already writing to a store directory.
+    """
+
+
+_held_locks = {}  # directory -> [lock fd, stores in this process using it]
+_held_locks_lock = threading.Lock()  # Stores are opened on the GUI thread and closed on the sampler's
+
+
+def lock_directory(directory):
+    """
+    Takes an exclusive lock on directory/lock for this process. Raises
+    StoreLocked if another process holds it: two writers would map the same
+    active segment with their own record counts and overwrite each other's
+    records. Stores within one process share the lock (a replacement store
+    is opened before the sampler thread closes the old one); release it
+    with unlock_directory().
+    """
+    os.makedirs(directory, exist_ok=True)
+    key = os.path.realpath(directory)
+    with _held_locks_lock:
+        held = _held_locks.get(key)
+        if held is not None:
+            held[1] += 1
+            return key
+        fd = os.open(os.path.join(key, "lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            raise StoreLocked(f"{directory} is in use by another process") from None
+        _held_locks[key] = [fd, 1]
+    return key
+
+
+def unlock_directory(key):
+    with _held_locks_lock:
+        held = _held_locks.get(key)
+        if held is None:
+            return
+        held[1] -= 1
+        if held[1] == 0:
+            del _held_locks[key]
+            os.close(held[0])  # Releases the lock
+
+
+class Segment:
+    """
+    One preallocated, memory-mapped file of fixed-size records.
+
+    The header's record count is only bumped after the record itself is in
+    place, so a reader (or a restart after a crash) never sees a partial
+    record. Records are in timestamp order, which lets range queries
+    binary-search instead of scanning.
+    """
+
+    def __init__(self, path, record, capacity=None, writable=False):
+        self.path = path
+        self.record = record
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        if writable and not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, record.size, 0))
+                f.truncate(HEADER.size + capacity * record.size)  # Sparse until written
+        with open(path, "r+b" if writable else "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=access)
+        magic, version, record_size, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or record_size != record.size:
+            self.map.close()
+            raise ValueError(f"{path} is not a compatible segment")
+        self.capacity = (len(self.map) - HEADER.size) // record.size
+
+    def full(self):
+        return self.count >= self.capacity
+
+    def append(self, values):
+        self.record.pack_into(self.map, HEADER.size + self.count * self.record.size, *values)
+        self.count += 1
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.record.size, self.count)
+
+    def timestamp(self, index):
+        return struct.unpack_from("<d", self.map, HEADER.size + index * self.record.size)[0]
+
+    def last_timestamp(self):
+        return self.timestamp(self.count - 1) if self.count else None
+
+    def bisect(self, timestamp):
+        """
+        Returns the index of the first record at or after timestamp.
+        """
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def records(self, start, end):
+        """
+        Yields the records with start <= timestamp <= end.
+        """
+        size = self.record.size
+        unpack_from = self.record.unpack_from
+        for index in range(self.bisect(start), self.count):
+            values = unpack_from(self.map, HEADER.size + index * size)
+            if values[0] > end:
+                break
+            yield values
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+
+
+class Series:
+    """
+    A directory of rotated segments holding one record type.
+
+    Only the newest segment is kept mapped for writing. When it fills up a
+    new one is started (named after its first timestamp) and the oldest
+    segments beyond max_segments are deleted, so disk use and RSS stay bounded
+    no matter how long the widget runs.
+    """
+
+    def __init__(self, directory, record, segment_records=SEGMENT_RECORDS, max_segments=MAX_SEGMENTS):
+        self.directory = directory
+        self.record = record
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        os.makedirs(directory, exist_ok=True)
+        self.active = None
+        names = self.segment_names()
+        if names:
+            try:
+                self.active = Segment(os.path.join(directory, names[-1]), record, writable=True)
+            except ValueError as e:
+                print(f"Warning: {e}. Starting a new segment.")
+
+    def segment_names(self):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(".seg"))
+
+    def append(self, values):
+        if self.active is None or self.active.full():
+            self._rotate(values[0])
+        self.active.append(values)
+
+    def _rotate(self, timestamp):
+        if self.active is not None:
+            self.active.close()
+        path = os.path.join(self.directory, f"{int(timestamp * 1000):015d}.seg")
+        self.active = Segment(path, self.record, self.segment_records, writable=True)
+        for name in self.segment_names()[:-self.max_segments]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError as e:
+                print(f"Warning: could not prune {name}: {e}")
+
+    def query(self, start, end):
+        """
+        Yields the records with start <= timestamp <= end, oldest first.
+        Segments outside the range are never opened; the ones inside are
+        mapped read-only and binary-searched, so only the pages holding the
+        requested records are read.
+        """
+        names = self.segment_names()
+        for i, name in enumerate(names):
+            first = int(name[:-4]) / 1000
+            following = int(names[i + 1][:-4]) / 1000 if i + 1 < len(names) else None
+            if first > end or (following is not None and following <= start):
+                continue
+            try:
+                segment = Segment(os.path.join(self.directory, name), self.record)
+            except (OSError, ValueError):
+                continue
+            try:
+                yield from segment.records(start, end)
+            finally:
+                segment.map.close()
+
+    def close(self):
+        if self.active is not None:
+            self.active.close()
+            self.active = None
+
+
+class Rollup:
+    """
+    Incremental min/max/mean of CPU and memory percentages per time bucket.
+    Each sample costs O(1); a finished bucket becomes one ROLLUP_RECORD.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.bucket = None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.cpu_min = self.mem_min = float("inf")
+        self.cpu_max = self.mem_max = float("-inf")
+        self.cpu_sum = self.mem_sum = 0.0
+
+    def add(self, timestamp, cpu, mem):
+        """
+        Adds one sample. Returns the finished bucket's record when the sample
+        starts a new bucket, otherwise None.
+        """
+        bucket = timestamp - timestamp % self.seconds
+        finished = None
+        if bucket != self.bucket:
+            if self.count:
+                finished = self.record()
+            self.bucket = bucket
+            self.reset()
+        self.count += 1
+        self.cpu_min = min(self.cpu_min, cpu)
+        self.cpu_max = max(self.cpu_max, cpu)
+        self.cpu_sum += cpu
+        self.mem_min = min(self.mem_min, mem)
+        self.mem_max = max(self.mem_max, mem)
+        self.mem_sum += mem
+        return finished
+
+    def record(self):
+        return (
+            self.bucket, self.count,
+            self.cpu_min, self.cpu_max, self.cpu_sum / self.count,
+            self.mem_min, self.mem_max, self.mem_sum / self.count,
+        )
+
+
+class TimeSeriesStore:
+    """
+    Append-only history of every sample plus 1s, 1m and 1h rollups.
+
+    Layout under directory: raw/ and one folder per rollup, each a Series of
+    memory-mapped segments. Everything survives restarts; buckets that were
+    still open when the process stopped are dropped. Only one process may
+    have a store open at a time (see lock_directory).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = lock_directory(directory)
+        self.raw = Series(os.path.join(directory, "raw"), RAW_RECORD)
+        self.rollups = {}
+        self.series = {"raw": self.raw}
+        for name, seconds, segment_records, max_segments in ROLLUPS:
+            self.rollups[name] = Rollup(seconds)
+            self.series[name] = Series(
+                os.path.join(directory, name), ROLLUP_RECORD, segment_records, max_segments
+            )
+
+    def append(self, sample):
+        """
+        Stores one sample in SAMPLE_FIELDS order and updates the rollups.
+        """
+        timestamp, cpu, mem_percent, mem_used, mem_total = sample
+        self.raw.append((timestamp, cpu, mem_percent, int(mem_used), int(mem_total)))
+        for name, rollup in self.rollups.items():
+            finished = rollup.add(timestamp, cpu, mem_percent)
+            if finished is not None:
+                self.series[name].append(finished)
+
+    def query(self, start, end, resolution="raw"):
+        """
+        Yields records in [start, end] from "raw", "1s", "1m" or "1h".
+        Raw records are RAW_RECORD tuples; rollups are ROLLUP_RECORD tuples.
+        """
+        return self.series[resolution].query(start, end)
+
+    def close(self):
+        for series in self.series.values():
+            series.close()
+        if self.lock is not None:
+            unlock_directory(self.lock)
+            self.lock = None
+
+
+def data_directory():
+    """
+    Returns the per-user directory the widget keeps its data files in.
+    """
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    else:
+        base = os.environ.get("XDG_DATA_HOME", os.path.expanduser("~/.local/share"))
+    return os.path.join(base, "system_widget")
+
+
+def default_store_directory():
+    """
+    Returns the per-user directory the history is kept in by default.
+    """
+    return os.path.join(data_directory(), "history")
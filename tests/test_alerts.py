@@ -0,0 +1,110 @@
+import pytest
+
+from alerts import DEFAULT_DURATION_S, DEFAULT_HYSTERESIS, AlertEngine, parse_rule, parse_rules
+
+
+def test_parse_full_rule():
+    rule = parse_rule("cpu.ewma > 90 clear 80 for 30s notify color=red")
+    assert (rule.metric, rule.stat, rule.above) == ("cpu", "ewma", True)
+    assert (rule.threshold, rule.clear, rule.duration_s) == (90.0, 80.0, 30.0)
+    assert rule.actions == {"notify": True, "color": "red"}
+
+
+def test_parse_defaults():
+    rule = parse_rule("mem < 20 notify")
+    assert rule.stat == "value"
+    assert rule.clear == 20 + DEFAULT_HYSTERESIS
+    assert rule.duration_s == DEFAULT_DURATION_S
+
+
+@pytest.mark.parametrize("text, seconds", [("5", 5), ("5s", 5), ("2m", 120), ("1.5h", 5400)])
+def test_parse_durations(text, seconds):
+    assert parse_rule(f"cpu > 50 for {text} notify").duration_s == seconds
+
+
+def test_parse_quoted_hook():
+    rule = parse_rule("cpu.p95 > 80 hook='notify-send \"busy\"'")
+    assert rule.stat == "p95"
+    assert rule.actions == {"hook": 'notify-send "busy"'}
+
+
+@pytest.mark.parametrize("text, message", [
+    ("cpu 90 notify", "expected SUBJECT"),
+    ("cpu >", "expected SUBJECT"),
+    ("disk > 90 notify", "unknown metric"),
+    ("cpu.avg > 90 notify", "unknown statistic"),
+    ("cpu.p100 > 90 notify", "unknown statistic"),
+    ("cpu.p0 > 90 notify", "unknown statistic"),
+    ("cpu > ninety notify", "could not convert"),
+    ("cpu > 90 clear 95 notify", "other side"),
+    ("mem < 10 clear 5 notify", "other side"),
+    ("cpu > 90 clear notify", "could not convert"),
+    ("cpu > 90 clear", "other side"),
+    ("cpu > 90 for soon notify", "could not convert"),
+    ("cpu > 90 shout", "unexpected 'shout'"),
+    ("cpu > 90", "no action"),
+])
+def test_parse_errors(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse_rule(text)
+
+
+def test_parse_rules_skips_bad_ones(capsys):
+    rules = parse_rules("cpu > 90 notify; bogus; ; mem > 95 color=red")
+    assert [rule.metric for rule in rules] == ["cpu", "mem"]
+    assert "ignoring alert 'bogus'" in capsys.readouterr().out
+
+
+def test_fires_only_after_duration():
+    rule = parse_rule("cpu > 90 for 10s notify")
+    assert rule.observe(95, 0) is None
+    assert rule.observe(95, 9.9) is None
+    assert rule.observe(95, 10) is True
+    assert rule.active
+    assert rule.observe(95, 20) is None  # Already active
+
+
+def test_interrupted_condition_restarts_duration():
+    rule = parse_rule("cpu > 90 for 10s notify")
+    rule.observe(95, 0)
+    rule.observe(50, 5)
+    assert rule.observe(95, 10) is None
+    assert rule.observe(95, 19) is None
+    assert rule.observe(95, 20) is True
+
+
+def test_hysteresis_keeps_it_active_between_levels():
+    rule = parse_rule("cpu > 90 clear 80 for 0 notify")
+    assert rule.observe(91, 0) is True
+    # Below the threshold but above the clear level: still active
+    assert rule.observe(85, 1) is None
+    assert rule.active
+    assert rule.observe(80, 2) is False
+    assert not rule.active
+    # Back above the clear level but not the threshold: still clear
+    assert rule.observe(85, 3) is None
+    assert rule.observe(90, 4) is None
+    assert rule.observe(90.5, 5) is True
+
+
+def test_clearing_also_needs_duration():
+    rule = parse_rule("mem < 10 clear 15 for 5s notify")
+    rule.observe(5, 0)
+    assert rule.observe(5, 5) is True
+    assert rule.observe(20, 6) is None
+    assert rule.observe(20, 10) is None
+    assert rule.observe(20, 11) is False
+
+
+def test_engine_reports_transitions_with_statistic():
+    events = []
+    engine = AlertEngine(parse_rules("cpu.ewma > 50 clear 40 for 0 notify"), lambda *event: events.append(event))
+    engine.observe((0.0, 0.0, 10.0, 0, 0))
+    engine.observe((1.0, 100.0, 10.0, 0, 0))  # The average barely moves
+    assert events == []
+    for second in range(2, 200):
+        engine.observe((float(second), 100.0, 10.0, 0, 0))
+    assert len(events) == 1
+    rule, active, value = events[0]
+    assert active and value > 50
+    assert engine.active_rules() == [rule]
@@ -0,0 +1,45 @@
+import pytest
+
+from cgroups import find_root, own_cgroup
+
+CONTAINER_MOUNTINFO = (
+    "1 0 0:50 / / rw,relatime - overlay overlay rw\n"
+    "2 1 0:26 /system.slice/docker-abc.scope /sys/fs/cgroup ro,nosuid - cgroup2 cgroup rw\n"
+)
+
+
+def proc(tmp_path, mountinfo="", cgroup=""):
+    (tmp_path / "self").mkdir()
+    (tmp_path / "self" / "mountinfo").write_text(mountinfo)
+    (tmp_path / "self" / "cgroup").write_text(cgroup)
+    return str(tmp_path)
+
+
+def test_find_root_in_container(tmp_path):
+    assert find_root(proc(tmp_path, CONTAINER_MOUNTINFO)) == ("/sys/fs/cgroup", "/system.slice/docker-abc.scope")
+
+
+def test_find_root_hybrid(tmp_path):
+    mountinfo = (
+        "3 1 0:27 / /sys/fs/cgroup/memory rw - cgroup cgroup rw,memory\n"
+        "4 1 0:28 / /sys/fs/cgroup/unified rw - cgroup2 cgroup2 rw\n"
+    )
+    assert find_root(proc(tmp_path, mountinfo)) == ("/sys/fs/cgroup/unified", "/")
+
+
+def test_find_root_without_cgroup2(tmp_path):
+    assert find_root(proc(tmp_path, "1 0 0:50 / / rw - ext4 /dev/sda1 rw\n")) is None
+    assert find_root(str(tmp_path / "missing")) is None
+
+
+@pytest.mark.parametrize("cgroup, mount_root, expected", [
+    ("0::/user.slice/session-1.scope\n", "/", "/user.slice/session-1.scope"),
+    ("0::/system.slice/docker-abc.scope/app\n", "/system.slice/docker-abc.scope", "/app"),
+    ("0::/system.slice/docker-abc.scope\n", "/system.slice/docker-abc.scope", "/"),
+    ("0::/app\n", "/system.slice/docker-abc.scope", "/app"),  # A cgroup namespace already hides it
+    ("0::/system.slice/docker-abcdef.scope\n", "/system.slice/docker-abc", "/system.slice/docker-abcdef.scope"),
+    ("12:memory:/x\n1:name=systemd:/y\n0::/z\n", "/", "/z"),
+    ("12:memory:/x\n", "/", "/"),
+])
+def test_own_cgroup(tmp_path, cgroup, mount_root, expected):
+    assert own_cgroup(proc(tmp_path, cgroup=cgroup), mount_root) == expected
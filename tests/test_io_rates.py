@@ -0,0 +1,91 @@
+import pytest
+
+import io_rates
+from io_rates import WRAP_MODULUS, WRAP_WINDOW, IORates, counter_delta
+
+
+@pytest.mark.parametrize("current, previous, delta", [
+    (150, 100, 50),
+    (100, 100, 0),
+    (2 ** 40 + 5, 2 ** 40, 5),  # 64-bit counters just count
+    (10, WRAP_MODULUS - 6, 16),  # 32-bit wrap
+    (0, WRAP_MODULUS - 1, 1),
+    (5, WRAP_MODULUS - WRAP_WINDOW, WRAP_WINDOW + 5),  # Wraps from anywhere within WRAP_WINDOW of 2^32
+    (5, WRAP_MODULUS - WRAP_WINDOW - 1, 0),  # From the upper half but not near 2^32: a reset
+    (5, 2 ** 31 + 1, 0),
+    (2 ** 31, WRAP_MODULUS - 1, 0),  # Lands too far past 0 to be a wrap
+    (5, 2 ** 33, 0),  # A 64-bit counter going down is always a reset
+])
+def test_counter_delta(current, previous, delta):
+    assert counter_delta(current, previous) == delta
+
+
+class FakeCounters:
+    def __init__(self, disk_units=(1, 1, 1, 1)):
+        self.disk_units = disk_units
+        self.reads = []
+
+    def read(self):
+        return self.reads.pop(0)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(io_rates.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_rates_scale_sectors_after_the_delta(clock):
+    counters = FakeCounters(disk_units=(512, 512, 1, 1))
+    counters.reads = [
+        ({"sda": (WRAP_MODULUS - 2, 0, 10, 20)}, {}),
+        ({"sda": (2, 4, 30, 25)}, {}),
+    ]
+    rates = IORates(counters)
+    assert rates.read() is None
+    clock[0] += 2.0
+    result = rates.read()
+    assert result["disk_read"] == 4 * 512 / 2
+    assert result["disk_write"] == 4 * 512 / 2
+    assert result["disk_read_iops"] == 10
+    assert result["disk_write_iops"] == 2.5
+
+
+def test_new_and_vanished_devices(clock):
+    counters = FakeCounters()
+    counters.reads = [
+        ({"sda": (0, 0, 0, 0)}, {"eth0": (0, 0)}),
+        ({"sda": (100, 0, 1, 0), "sdb": (10 ** 9, 0, 0, 0)}, {"wlan0": (500, 500)}),
+    ]
+    rates = IORates(counters)
+    rates.read()
+    clock[0] += 1.0
+    result = rates.read()
+    assert result["disk_read"] == 100  # sdb only gets a baseline
+    assert result["net"] == []
+
+
+def test_interfaces_ranked_by_current_rate(clock):
+    counters = FakeCounters()
+    counters.reads = [
+        ({}, {"eth0": (10 ** 12, 0), "eth1": (0, 0), "eth2": (5, 5)}),
+        ({}, {"eth0": (10 ** 12, 0), "eth1": (1000, 1000), "eth2": (5, 5)}),
+    ]
+    rates = IORates(counters)
+    rates.read()
+    clock[0] += 1.0
+    net = rates.read()["net"]
+    assert [entry[0] for entry in net] == ["eth1", "eth0", "eth2"]
+    assert net[0][1:] == (1000, 1000, 2000)
+
+
+def test_no_rates_without_elapsed_time(clock):
+    counters = FakeCounters()
+    counters.reads = [({}, {}), ({}, {})]
+    rates = IORates(counters)
+    rates.read()
+    assert rates.read() is None
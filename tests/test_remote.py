@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from remote import (
+    AGENT_PORT, HEADER, MAX_PAYLOAD, MSG_ERROR, MSG_HELLO, MSG_SAMPLES, ProtocolError,
+    decode_samples, encode_frame, encode_samples, parse_hosts, read_frame,
+)
+
+
+def read(data):
+    """
+    Runs read_frame over data as if it had arrived on a socket.
+    """
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_frame(reader)
+
+    return asyncio.run(run())
+
+
+def test_frame_round_trip():
+    assert read(encode_frame(MSG_HELLO, b"web1")) == (MSG_HELLO, b"web1")
+    assert read(encode_frame(MSG_HELLO)) == (MSG_HELLO, b"")
+
+
+def test_samples_round_trip():
+    samples = [(1700000000.25, 12.5, 40.0, 2 ** 33, 2 ** 34), (1700000001.25, 100.0, 0.0, 0, 1)]
+    message, payload = read(encode_samples(42, samples))
+    assert message == MSG_SAMPLES
+    assert decode_samples(payload) == (42, samples)  # Chosen to be exact in float32
+
+
+def test_empty_batch():
+    assert decode_samples(read(encode_samples(7, []))[1]) == (7, [])
+
+
+@pytest.mark.parametrize("cut", [1, 10])
+def test_truncated_batch(cut):
+    payload = read(encode_samples(2, [(1.0, 2.0, 3.0, 4, 5)] * 2))[1]
+    with pytest.raises(ProtocolError, match="truncated"):
+        decode_samples(payload[:-cut])
+
+
+def test_error_frame_raises_its_message():
+    with pytest.raises(ProtocolError, match="store is locked"):
+        read(encode_frame(MSG_ERROR, "store is locked".encode()))
+
+
+@pytest.mark.parametrize("header", [
+    HEADER.pack(b"HT", 1, MSG_HELLO, 0),
+    HEADER.pack(b"SW", 2, MSG_HELLO, 0),
+])
+def test_foreign_header(header):
+    with pytest.raises(ProtocolError, match="not a system widget agent"):
+        read(header)
+
+
+def test_oversized_frame():
+    with pytest.raises(ProtocolError, match="too large"):
+        read(HEADER.pack(b"SW", 1, MSG_SAMPLES, MAX_PAYLOAD + 1))
+
+
+def test_short_frame():
+    with pytest.raises(asyncio.IncompleteReadError):
+        read(encode_frame(MSG_HELLO, b"web1")[:-1])
+
+
+def test_parse_hosts():
+    assert parse_hosts("web1, web2:7080 [::1]:7079 [fe80::1] fe80::2 web1") == [
+        ("web1", AGENT_PORT), ("web2", 7080), ("::1", 7079), ("fe80::1", AGENT_PORT), ("fe80::2", AGENT_PORT),
+    ]
+    assert parse_hosts("") == []
+    assert parse_hosts("db:http") == [("db:http", AGENT_PORT)]
@@ -0,0 +1,109 @@
+import math
+import random
+
+import pytest
+
+from stats import EWMA, Aggregate, P2Quantile, WindowedQuantile
+
+
+def exact_quantile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+@pytest.mark.parametrize("p", [0.5, 0.9, 0.99])
+@pytest.mark.parametrize("distribution", ["uniform", "normal", "exponential"])
+def test_p2_tracks_exact_quantile(p, distribution):
+    rng = random.Random(1)
+    draw = {
+        "uniform": lambda: rng.uniform(0, 100),
+        "normal": lambda: rng.gauss(50, 10),
+        "exponential": lambda: rng.expovariate(0.1),
+    }[distribution]
+    values = [draw() for _ in range(20000)]
+    estimator = P2Quantile(p)
+    for value in values:
+        estimator.update(value)
+    exact = exact_quantile(values, p)
+    spread = exact_quantile(values, 0.999) - exact_quantile(values, 0.001)
+    assert abs(estimator.value - exact) <= 0.02 * spread
+
+
+def test_p2_markers_stay_ordered():
+    rng = random.Random(2)
+    estimator = P2Quantile(0.9)
+    for _ in range(5000):
+        estimator.update(rng.choice((0.0, 100.0, rng.uniform(0, 100))))
+        if estimator.count > 5:
+            assert estimator.heights == sorted(estimator.heights)
+            assert estimator.positions == sorted(estimator.positions)
+            assert estimator.positions[0] == 1
+            assert estimator.positions[4] == estimator.count
+
+
+def test_p2_extremes_are_min_and_max():
+    rng = random.Random(3)
+    values = [rng.uniform(-5, 5) for _ in range(1000)]
+    estimator = P2Quantile(0.5)
+    for value in values:
+        estimator.update(value)
+    assert estimator.heights[0] == min(values)
+    assert estimator.heights[4] == max(values)
+
+
+def test_p2_before_five_samples_is_nearest_rank():
+    estimator = P2Quantile(0.5)
+    assert estimator.value is None
+    for value in (30, 10, 20):
+        estimator.update(value)
+    assert estimator.value == 20
+    estimator.update(40)
+    assert estimator.value == 30
+
+
+def test_p2_constant_input():
+    estimator = P2Quantile(0.95)
+    for _ in range(100):
+        estimator.update(7.0)
+    assert estimator.value == 7.0
+
+
+def test_windowed_quantile_starts_over():
+    estimator = WindowedQuantile(0.5, window=50)
+    for _ in range(50):
+        estimator.update(10.0)
+    assert estimator.value == 10.0
+    # A fresh window with too few samples still reports the previous estimate
+    estimator.update(90.0)
+    assert estimator.value == 10.0
+    for _ in range(49):
+        estimator.update(90.0)
+    assert estimator.value == 90.0
+
+
+def test_ewma_weights_by_elapsed_time():
+    average = EWMA(tau_s=10.0)
+    assert average.update(0.0, 0.0) == 0.0
+    value = average.update(100.0, 10.0)
+    assert value == pytest.approx(100.0 * (1 - math.exp(-1)))
+    # The same span in small steps ends up at the same value
+    stepped = EWMA(tau_s=10.0)
+    stepped.update(0.0, 0.0)
+    for step in range(1, 101):
+        stepped.update(100.0, step / 10)
+    assert stepped.value == pytest.approx(value)
+
+
+def test_ewma_ignores_clock_going_backwards():
+    average = EWMA(tau_s=10.0)
+    average.update(50.0, 100.0)
+    assert average.update(0.0, 90.0) == 50.0
+
+
+def test_aggregate_time_weighted_mean():
+    aggregate = Aggregate()
+    assert aggregate.take() is None
+    aggregate.add(10.0, 3.0)
+    aggregate.add(50.0, 1.0)
+    assert aggregate.take() == (10.0, 50.0, 20.0, 2)
+    assert aggregate.take() is None
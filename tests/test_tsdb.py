@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tsdb import RAW_RECORD, Series, StoreLocked, TimeSeriesStore, lock_directory, unlock_directory
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+
+def raw(timestamp):
+    return (timestamp, 1.0, 2.0, 3, 4)
+
+
+def test_series_rotates_and_prunes(tmp_path):
+    series = Series(str(tmp_path), RAW_RECORD, segment_records=10, max_segments=3)
+    for second in range(45):
+        series.append(raw(float(second)))
+    names = series.segment_names()
+    assert len(names) == 3  # 5 segments written, the 2 oldest pruned
+    assert int(names[0][:-4]) == 20000  # Named after the first timestamp, in ms
+    assert [record[0] for record in series.query(0, 100)] == [float(second) for second in range(20, 45)]
+    series.close()
+
+
+@pytest.mark.parametrize("start, end", [(0, 44), (9, 10), (10, 10), (9.5, 9.9), (12.5, 31), (44, 100), (-5, 0)])
+def test_series_query_ranges_across_segments(tmp_path, start, end):
+    series = Series(str(tmp_path), RAW_RECORD, segment_records=10, max_segments=10)
+    for second in range(45):
+        series.append(raw(float(second)))
+    expected = [float(second) for second in range(45) if start <= second <= end]
+    assert [record[0] for record in series.query(start, end)] == expected
+    series.close()
+
+
+def test_series_resumes_its_last_segment(tmp_path):
+    series = Series(str(tmp_path), RAW_RECORD, segment_records=10)
+    for second in range(5):
+        series.append(raw(float(second)))
+    series.close()
+    series = Series(str(tmp_path), RAW_RECORD, segment_records=10)
+    for second in range(5, 12):
+        series.append(raw(float(second)))
+    assert len(series.segment_names()) == 2
+    assert [record[0] for record in series.query(0, 100)] == [float(second) for second in range(12)]
+    series.close()
+
+
+def test_store_rollups(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    for tenth in range(25):  # 0.0 - 2.4 s
+        store.append((tenth / 10, float(tenth), 50.0, 1, 2))
+    raw_records = list(store.query(0, 10))
+    assert len(raw_records) == 25
+    buckets = list(store.query(0, 10, "1s"))  # The bucket at 2 s is still open
+    assert [(bucket[0], bucket[1]) for bucket in buckets] == [(0.0, 10), (1.0, 10)]
+    assert buckets[1][2:5] == (10.0, 19.0, pytest.approx(14.5))
+    assert list(store.query(0, 10, "1m")) == []
+    store.close()
+
+
+def test_lock_is_shared_within_a_process(tmp_path):
+    first = lock_directory(str(tmp_path))
+    second = lock_directory(str(tmp_path))
+    unlock_directory(second)
+    assert held_elsewhere(tmp_path)
+    unlock_directory(first)
+    assert not held_elsewhere(tmp_path)
+
+
+def test_second_process_cannot_open_store(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    assert held_elsewhere(tmp_path)
+    store.close()
+    assert not held_elsewhere(tmp_path)
+    with pytest.raises(StoreLocked):
+        lock_directory_in_child_then_here(tmp_path)
+
+
+def held_elsewhere(directory):
+    """
+    Returns whether another process gets StoreLocked for directory.
+    """
+    code = (
+        "import sys; from tsdb import StoreLocked, lock_directory\n"
+        "try:\n    lock_directory(sys.argv[1])\nexcept StoreLocked:\n    sys.exit(3)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code, str(directory)], cwd=SRC, timeout=30)
+    return result.returncode == 3
+
+
+def lock_directory_in_child_then_here(directory):
+    child = subprocess.Popen(
+        [sys.executable, "-c", "import sys; from tsdb import lock_directory; lock_directory(sys.argv[1]); "
+         "print('locked', flush=True); sys.stdin.read()", str(directory)],
+        cwd=SRC, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert child.stdout.readline().strip() == "locked"
+        lock_directory(str(directory))
+    finally:
+        child.stdin.close()
+        child.wait(timeout=30)